@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# (C) 2025 Jonas Zeihe, MIT License. Developer: Jonas Zeihe. Contact: JonasZeihe@gmail.com
+
+"""
+Benchmarks the scanner, the ignore matcher and output writing separately.
+
+Each benchmark runs on a generated synthetic tree and reports the best wall
+time of several repetitions, the throughput in the unit it processes (lines
+rendered by a scan, nodes of the tree model, paths or pattern matches) and
+the peak memory allocated by Python during one additional, traced repetition.
+Results can be saved as a JSON baseline and compared with a later run:
+
+    python benchmarks/run_benchmarks.py --preset medium --save baseline.json
+    python benchmarks/run_benchmarks.py --preset medium --compare baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import DirectoryScannerConfig  # noqa: E402
+from app.scanner import Scanner  # noqa: E402
+from app.gitignore_handler import (  # noqa: E402
+    GitignoreMatcher,
+    extract_patterns_from_file,
+    is_ignored,
+    match_pattern,
+)
+from app.main import write_lines  # noqa: E402
+from app.tree_model import build_tree  # noqa: E402
+from tree_generator import PRESETS, TreeParameters, generate_tree  # noqa: E402
+
+MATCH_PATTERN_SAMPLE = 2000
+
+
+def measure(function, repeat, unit):
+    """
+    Runs a benchmark function and measures its time and peak memory.
+
+    Args:
+        function: Callable returning the number of items it processed.
+        repeat (int): Number of timed repetitions.
+        unit (str): What the function counts, such as "lines" or "paths".
+
+    Returns:
+        dict: Best time, item count, unit, items per second and peak memory.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": round(best, 6),
+        "count": count,
+        "unit": unit,
+        "per_second": round(count / best) if best else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def collect_paths(tree):
+    """
+    Lists every path of the tree relative to its root.
+
+    Args:
+        tree (str): Root of the generated tree.
+
+    Returns:
+        list: Tuples of (relative path, is_dir).
+    """
+    paths = []
+    for directory, dirnames, filenames in os.walk(tree):
+        relative_dir = os.path.relpath(directory, tree).replace(os.sep, "/")
+        prefix = "" if relative_dir == "." else relative_dir + "/"
+        paths.extend((prefix + name, True) for name in dirnames)
+        paths.extend((prefix + name, False) for name in filenames)
+    return paths
+
+
+def collect_patterns(tree):
+    """
+    Gathers the patterns of all .gitignore files of the tree.
+
+    Args:
+        tree (str): Root of the generated tree.
+
+    Returns:
+        list: The patterns, in walking order.
+    """
+    patterns = []
+    for directory, _, filenames in os.walk(tree):
+        if ".gitignore" in filenames:
+            patterns.extend(extract_patterns_from_file(Path(directory, ".gitignore")))
+    return patterns
+
+
+def bench_scan(tree, workers, logger):
+    """
+    Returns a benchmark of a Scanner over the whole tree, counting the
+    rendered lines.
+    """
+
+    def run():
+        config = DirectoryScannerConfig(workers=workers, log_entries=False)
+        return len(Scanner(config, logger).scan(tree))
+
+    return run
+
+
+def bench_tree_model(tree, logger):
+    """
+    Returns a benchmark of building the compact tree model of the whole tree.
+    """
+
+    def run():
+        config = DirectoryScannerConfig(log_entries=False)
+        config.base_gitignore_paths = set(config.excluded_files)
+        return len(build_tree(tree, config, logger)) - 1
+
+    return run
+
+
+def bench_is_ignored(paths, patterns):
+    """
+    Returns a benchmark of is_ignored against one matcher of all patterns.
+    """
+    matcher = GitignoreMatcher(patterns)
+
+    def run():
+        for relative_path, is_dir in paths:
+            is_ignored(relative_path, matcher, set(), None, is_dir)
+        return len(paths)
+
+    return run
+
+
+def bench_match_pattern(paths, patterns):
+    """
+    Returns a benchmark of match_pattern over a sample of paths and patterns.
+    """
+    sample = [
+        (relative_path, pattern)
+        for relative_path, _ in paths[:MATCH_PATTERN_SAMPLE]
+        for pattern in patterns[:8]
+    ]
+
+    def run():
+        for relative_path, pattern in sample:
+            match_pattern(relative_path, relative_path.rsplit("/", 1)[-1], pattern)
+        return len(sample)
+
+    return run
+
+
+def bench_write(lines, target):
+    """
+    Returns a benchmark of writing rendered lines to a file.
+    """
+
+    def run():
+        with open(target, "w", encoding="utf-8", buffering=1 << 20) as stream:
+            return write_lines(iter(lines), stream)
+
+    return run
+
+
+def run_benchmarks(parameters, repeat, workers):
+    """
+    Generates the tree and runs all benchmarks on it.
+
+    Args:
+        parameters (TreeParameters): Shape of the synthetic tree.
+        repeat (int): Number of timed repetitions per benchmark.
+        workers (int): Worker threads used by the scan benchmark.
+
+    Returns:
+        dict: The report, ready to be saved as JSON.
+    """
+    logger = logging.getLogger("SkryperBenchmark")
+    logger.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="skryper-bench-") as workdir:
+        tree = os.path.join(workdir, "tree")
+        os.mkdir(tree)
+        counts = generate_tree(tree, parameters)
+        paths = collect_paths(tree)
+        patterns = collect_patterns(tree) or ["*.log"]
+
+        config = DirectoryScannerConfig(log_entries=False)
+        lines = Scanner(config, logger).scan(tree)[1:]
+
+        results = {
+            "scan": measure(bench_scan(tree, workers, logger), repeat, "lines"),
+            "tree_model": measure(bench_tree_model(tree, logger), repeat, "nodes"),
+            "is_ignored": measure(bench_is_ignored(paths, patterns), repeat, "paths"),
+            "match_pattern": measure(
+                bench_match_pattern(paths, patterns), repeat, "matches"
+            ),
+            "write_output": measure(
+                bench_write(lines, os.path.join(workdir, "out.txt")), repeat, "lines"
+            ),
+        }
+
+    return {
+        "parameters": parameters.to_dict(),
+        "tree": counts,
+        "workers": workers,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+def print_report(report, baseline=None):
+    """
+    Prints the results, with the speedup over a baseline if one is given.
+    """
+    print(f"Tree: {report['tree']}")
+    for name, result in report["benchmarks"].items():
+        line = (
+            f"{name:<14} {result['seconds']:>10.4f} s "
+            f"{result['per_second'] or 0:>12,} {result['unit'] + '/s':<10}"
+            f"{result['peak_memory_bytes'] / 1024:>10,.0f} KiB peak"
+        )
+        previous = (baseline or {}).get("benchmarks", {}).get(name)
+        if previous and result["seconds"]:
+            line += f"   x{previous['seconds'] / result['seconds']:.2f} vs baseline"
+        print(line)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Skryper benchmarks")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--width", type=int)
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--files", type=int)
+    parser.add_argument("--gitignore-density", type=float)
+    parser.add_argument("--pattern-complexity", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--save", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", help="Compare with a saved JSON baseline")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    settings = dict(PRESETS[args.preset])
+    for name in ("width", "depth", "files", "gitignore_density"):
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+    if args.pattern_complexity is not None:
+        settings["pattern_complexity"] = args.pattern_complexity
+    if args.seed is not None:
+        settings["seed"] = args.seed
+    parameters = TreeParameters(**settings)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("parameters") != parameters.to_dict():
+            print("Warning: baseline was recorded with different tree parameters.")
+
+    report = run_benchmarks(parameters, args.repeat, args.workers)
+    print_report(report, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
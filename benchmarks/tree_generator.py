@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# (C) 2025 Jonas Zeihe, MIT License. Developer: Jonas Zeihe. Contact: JonasZeihe@gmail.com
+
+"""
+Generates deterministic synthetic directory trees for the benchmarks.
+
+The same parameters and seed always produce the same tree, including the
+content of every .gitignore file, so runs on different machines or commits
+scan identical input.
+"""
+
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+FILE_STEMS = ("main", "utils", "index", "config", "model", "view", "test", "data")
+FILE_EXTENSIONS = (".py", ".txt", ".log", ".md", ".json", ".tmp", ".pyc", ".js")
+DIRECTORY_STEMS = ("src", "lib", "build", "docs", "cache", "pkg", "out", "tests")
+
+PRESETS = {
+    "small": dict(width=3, depth=3, files=8),
+    "medium": dict(width=4, depth=5, files=12),
+    "large": dict(width=5, depth=6, files=16),
+}
+
+
+@dataclass
+class TreeParameters:
+    """
+    Shape of a synthetic tree.
+
+    width is the number of subdirectories per directory, depth the number of
+    directory levels below the root and files the number of files per
+    directory. gitignore_density is the probability that a directory holds a
+    .gitignore, and pattern_complexity the number of patterns in each one.
+    """
+
+    width: int = 3
+    depth: int = 3
+    files: int = 8
+    gitignore_density: float = 0.3
+    pattern_complexity: int = 6
+    seed: int = 1
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        Returns:
+            Dict[str, object]: The parameters as a JSON-serializable dict.
+        """
+        return asdict(self)
+
+
+def make_patterns(rng: random.Random, count: int) -> List[str]:
+    """
+    Draws a mix of .gitignore patterns of increasing cost to match.
+
+    Args:
+        rng (random.Random): Source of randomness.
+        count (int): Number of patterns to draw.
+
+    Returns:
+        List[str]: The patterns.
+    """
+    kinds = (
+        lambda: f"*{rng.choice(FILE_EXTENSIONS)}",
+        lambda: f"{rng.choice(FILE_STEMS)}{rng.choice(FILE_EXTENSIONS)}",
+        lambda: f"{rng.choice(DIRECTORY_STEMS)}/",
+        lambda: f"/{rng.choice(DIRECTORY_STEMS)}",
+        lambda: f"{rng.choice(DIRECTORY_STEMS)}/**/*{rng.choice(FILE_EXTENSIONS)}",
+        lambda: f"{rng.choice(FILE_STEMS)}_[0-9]*",
+        lambda: f"!{rng.choice(FILE_STEMS)}{rng.choice(FILE_EXTENSIONS)}",
+    )
+    return [rng.choice(kinds)() for _ in range(count)]
+
+
+def generate_tree(root: str, parameters: TreeParameters) -> Dict[str, int]:
+    """
+    Creates a synthetic tree below root.
+
+    Args:
+        root (str): Existing, empty directory to fill.
+        parameters (TreeParameters): Shape of the tree.
+
+    Returns:
+        Dict[str, int]: Number of directories, files and .gitignore files created.
+    """
+    rng = random.Random(parameters.seed)
+    counts = {"directories": 0, "files": 0, "gitignores": 0}
+    pending = [(root, 0)]
+    while pending:
+        directory, level = pending.pop()
+        for index in range(parameters.files):
+            stem = rng.choice(FILE_STEMS)
+            name = f"{stem}_{index}{rng.choice(FILE_EXTENSIONS)}"
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+                file.write(stem * rng.randint(1, 64))
+            counts["files"] += 1
+
+        if rng.random() < parameters.gitignore_density:
+            patterns = make_patterns(rng, parameters.pattern_complexity)
+            path = os.path.join(directory, ".gitignore")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("\n".join(patterns) + "\n")
+            counts["gitignores"] += 1
+
+        if level == parameters.depth:
+            continue
+        for index in range(parameters.width):
+            child = os.path.join(directory, f"{rng.choice(DIRECTORY_STEMS)}_{index}")
+            os.mkdir(child)
+            counts["directories"] += 1
+            pending.append((child, level + 1))
+    return counts
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} TARGET_DIR [{'|'.join(PRESETS)}]")
+        sys.exit(1)
+    target = sys.argv[1]
+    preset = sys.argv[2] if len(sys.argv) > 2 else "small"
+    os.makedirs(target, exist_ok=False)
+    counts = generate_tree(target, TreeParameters(**PRESETS[preset]))
+    print(f"Generated {counts} in {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,55 @@
 """
 Build script for creating a standalone executable of the application
 via PyInstaller or similar tools.
+
+Targets:
+    onefile  A single executable (PyInstaller --onefile). It unpacks itself
+             to a temporary directory on every launch.
+    onedir   A directory with the executable and its libraries (PyInstaller
+             --onedir). Nothing is unpacked, so it starts faster.
+    zipapp   dist/skryper.pyz, run by an installed Python 3. Modules are
+             stored precompiled, so nothing is compiled on launch. Needs no
+             virtual environment and no PyInstaller.
 """
 
+import argparse
+import compileall
 import os
 import sys
 import subprocess
 import shutil
+import tempfile
+import zipapp
+
+TARGETS = ("onefile", "onedir", "zipapp")
+ZIPAPP_MAIN = """import sys
+
+from app.main import main
+
+sys.exit(main())
+"""
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Build Skryper.")
+    parser.add_argument(
+        "--target",
+        choices=TARGETS,
+        default="onefile",
+        help="What to build (default: onefile)",
+    )
+    args = parser.parse_args()
+
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
     os.chdir(root)
 
+    dist_path = os.path.join(root, "dist")
+    if args.target == "zipapp":
+        os.makedirs(dist_path, exist_ok=True)
+        target = build_zipapp(os.path.join(root, "src"), dist_path)
+        print(f"Build complete. Run it with: python {target}")
+        return
+
     if not os.path.isdir("venv"):
         print("No virtual environment found. Please initialize the project first.")
         input("Press Enter to exit...")
@@ -25,7 +62,6 @@ def main():
     _run_in_venv(["pip", "install", "-r", "requirements.txt"])
     _run_in_venv(["python", "-m", "pip", "show", "pyinstaller"], check_install=True)
 
-    dist_path = os.path.join(root, "dist")
     build_path = os.path.join(root, "build")
     _rmdir(dist_path)
     _rmdir(build_path)
@@ -33,7 +69,7 @@ def main():
     image_path = os.path.join(root, "images", "background.jpeg")
     pyinstaller_cmd = [
         "pyinstaller",
-        "--onefile",
+        f"--{args.target}",
         "--name",
         "Application",
         "src/app/main.py",
@@ -47,6 +83,43 @@ def main():
     print("Build complete. Executable is in 'dist' folder.")
 
 
+def build_zipapp(source_path, dist_path):
+    """
+    Packs the app package into an executable zip archive.
+
+    The modules are compiled next to their sources, where zipimport looks
+    for them, so launching the archive never compiles the application. Its
+    __main__.py passes the return value of main() on as the exit status.
+
+    Args:
+        source_path (str): The directory containing the app package.
+        dist_path (str): The directory receiving skryper.pyz.
+
+    Returns:
+        str: The path of the archive.
+    """
+    target = os.path.join(dist_path, "skryper.pyz")
+    with tempfile.TemporaryDirectory() as staging:
+        package_path = os.path.join(staging, "app")
+        shutil.copytree(
+            os.path.join(source_path, "app"),
+            package_path,
+            ignore=shutil.ignore_patterns("__pycache__", "*.pyc"),
+        )
+        if not compileall.compile_dir(package_path, quiet=1, legacy=True):
+            raise SystemExit("Compiling the app package failed.")
+        with open(os.path.join(staging, "__main__.py"), "w", encoding="utf-8") as file:
+            file.write(ZIPAPP_MAIN)
+        print("Building zipapp...")
+        zipapp.create_archive(
+            staging,
+            target,
+            interpreter="/usr/bin/env python3",
+            compressed=False,
+        )
+    return target
+
+
 def _run_in_venv(cmd, check_install=False):
     """
     Runs a command inside the virtual environment. If check_install=True and
@@ -2,6 +2,14 @@
 import os
 import sys
 import datetime
+import logging
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "..", "src"))
+
+from app.codebase_extractor import extract_codebase  # noqa: E402
+from app.config import DirectoryScannerConfig  # noqa: E402
+from app.logger import setup_logger  # noqa: E402
 
 EXCLUDED_DIRS = {
     "__pycache__",
@@ -16,27 +24,11 @@ EXCLUDED_DIRS = {
 
 ALLOWED_SUFFIX = ".py"
 ENCODING = "utf-8"
-
-
-def should_exclude_dir(dirname):
-    return dirname in EXCLUDED_DIRS
-
-
-def gather_python_files(base_dir):
-    for root, dirs, files in os.walk(base_dir):
-        dirs[:] = [d for d in dirs if not should_exclude_dir(d)]
-        for file in files:
-            if file.endswith(ALLOWED_SUFFIX):
-                yield os.path.join(root, file)
-
-
-def write_log(log_path, message):
-    with open(log_path, "a", encoding=ENCODING) as log:
-        log.write(message + "\n")
+LOG_BUFFER_SIZE = 1 << 16
+OUTPUT_BUFFER_SIZE = 1 << 20
 
 
 def main():
-    script_dir = os.path.abspath(os.path.dirname(__file__))
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
 
     suffix = sys.argv[1].strip() if len(sys.argv) >= 2 else ""
@@ -44,39 +36,44 @@ def main():
         f"{timestamp}_{suffix}" if suffix else f"{timestamp}_output.txt"
     )
 
-    output_path = os.path.join(script_dir, custom_output_name)
-    log_path = os.path.join(script_dir, f"{timestamp}_combine_log.txt")
+    output_path = os.path.join(SCRIPT_DIR, custom_output_name)
+    log_path = os.path.join(SCRIPT_DIR, f"{timestamp}_combine_log.txt")
     search_path = (
         os.path.abspath(sys.argv[2])
         if len(sys.argv) >= 3
-        else os.path.abspath(os.path.join(script_dir, "..", ".."))
+        else os.path.abspath(os.path.join(SCRIPT_DIR, "..", ".."))
     )
 
-    if not os.path.isdir(search_path):
-        print(f"ERROR: Directory does not exist: {search_path}")
-        write_log(log_path, f"ERROR: Directory does not exist: {search_path}")
-        sys.exit(1)
-
-    write_log(log_path, f"Start: {datetime.datetime.now()} | Scanning {search_path}")
-
-    file_count = 0
-    with open(output_path, "w", encoding=ENCODING) as output_file:
-        output_file.write("Merged Python source files\n" + "=" * 30 + "\n\n")
-        for file_path in gather_python_files(search_path):
-            try:
-                with open(file_path, "r", encoding=ENCODING, errors="ignore") as f:
-                    content = f.read()
-                output_file.write(f"----- {file_path} -----\n{content}\n{'=' * 30}\n\n")
-                write_log(log_path, f"✔ Processed: {file_path}")
-                file_count += 1
-            except Exception as e:
-                write_log(log_path, f"✘ ERROR reading {file_path}: {e}")
-
-    result = (
-        f"{file_count} files processed." if file_count else "No Python files found."
-    )
-    print(f"✅ {result}\nOutput: {output_path}\nLog: {log_path}")
-    write_log(log_path, f"Done: {datetime.datetime.now()} | {result}")
+    with open(log_path, "a", encoding=ENCODING, buffering=LOG_BUFFER_SIZE) as log:
+        if not os.path.isdir(search_path):
+            print(f"ERROR: Directory does not exist: {search_path}")
+            log.write(f"ERROR: Directory does not exist: {search_path}\n")
+            sys.exit(1)
+
+        log.write(f"Start: {datetime.datetime.now()} | Scanning {search_path}\n")
+
+        config = DirectoryScannerConfig(log_entries=False)
+        config.base_gitignore_paths = set(config.excluded_files)
+        config.base_gitignore_paths.update(f"{name}/" for name in EXCLUDED_DIRS)
+        config.base_gitignore_paths.add(os.path.basename(output_path))
+        logger, _ = setup_logger(logging.WARNING, capture=False)
+
+        with open(output_path, "wb", buffering=OUTPUT_BUFFER_SIZE) as output_file:
+            file_count, _ = extract_codebase(
+                search_path,
+                output_file,
+                config,
+                logger,
+                (ALLOWED_SUFFIX,),
+                "Merged Python source files",
+                log,
+            )
+
+        result = (
+            f"{file_count} files processed." if file_count else "No Python files found."
+        )
+        print(f"✅ {result}\nOutput: {output_path}\nLog: {log_path}")
+        log.write(f"Done: {datetime.datetime.now()} | {result}\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Asyncio interface to the directory scanner.
+
+scan_tree walks the same listings as the synchronous scanner and yields the
+same nodes, but every blocking directory read runs on an executor so the
+event loop stays responsive. All scans share one executor by default; each
+scan bounds how many of its reads may be queued there at once, so a large
+scan cannot crowd out concurrent smaller ones.
+"""
+
+# async_scanner.py
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from .directory_scanner import (
+    DirectoryListing,
+    ListingFrame,
+    TreeNode,
+    can_descend,
+    get_base_stack,
+    next_frame_step,
+    read_directory,
+)
+from .ignored_summary import summarize_directory
+
+DEFAULT_MAX_IN_FLIGHT = 4
+
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+
+def get_shared_executor() -> ThreadPoolExecutor:
+    """
+    Returns the executor shared by all scans that do not bring their own.
+
+    Returns:
+        ThreadPoolExecutor: The process-wide scan executor.
+    """
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(thread_name_prefix="skryper-async")
+        return _shared_executor
+
+
+async def scan_tree(
+    directory: Path,
+    config,
+    logger: logging.Logger,
+    executor: Optional[Executor] = None,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> AsyncIterator[TreeNode]:
+    """
+    Scans a directory and yields its nodes in rendering order.
+
+    Subdirectories are read ahead on the executor, at most max_in_flight at
+    a time. Cancelling the consuming task or closing the iterator cancels
+    all reads that have not started yet; reads already running finish on
+    their thread and are discarded.
+
+    Args:
+        directory (Path): The directory to scan.
+        config: The configuration object that holds ignore rules and limits.
+        logger (logging.Logger): Logger instance for logging.
+        executor (Optional[Executor]): The executor to read on. Defaults to
+            the shared executor.
+        max_in_flight (int): Maximum number of reads this scan submits to the
+            executor at once.
+
+    Yields:
+        TreeNode: The nodes below the directory.
+    """
+    loop = asyncio.get_running_loop()
+    executor = executor or get_shared_executor()
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+
+    async def run(function, *args):
+        async with semaphore:
+            return await loop.run_in_executor(executor, function, *args)
+
+    def open_frame(listing: DirectoryListing, depth: int) -> ListingFrame:
+        pending = {}
+        if can_descend(depth, config):
+            pending = {
+                item.relative_path: asyncio.ensure_future(
+                    run(
+                        read_directory,
+                        item.entry.path,
+                        item.relative_path + "/",
+                        listing.matcher_stack,
+                        config,
+                        logger,
+                    )
+                )
+                for item in listing.entries
+                if item.is_dir and not item.ignored
+            }
+        summaries = {}
+        if config.summarize_ignored:
+            summaries = {
+                item.relative_path: asyncio.ensure_future(
+                    run(summarize_directory, item.entry.path)
+                )
+                for item in listing.entries
+                if item.is_dir and item.ignored
+            }
+        return ListingFrame(listing, pending, summaries)
+
+    root = await run(
+        read_directory, directory, "", get_base_stack(config), config, logger
+    )
+    if root is None:
+        return
+
+    stack = [open_frame(root, 1)]
+    try:
+        while stack:
+            step = next_frame_step(stack, config)
+            if step is None:
+                continue
+            node, descend = step
+            if node.summary is not None:
+                node = node._replace(summary=await node.summary)
+            child = None
+            if descend:
+                pending = stack[-1].pending.pop(node.item.relative_path, None)
+                child = await pending if pending is not None else None
+            if child is None:
+                yield node
+                continue
+
+            yield node._replace(has_gitignore=child.has_gitignore)
+            stack.append(open_frame(child, node.depth + 1))
+    finally:
+        for frame in stack:
+            for task in (*frame.pending.values(), *frame.summaries.values()):
+                task.cancel()
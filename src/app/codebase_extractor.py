@@ -0,0 +1,259 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Merges the source files of a scanned tree into a single file.
+
+The files are found with the scanner's walk, so .gitignore files, the
+configured exclusions and all scan limits apply. While the output is
+written in walking order, a thread pool reads the next files ahead, in
+batches so that handing work to the pool costs little compared to reading.
+Small files are read whole on the pool; larger ones are copied into the
+output by the kernel with os.sendfile where available, or in chunks
+otherwise, so no file is held in memory more than once. File contents are
+copied byte for byte.
+"""
+
+# codebase_extractor.py
+
+import logging
+import os
+import shutil
+import stat
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+from .config import DEFAULT_SUFFIXES
+from .directory_scanner import get_entry_logger, iter_nodes
+from .gitignore_handler import log_info
+from .long_paths import open_path
+
+DEFAULT_TITLE = "Merged source files"
+DEFAULT_READ_WORKERS = 4
+PENDING_PER_WORKER = 2
+READ_BATCH_SIZE = 32
+READ_AHEAD_LIMIT = 1 << 20
+COPY_CHUNK_SIZE = 1 << 20
+SEPARATOR = "=" * 30
+USE_SENDFILE = sys.platform.startswith("linux")
+
+
+def iter_source_files(
+    directory: Path, config, logger: logging.Logger, suffixes: Sequence[str]
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the files of a scan whose names end with one of the suffixes.
+
+    Args:
+        directory (Path): The directory to scan.
+        config: The configuration object that holds ignore rules and limits.
+        logger (logging.Logger): Logger instance for logging.
+        suffixes (Sequence[str]): The file name endings to collect.
+
+    Yields:
+        Tuple[str, str]: The path relative to the scan root and the full path
+        of every matching file that is not ignored, in walking order.
+    """
+    suffixes = tuple(suffixes)
+    for node in iter_nodes(directory, config, logger):
+        if node.omitted or node.ignored or node.is_dir:
+            continue
+        entry = node.item.entry
+        if entry.name.endswith(suffixes):
+            yield node.relative_path, entry.path
+
+
+def read_ahead(path: str) -> Optional[bytes]:
+    """
+    Reads a small file whole; larger files are left to be copied later.
+
+    Args:
+        path (str): The file to read.
+
+    Returns:
+        Optional[bytes]: The content, or None if the file is larger than
+        READ_AHEAD_LIMIT.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    with open(path, "rb", opener=open_path) as file:
+        if os.fstat(file.fileno()).st_size > READ_AHEAD_LIMIT:
+            return None
+        return file.read()
+
+
+def read_batch(paths: List[str]) -> List[Union[bytes, None, OSError]]:
+    """
+    Reads a batch of files ahead.
+
+    Args:
+        paths (List[str]): The files to read.
+
+    Returns:
+        List[Union[bytes, None, OSError]]: For every file, its content, None
+        if it is left to be copied later, or the error that occurred.
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append(read_ahead(path))
+        except OSError as error:
+            results.append(error)
+    return results
+
+
+def is_regular_file(stream) -> bool:
+    """
+    Returns:
+        bool: Whether the stream is backed by a regular file.
+    """
+    try:
+        return stat.S_ISREG(os.fstat(stream.fileno()).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def copy_file(path: str, output: BinaryIO) -> None:
+    """
+    Appends the content of a file to the output.
+
+    On Linux, a regular output file is filled by os.sendfile without copying
+    the content through Python. Otherwise, and for whatever sendfile did not
+    copy, the file is copied in chunks.
+
+    Args:
+        path (str): The file to copy.
+        output (BinaryIO): The buffered output file.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    with open(path, "rb", opener=open_path) as source:
+        if USE_SENDFILE and is_regular_file(output):
+            output.flush()
+            size = os.fstat(source.fileno()).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(
+                        output.fileno(), source.fileno(), offset, size - offset
+                    )
+                    if not sent:
+                        break
+                    offset += sent
+            except OSError:
+                pass
+            source.seek(offset)
+        shutil.copyfileobj(source, output, COPY_CHUNK_SIZE)
+
+
+def write_source(output: BinaryIO, path: str, content: Optional[bytes]) -> None:
+    """
+    Writes one file with its header and separator.
+
+    Args:
+        output (BinaryIO): The output file.
+        path (str): The path shown in the header.
+        content (Optional[bytes]): The content read ahead, or None to copy
+            the file now.
+    """
+    header = f"----- {path} -----\n".encode("utf-8", "replace")
+    footer = f"\n{SEPARATOR}\n\n".encode("utf-8")
+    if content is not None:
+        output.write(b"".join((header, content, footer)))
+        return
+    output.write(header)
+    copy_file(path, output)
+    output.write(footer)
+
+
+def extract_codebase(
+    directory: Path,
+    output: BinaryIO,
+    config,
+    logger: logging.Logger,
+    suffixes: Sequence[str] = DEFAULT_SUFFIXES,
+    title: str = DEFAULT_TITLE,
+    log_file: Optional[TextIO] = None,
+) -> Tuple[int, int]:
+    """
+    Writes the content of every matching file of a scan to one output.
+
+    Every file is reported either through the logger, which costs a log
+    record per file, or as one line on a plain text stream.
+
+    Args:
+        directory (Path): The directory to scan.
+        output (BinaryIO): The binary output file.
+        config: The configuration object that holds ignore rules, limits and
+            the worker count.
+        logger (logging.Logger): Logger instance for logging.
+        suffixes (Sequence[str]): The file name endings to collect.
+        title (str): The first line of the output.
+        log_file (Optional[TextIO]): Stream that receives one line per file
+            instead of the logger.
+
+    Returns:
+        Tuple[int, int]: The number of files written and of files that
+        could not be read.
+    """
+    workers = config.workers if config.workers > 1 else DEFAULT_READ_WORKERS
+    entry_logger = get_entry_logger(config, logger)
+    written = failed = 0
+    output.write(f"{title}\n{SEPARATOR}\n\n".encode("utf-8"))
+
+    def finish(paths: List[str], future) -> None:
+        nonlocal written, failed
+        for path, content in zip(paths, future.result()):
+            try:
+                if isinstance(content, OSError):
+                    raise content
+                write_source(output, path, content)
+            except OSError as error:
+                failed += 1
+                if log_file is not None:
+                    log_file.write(f"✘ ERROR reading {path}: {error}\n")
+                else:
+                    logger.error("Could not read '%s': %s", path, error)
+                continue
+            written += 1
+            if log_file is not None:
+                log_file.write(f"✔ Processed: {path}\n")
+            else:
+                log_info(entry_logger, "Processed: %s", path)
+
+    pending = deque()
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="skryper-extract"
+    ) as executor:
+
+        def submit(paths: List[str]) -> None:
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                finish(*pending.popleft())
+            pending.append((paths, executor.submit(read_batch, paths)))
+
+        try:
+            batch = []
+            for _, path in iter_source_files(directory, config, logger, suffixes):
+                batch.append(path)
+                if len(batch) == READ_BATCH_SIZE:
+                    submit(batch)
+                    batch = []
+            if batch:
+                submit(batch)
+            while pending:
+                finish(*pending.popleft())
+        finally:
+            for _, future in pending:
+                future.cancel()
+    return written, failed
@@ -13,13 +13,29 @@ This module defines the configuration for the directory scanner.
 
 The configuration includes rules for ignoring specific files and directories,
 inclusion rules to override ignore patterns, and other settings required
-during the directory scanning process.
+during the directory scanning process, and the defaults of command-line
+options, so the argument parser does not need the modules behind them.
 """
 
 # config.py
 
 from dataclasses import dataclass, field
-from typing import Set, List
+from typing import Any, Optional, Set, Tuple
+
+FORMAT_TEXT = "text"
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+FORMAT_EXTENSIONS = {
+    FORMAT_TEXT: ".txt",
+    FORMAT_JSON: ".json",
+    FORMAT_NDJSON: ".ndjson",
+}
+SOURCE_FILESYSTEM = "filesystem"
+SOURCE_GIT_INDEX = "git-index"
+DEFAULT_SUFFIXES = (".py",)
+DEFAULT_INTERVAL = 1.0
+DEFAULT_TOP_DIRECTORIES = 10
+CACHE_FILENAME = ".skryper-cache.sqlite"
 
 
 @dataclass
@@ -36,7 +52,21 @@ class DirectoryScannerConfig:
         default_factory=lambda: get_default_inclusion_rules()
     )
     output_filename: str = ""
-    result: List[str] = field(default_factory=list)
+    workers: int = 1
+    log_entries: bool = True
+    prune_ignored: bool = False
+    summarize_ignored: bool = False
+    max_depth: Optional[int] = None
+    max_entries_per_dir: Optional[int] = None
+    include_paths: Tuple[str, ...] = ()
+    with_size: bool = False
+    with_mtime: bool = False
+    with_lines: bool = False
+    source: str = SOURCE_FILESYSTEM
+    include_untracked: bool = False
+    scan_cache: Optional[Any] = field(default=None, repr=False)
+    profiler: Optional[Any] = field(default=None, repr=False)
+    base_stack: Optional[Any] = field(default=None, repr=False)
 
 
 def get_default_excluded_files() -> Set[str]:
@@ -11,136 +11,1011 @@
 """
 This module provides functionality to recursively scan directories,
 considering .gitignore files and excluding specified files or directories.
+
+Scanning is split into three steps: reading a directory (listing it,
+loading its .gitignore and deciding which entries are ignored), walking the
+listings into a stream of nodes, and rendering the nodes into lines. Walking
+and rendering are generators, so output can be streamed to its destination
+as it is produced. Reading can run ahead on a thread pool while the walk
+stays in the deterministic, sorted order of a serial scan.
 """
 
 # directory_scanner.py
 
 import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from .gitignore_handler import load_gitignore, is_ignored
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from .gitignore_handler import (
+    GitignoreMatcher,
+    MatcherStack,
+    is_ignored,
+    load_gitignore_matcher,
+    log_info,
+    order_base_patterns,
+)
+from .file_metadata import EntryMetadata, format_metadata
+from .ignored_summary import IgnoredSummary, format_summary, summarize_directory
+from .long_paths import scandir_path
+
+GITIGNORE_FILENAME = ".gitignore"
+PREFIX_CONTINUED = "│   "
+PREFIX_LAST = "    "
+GITIGNORE_LINE = "├── .gitignore"
+SUMMARY_LOOKAHEAD = 4096
+
+
+class ScanEntry(NamedTuple):
+    """
+    A directory entry together with the scanner's decision about it.
+    """
+
+    entry: os.DirEntry
+    relative_path: str
+    is_dir: bool
+    ignored: bool
 
 
-def scan_directory(directory: Path, config, logger: logging.Logger, prefix=""):
+class TreeNode(NamedTuple):
     """
-    Scans the directory and appends the structure to the config's result,
-    considering .gitignore files and excluding specified files or directories.
+    An entry reached by the walk, with its place in the tree.
+
+    The depth of the entries directly inside the scanned directory is 1. A node
+    with a positive omitted count stands for the entries left out of a
+    truncated directory; its item carries the path of that directory. The
+    metadata is only set on nodes replayed from a tree model that gathered it.
+    """
+
+    item: ScanEntry
+    depth: int
+    is_last: bool
+    has_gitignore: bool
+    summary: Optional[IgnoredSummary] = None
+    omitted: int = 0
+    metadata: Optional[EntryMetadata] = None
+
+    @property
+    def relative_path(self) -> str:
+        """
+        Returns:
+            str: The path of the entry relative to the scan root.
+        """
+        return self.item.relative_path
+
+    @property
+    def is_dir(self) -> bool:
+        """
+        Returns:
+            bool: Whether the entry is a directory.
+        """
+        return self.item.is_dir
+
+    @property
+    def ignored(self) -> bool:
+        """
+        Returns:
+            bool: Whether the entry is ignored.
+        """
+        return self.item.ignored
+
+
+class ListingFrame:
+    """
+    A listing that is being rendered, with the position of the next entry.
+    """
+
+    __slots__ = ("listing", "pending", "summaries", "index")
+
+    def __init__(
+        self,
+        listing: "DirectoryListing",
+        pending: Dict[str, Future],
+        summaries: Dict[str, Future],
+    ):
+        self.listing = listing
+        self.pending = pending
+        self.summaries = summaries
+        self.index = 0
+
+
+@dataclass
+class DirectoryListing:
+    """
+    The result of reading one directory.
+    """
+
+    path: str
+    relative_dir: str
+    matcher_stack: MatcherStack
+    entries: List[ScanEntry]
+    has_gitignore: bool
+    omitted: int = 0
+
+
+def iter_directory(
+    directory: Path,
+    config,
+    logger: logging.Logger,
+    prefix="",
+    matcher_stack: Optional[MatcherStack] = None,
+    relative_dir: str = "",
+) -> Iterator[str]:
+    """
+    Scans the directory and yields the rendered structure line by line.
+
+    The directory itself is read before this function returns, so an output
+    file created afterwards inside it does not show up in the scan. Everything
+    below is read lazily while the lines are consumed.
 
     Args:
         directory (Path): The directory to scan.
-        config: The configuration object that holds ignore rules and results.
+        config: The configuration object that holds ignore rules.
         logger (logging.Logger): Logger instance for logging.
-        prefix (str, optional): A prefix used for formatting the output. Defaults to an empty string.
+        prefix (str, optional): A prefix used for formatting the output.
+        matcher_stack (Optional[MatcherStack]): The .gitignore matchers of the
+            enclosing directories. Defaults to the base patterns of the config.
+        relative_dir (str, optional): Path of the directory relative to the scan root.
+
+    Returns:
+        Iterator[str]: The rendered lines, without line terminators.
     """
-    logger.debug(f"Scanning directory: {directory}")
+    listing = read_root(directory, config, logger, matcher_stack, relative_dir)
+    if listing is None:
+        return iter(())
+    return render_lines(
+        walk_listing(listing, config, logger),
+        config,
+        logger,
+        prefix,
+        listing.has_gitignore,
+    )
 
-    current_ignore_patterns = update_ignore_patterns(directory, config, logger, prefix)
 
+def iter_nodes(
+    directory: Path,
+    config,
+    logger: logging.Logger,
+    matcher_stack: Optional[MatcherStack] = None,
+    relative_dir: str = "",
+) -> Iterator["TreeNode"]:
+    """
+    Scans the directory and yields one node per entry in rendering order.
+
+    Unlike the rendered text, the nodes include ignored files. As with
+    iter_directory, the directory itself is read before this function returns.
+
+    Args:
+        directory (Path): The directory to scan.
+        config: The configuration object that holds ignore rules.
+        logger (logging.Logger): Logger instance for logging.
+        matcher_stack (Optional[MatcherStack]): The .gitignore matchers of the
+            enclosing directories. Defaults to the base patterns of the config.
+        relative_dir (str, optional): Path of the directory relative to the scan root.
+
+    Returns:
+        Iterator[TreeNode]: The nodes below the directory.
+    """
+    listing = read_root(directory, config, logger, matcher_stack, relative_dir)
+    if listing is None:
+        return iter(())
+    return walk_listing(listing, config, logger)
+
+
+def read_root(
+    directory: Path,
+    config,
+    logger: logging.Logger,
+    matcher_stack: Optional[MatcherStack] = None,
+    relative_dir: str = "",
+) -> Optional["DirectoryListing"]:
+    """
+    Reads the directory a scan starts from.
+
+    Args:
+        directory (Path): The directory to scan.
+        config: The configuration object that holds ignore rules.
+        logger (logging.Logger): Logger instance for logging.
+        matcher_stack (Optional[MatcherStack]): The .gitignore matchers of the
+            enclosing directories. Defaults to the base patterns of the config.
+        relative_dir (str, optional): Path of the directory relative to the scan root.
+
+    Returns:
+        Optional[DirectoryListing]: The listing, or None if it could not be read.
+    """
+    if matcher_stack is None:
+        matcher_stack = get_base_stack(config)
+    return read_directory(directory, relative_dir, matcher_stack, config, logger)
+
+
+def walk_listing(
+    listing: "DirectoryListing", config, logger: logging.Logger
+) -> Iterator["TreeNode"]:
+    """
+    Walks a listing serially or with a thread pool, depending on the config.
+
+    Args:
+        listing (DirectoryListing): The listing to walk.
+        config: The configuration object that holds ignore rules and worker count.
+        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        Iterator[TreeNode]: The nodes below the listing.
+    """
+    if config.workers > 1 or config.summarize_ignored:
+        return iter_listing_nodes_parallel(listing, config, logger)
+    return iter_listing_nodes(listing, config, logger)
+
+
+def iter_listing_nodes_parallel(
+    listing: "DirectoryListing", config, logger: logging.Logger
+) -> Iterator["TreeNode"]:
+    """
+    Walks a listing while thread pools work ahead of it.
+
+    With more than one worker, a pool reads subdirectories ahead. With
+    config.summarize_ignored, a separate pool summarizes ignored directories,
+    so their size walks never hold up the listing of the scanned tree; see
+    resolve_summaries for how long the output waits for them.
+    The pools live as long as the generator; closing the generator early
+    cancels all work that has not started yet.
+
+    Args:
+        listing (DirectoryListing): The listing to walk.
+        config: The configuration object that holds ignore rules and worker count.
+        logger (logging.Logger): Logger instance for logging.
+
+    Yields:
+        TreeNode: The nodes below the listing.
+    """
+    executors = []
+    executor = summary_executor = None
+    if config.workers > 1:
+        executor = ThreadPoolExecutor(
+            max_workers=config.workers, thread_name_prefix="skryper-scan"
+        )
+        executors.append(executor)
+    if config.summarize_ignored:
+        summary_executor = ThreadPoolExecutor(
+            max_workers=config.workers, thread_name_prefix="skryper-summary"
+        )
+        executors.append(summary_executor)
     try:
-        entries = sorted(
-            directory.iterdir(), key=lambda e: (e.is_file(), e.name.lower())
+        nodes = iter_listing_nodes(listing, config, logger, executor, summary_executor)
+        if summary_executor is not None:
+            nodes = resolve_summaries(nodes)
+        yield from nodes
+    finally:
+        for pool in executors:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def read_directory(
+    directory,
+    relative_dir: str,
+    matcher_stack: MatcherStack,
+    config,
+    logger: logging.Logger,
+) -> Optional[DirectoryListing]:
+    """
+    Lists a directory, loads its .gitignore and classifies its entries.
+
+    This function does not touch the scan result and may run on worker threads.
+
+    Args:
+        directory: The directory to read.
+        relative_dir (str): Path of the directory relative to the scan root.
+        matcher_stack (MatcherStack): The matchers of the enclosing directories.
+        config: The configuration object that holds the inclusion rules.
+        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        Optional[DirectoryListing]: The listing, or None if the directory
+        could not be read.
+    """
+    logger.debug("Scanning directory: %s", directory)
+    profiler = config.profiler
+    if profiler is not None:
+        started = time.perf_counter_ns()
+
+    try:
+        entries = list_directory(directory, config.scan_cache)
+    except OSError as error:
+        logger.warning("Skipping unreadable directory %s: %s", directory, error)
+        return None
+
+    if profiler is not None:
+        listed = time.perf_counter_ns()
+    current_stack = update_ignore_patterns(
+        directory, config, logger, entries, matcher_stack, relative_dir
+    )
+    if profiler is not None:
+        loaded = time.perf_counter_ns()
+
+    entry_logger = get_entry_logger(config, logger)
+    include_paths = config.include_paths
+    scan_entries = []
+    for entry in entries:
+        relative_path = relative_dir + entry.name
+        if include_paths and not is_on_include_path(relative_path, include_paths):
+            continue
+        is_dir = entry_is_dir(entry)
+        ignored = is_ignored(
+            relative_path, current_stack, config.inclusion_rules, entry_logger, is_dir
+        )
+        if ignored and config.prune_ignored:
+            continue
+        scan_entries.append(ScanEntry(entry, relative_path, is_dir, ignored))
+    if profiler is not None:
+        profiler.add_directory_read(
+            str(directory),
+            (started, listed, loaded, time.perf_counter_ns()),
+            len(entries),
+            current_stack is not matcher_stack,
         )
-    except PermissionError:
-        logger.warning(f"Skipping directory due to permission error: {directory}")
-        return
 
-    entries = sorted(directory.iterdir(), key=lambda e: (e.is_file(), e.name.lower()))
-    total_entries = len(entries)
+    omitted = 0
+    if config.max_entries_per_dir is not None:
+        scan_entries, omitted = truncate_entries(
+            scan_entries, config.max_entries_per_dir
+        )
+
+    return DirectoryListing(
+        str(directory),
+        relative_dir,
+        current_stack,
+        scan_entries,
+        current_stack is not matcher_stack,
+        omitted,
+    )
+
+
+def is_on_include_path(relative_path: str, include_paths) -> bool:
+    """
+    Checks whether a path lies inside or on the way to one of the include paths.
 
-    for index, path in enumerate(entries):
-        connector = "└── " if index == total_entries - 1 else "├── "
-        relative_path = path.relative_to(directory)
+    Args:
+        relative_path (str): The path relative to the scan root.
+        include_paths: Normalized include paths relative to the scan root.
 
-        if is_ignored(
-            relative_path, current_ignore_patterns, config.inclusion_rules, logger
+    Returns:
+        bool: True if the entry has to be scanned.
+    """
+    for include_path in include_paths:
+        if (
+            relative_path == include_path
+            or relative_path.startswith(include_path + "/")
+            or include_path.startswith(relative_path + "/")
         ):
-            handle_ignored_path(path, relative_path, config, logger, prefix, connector)
+            return True
+    return False
+
+
+def truncate_entries(scan_entries: List[ScanEntry], limit: int):
+    """
+    Keeps the first entries of a listing that are shown in the output.
+
+    Ignored files are not shown and therefore do not count towards the limit.
+
+    Args:
+        scan_entries (List[ScanEntry]): The classified entries.
+        limit (int): The number of shown entries to keep.
+
+    Returns:
+        Tuple[List[ScanEntry], int]: The kept entries and the number of shown
+        entries left out.
+    """
+    shown = 0
+    for index, item in enumerate(scan_entries):
+        if item.ignored and not item.is_dir:
+            continue
+        if shown == limit:
+            omitted = sum(
+                1 for rest in scan_entries[index:] if rest.is_dir or not rest.ignored
+            )
+            return scan_entries[:index], omitted
+        shown += 1
+    return scan_entries, 0
+
+
+def iter_listing_nodes(
+    listing: DirectoryListing,
+    config,
+    logger: logging.Logger,
+    executor: Optional[Executor] = None,
+    summary_executor: Optional[Executor] = None,
+) -> Iterator[TreeNode]:
+    """
+    Walks a directory listing and everything below it in rendering order.
+
+    The traversal keeps an explicit stack of open listings instead of
+    recursing, so the depth of the tree is not limited by Python's recursion
+    limit. Only the listings along the current path are kept.
+
+    With an executor, all subdirectories of a listing are submitted for
+    reading before the first of them is walked, so the pool lists them while
+    the walk works through the tree in order.
+
+    Args:
+        listing (DirectoryListing): The listing to walk.
+        config: The configuration object that holds ignore rules.
+        logger (logging.Logger): Logger instance for logging.
+        executor (Optional[Executor]): Pool used to read subdirectories ahead.
+        summary_executor (Optional[Executor]): Pool used to summarize ignored
+            directories.
+
+    Yields:
+        TreeNode: The nodes below the listing. A directory is yielded after
+        its own listing has been read and before its entries. The summary of
+        an ignored directory is still the pending Future; resolve_summaries
+        waits for it.
+    """
+    stack = [
+        ListingFrame(
+            listing,
+            prefetch_subdirectories(listing, config, logger, executor, 1),
+            submit_summaries(listing, summary_executor),
+        )
+    ]
+
+    while stack:
+        step = next_frame_step(stack, config)
+        if step is None:
+            continue
+        node, descend = step
+        child = None
+        if descend:
+            child = process_directory(node.item, stack[-1], config, logger)
+        if child is None:
+            yield node
             continue
 
-        if path.is_dir():
-            process_directory(
-                path, config, logger, prefix, connector, index == total_entries - 1
+        yield node._replace(has_gitignore=child.has_gitignore)
+        stack.append(
+            ListingFrame(
+                child,
+                prefetch_subdirectories(
+                    child, config, logger, executor, node.depth + 1
+                ),
+                submit_summaries(child, summary_executor),
             )
-        else:
-            process_file(path, config, logger, prefix, connector)
+        )
+
+
+def next_frame_step(
+    stack: List[ListingFrame], config
+) -> Optional[Tuple[TreeNode, bool]]:
+    """
+    Advances a walk by one entry of its innermost listing.
+
+    A listing with omitted entries ends with the node standing for them, and
+    an exhausted listing is popped. The synchronous walk and scan_tree both
+    step with this function and only differ in how they wait for listings.
+
+    Args:
+        stack (List[ListingFrame]): The open listings, innermost last.
+        config: The configuration object that holds the limits.
+
+    Returns:
+        Optional[Tuple[TreeNode, bool]]: The next node and whether the walk
+        descends into it, or None if a listing was closed. The summary of an
+        ignored directory is still the submitted Future, and has_gitignore is
+        left for the walk to set once the listing has been read.
+    """
+    frame = stack[-1]
+    entries = frame.listing.entries
+    depth = len(stack)
+    if frame.index >= len(entries):
+        if frame.index == len(entries) and frame.listing.omitted:
+            frame.index += 1
+            return omitted_node(frame.listing, depth), False
+        stack.pop()
+        return None
+
+    item = entries[frame.index]
+    frame.index += 1
+    is_last_entry = frame.index == len(entries) and not frame.listing.omitted
+    if item.ignored:
+        summary = frame.summaries.pop(item.relative_path, None)
+        return TreeNode(item, depth, is_last_entry, False, summary), False
+    descend = item.is_dir and can_descend(depth, config)
+    return TreeNode(item, depth, is_last_entry, False), descend
 
 
-def update_ignore_patterns(directory: Path, config, logger: logging.Logger, prefix=""):
+def resolve_summaries(
+    nodes: Iterator[TreeNode], lookahead: int = SUMMARY_LOOKAHEAD
+) -> Iterator[TreeNode]:
     """
-    Updates the ignore patterns by loading .gitignore files from the directory.
+    Replaces pending summaries with their results, keeping the walk going.
+
+    The summary of an ignored directory is rendered on its own line, so that
+    node and everything after it wait until the size walk finishes. Until
+    then, the walk reads ahead and buffers up to lookahead nodes, so a large
+    ignored directory delays the output that follows it but not the scan.
+
+    Args:
+        nodes (Iterator[TreeNode]): Nodes whose summaries may be Futures.
+        lookahead (int): Number of nodes buffered behind a pending summary.
+
+    Yields:
+        TreeNode: The nodes in the same order, with resolved summaries.
+    """
+    pending = deque()
+    for node in nodes:
+        pending.append(node)
+        while pending and (
+            len(pending) > lookahead or not is_summary_pending(pending[0])
+        ):
+            yield resolve_summary(pending.popleft())
+    while pending:
+        yield resolve_summary(pending.popleft())
+
+
+def is_summary_pending(node: TreeNode) -> bool:
+    """
+    Returns:
+        bool: Whether the node's summary is a Future that is not done yet.
+    """
+    return isinstance(node.summary, Future) and not node.summary.done()
+
+
+def resolve_summary(node: TreeNode) -> TreeNode:
+    """
+    Returns:
+        TreeNode: The node, with its summary waited for if it is a Future.
+    """
+    if isinstance(node.summary, Future):
+        return node._replace(summary=node.summary.result())
+    return node
+
+
+def render_lines(
+    nodes: Iterator[TreeNode],
+    config,
+    logger: logging.Logger,
+    prefix="",
+    has_gitignore: bool = False,
+) -> Iterator[str]:
+    """
+    Renders nodes as the box-drawing text tree.
+
+    Ignored directories are shown without their content and ignored files
+    are left out. A directory holding a .gitignore starts with an extra line
+    for it.
+
+    Args:
+        nodes (Iterator[TreeNode]): The nodes to render, in walking order.
+        config: The configuration object that holds the logging switches.
+        logger (logging.Logger): Logger instance for logging.
+        prefix (str, optional): A prefix used for formatting the output.
+        has_gitignore (bool): Whether the directory the nodes belong to holds
+            a .gitignore.
+
+    Yields:
+        str: The rendered lines.
+    """
+    if has_gitignore:
+        yield prefix + GITIGNORE_LINE
+
+    entry_logger = get_entry_logger(config, logger)
+    base_length = len(prefix) - len(PREFIX_LAST)
+    for node in nodes:
+        prefix_length = base_length + len(PREFIX_LAST) * node.depth
+        if len(prefix) != prefix_length:
+            prefix = prefix[:prefix_length]
+        line = render_node(node, prefix, entry_logger)
+        if line is None:
+            continue
+        yield line
+        if node.is_dir and not node.ignored:
+            prefix += PREFIX_LAST if node.is_last else PREFIX_CONTINUED
+            if node.has_gitignore:
+                yield prefix + GITIGNORE_LINE
+
+
+def render_node(
+    node: TreeNode, prefix: str, entry_logger: Optional[logging.Logger]
+) -> Optional[str]:
+    """
+    Renders the line of one node, without the content of a directory.
+
+    The content of a directory that is not ignored follows with the prefix
+    extended by PREFIX_LAST or PREFIX_CONTINUED, starting with GITIGNORE_LINE
+    if the directory holds a .gitignore.
+
+    Args:
+        node (TreeNode): The node to render.
+        prefix (str): The prefix of the node's line.
+        entry_logger (Optional[logging.Logger]): Logger for per-entry
+            messages, or None if they are disabled.
+
+    Returns:
+        Optional[str]: The line, or None for an ignored file.
+    """
+    connector = "└── " if node.is_last else "├── "
+    item = node.item
+    if node.omitted:
+        return f"{prefix}{connector}… ({node.omitted} more)"
+    if item.ignored:
+        return handle_ignored_path(
+            item.entry,
+            item.relative_path,
+            entry_logger,
+            prefix,
+            connector,
+            node.summary,
+        )
+    if item.is_dir:
+        line = f"{prefix}{connector}{item.entry.name}/"
+    else:
+        line = process_file(item.entry, entry_logger, prefix, connector)
+    if node.metadata is not None:
+        line = f"{line} {format_metadata(node.metadata)}"
+    return line
+
+
+def prefetch_subdirectories(
+    listing: DirectoryListing,
+    config,
+    logger: logging.Logger,
+    executor: Optional[Executor],
+    depth: int,
+) -> Dict[str, Future]:
+    """
+    Submits the reading of all non-ignored subdirectories to the executor.
+
+    Args:
+        listing (DirectoryListing): The listing whose subdirectories are read.
+        config: The configuration object that holds the inclusion rules.
+        logger (logging.Logger): Logger instance for logging.
+        executor (Optional[Executor]): The pool to submit to.
+        depth (int): The depth of the entries of the listing.
+
+    Returns:
+        Dict[str, Future]: Pending listings keyed by relative path.
+    """
+    if executor is None or not can_descend(depth, config):
+        return {}
+    return {
+        item.relative_path: executor.submit(
+            read_directory,
+            item.entry.path,
+            item.relative_path + "/",
+            listing.matcher_stack,
+            config,
+            logger,
+        )
+        for item in listing.entries
+        if item.is_dir and not item.ignored
+    }
+
+
+def can_descend(depth: int, config) -> bool:
+    """
+    Checks whether directories at a depth may be listed.
+
+    Args:
+        depth (int): The depth of the directories.
+        config: The configuration object that holds the depth limit.
+
+    Returns:
+        bool: False if listing them would exceed config.max_depth.
+    """
+    return config.max_depth is None or depth < config.max_depth
+
+
+def omitted_node(listing: DirectoryListing, depth: int) -> TreeNode:
+    """
+    Creates the node standing for the entries left out of a truncated listing.
+
+    Args:
+        listing (DirectoryListing): The truncated listing.
+        depth (int): The depth of the entries of the listing.
+
+    Returns:
+        TreeNode: The marker node, placed after the kept entries.
+    """
+    item = ScanEntry(None, listing.relative_dir[:-1], False, False)
+    return TreeNode(item, depth, True, False, omitted=listing.omitted)
+
+
+def submit_summaries(
+    listing: DirectoryListing, summary_executor: Optional[Executor]
+) -> Dict[str, Future]:
+    """
+    Submits the size walks of all ignored subdirectories to the executor.
+
+    Args:
+        listing (DirectoryListing): The listing whose ignored subdirectories
+            are summarized.
+        summary_executor (Optional[Executor]): The pool to submit to.
+
+    Returns:
+        Dict[str, Future]: Pending summaries keyed by relative path.
+    """
+    if summary_executor is None:
+        return {}
+    return {
+        item.relative_path: summary_executor.submit(
+            summarize_directory, item.entry.path
+        )
+        for item in listing.entries
+        if item.is_dir and item.ignored
+    }
+
+
+def resolve_listing(
+    future: Future,
+    directory,
+    relative_dir: str,
+    matcher_stack: MatcherStack,
+    config,
+    logger: logging.Logger,
+) -> Optional[DirectoryListing]:
+    """
+    Returns the result of a prefetched listing.
+
+    If no worker has picked the listing up yet, it is taken back from the
+    queue and read on the calling thread instead of waiting behind other work.
+
+    Args:
+        future (Future): The pending listing.
+        directory: The directory being read.
+        relative_dir (str): Path of the directory relative to the scan root.
+        matcher_stack (MatcherStack): The matchers of the enclosing directories.
+        config: The configuration object that holds the inclusion rules.
+        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        Optional[DirectoryListing]: The listing, or None if it could not be read.
+    """
+    if future.cancel():
+        return read_directory(directory, relative_dir, matcher_stack, config, logger)
+    return future.result()
+
+
+def list_directory(directory, scan_cache=None) -> List[os.DirEntry]:
+    """
+    Lists a directory once and sorts its entries with directories first.
+
+    Args:
+        directory: The directory to list.
+        scan_cache (Optional[ScanCache]): Cache of listings from earlier runs.
+
+    Returns:
+        List[os.DirEntry]: The sorted directory entries.
+    """
+    if scan_cache is not None:
+        entries, status = scan_cache.lookup(directory)
+        if entries is not None:
+            return entries
+
+    entries = scandir_path(directory)
+    entries.sort(key=entry_sort_key)
+
+    if scan_cache is not None:
+        scan_cache.store(directory, status, entries)
+    return entries
+
+
+def entry_sort_key(entry: os.DirEntry):
+    """
+    Sort key placing directories before files, ordered case-insensitively.
+
+    Args:
+        entry (os.DirEntry): The entry to sort.
+
+    Returns:
+        tuple: The sort key.
+    """
+    return (entry_is_file(entry), entry.name.lower())
+
+
+def entry_is_file(entry: os.DirEntry) -> bool:
+    """
+    Checks whether an entry is a file, treating unresolvable links as non-files.
+
+    Args:
+        entry (os.DirEntry): The entry to check.
+
+    Returns:
+        bool: True if the entry is a file.
+    """
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
+def entry_is_dir(entry: os.DirEntry) -> bool:
+    """
+    Checks whether an entry is a directory, treating unresolvable links as files.
+
+    Args:
+        entry (os.DirEntry): The entry to check.
+
+    Returns:
+        bool: True if the entry is a directory.
+    """
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def update_ignore_patterns(
+    directory: Path,
+    config,
+    logger: logging.Logger,
+    entries=None,
+    matcher_stack: Optional[MatcherStack] = None,
+    relative_dir: str = "",
+) -> MatcherStack:
+    """
+    Pushes the directory's .gitignore, if any, onto the matcher stack.
+
+    The matcher is compiled once here and shared by all subdirectories; patterns
+    of the enclosing directories stay in effect through the stack.
 
     Args:
         directory (Path): The directory where the .gitignore might be located.
         config: The configuration object that holds the base ignore patterns.
         logger (logging.Logger): Logger instance for logging.
-        prefix (str, optional): A prefix used for formatting the output.
+        entries (list, optional): Already listed entries of the directory, used
+            to detect the .gitignore without an extra stat call.
+        matcher_stack (Optional[MatcherStack]): The matchers of the enclosing
+            directories. Defaults to the base patterns of the config.
+        relative_dir (str, optional): Path of the directory relative to the scan root.
 
     Returns:
-        list: Updated list of ignore patterns.
+        MatcherStack: The matcher stack in effect inside the directory.
     """
-    gitignore_path = directory / ".gitignore"
-    current_ignore_patterns = list(config.base_gitignore_paths)
+    gitignore_path = os.path.join(directory, GITIGNORE_FILENAME)
+    if matcher_stack is None:
+        matcher_stack = get_base_stack(config)
 
-    if gitignore_path.is_file():
-        logger.debug(f"Found .gitignore at: {gitignore_path}")
-        current_ignore_patterns.extend(load_gitignore(gitignore_path, logger))
-        config.result.append(f"{prefix}├── .gitignore")
+    if entries is None:
+        has_gitignore = os.path.isfile(gitignore_path)
+    else:
+        has_gitignore = any(
+            entry.name == GITIGNORE_FILENAME and entry_is_file(entry)
+            for entry in entries
+        )
 
-    return current_ignore_patterns
+    if has_gitignore:
+        logger.debug("Found .gitignore at: %s", gitignore_path)
+        log_info(logger, "Loading .gitignore from: %s", gitignore_path)
+        matcher = load_gitignore_matcher(gitignore_path, logger)
+        return matcher_stack.push(matcher, relative_dir)
 
+    return matcher_stack
 
-def process_directory(
-    path: Path, config, logger: logging.Logger, prefix, connector, is_last_entry
-):
+
+def get_base_stack(config) -> MatcherStack:
+    """
+    Returns the bottom of the matcher stack, compiling it on first use.
+
+    The base patterns apply relative to the scan root and have the lowest
+    precedence.
+
+    Args:
+        config: The configuration object that holds the base ignore patterns.
+
+    Returns:
+        MatcherStack: Stack holding the matcher for config.base_gitignore_paths.
     """
-    Processes a directory, appends it to the result, and recursively scans its content.
+    if config.base_stack is None:
+        config.base_stack = MatcherStack(
+            GitignoreMatcher(order_base_patterns(config.base_gitignore_paths))
+        )
+    return config.base_stack
+
+
+def get_entry_logger(config, logger: logging.Logger) -> Optional[logging.Logger]:
+    """
+    Returns the logger for messages emitted once per file or directory.
 
     Args:
-        path (Path): The directory path.
-        config: The configuration object that holds the scan result.
+        config: The configuration object that holds the logging switches.
         logger (logging.Logger): Logger instance for logging.
-        prefix (str): The current prefix used for formatting the output.
-        connector (str): The string used to indicate the hierarchy.
-        is_last_entry (bool): Indicates whether this is the last entry in the directory.
+
+    Returns:
+        Optional[logging.Logger]: The logger, or None if per-entry messages
+        are disabled or would be filtered out anyway.
     """
-    config.result.append(f"{prefix}{connector}{path.name}/")
-    logger.debug(f"Entering directory: {path}")
-    scan_directory(path, config, logger, prefix + ("    " if is_last_entry else "│   "))
+    if config.log_entries and logger.isEnabledFor(logging.INFO):
+        return logger
+    return None
 
 
-def process_file(path: Path, config, logger: logging.Logger, prefix, connector):
+def process_directory(
+    item: ScanEntry, parent: "ListingFrame", config, logger: logging.Logger
+) -> Optional[DirectoryListing]:
     """
-    Processes a file, appends it to the result, and handles encoding issues.
+    Obtains the listing of a subdirectory that is about to be rendered.
 
     Args:
-        path (Path): The file path.
-        config: The configuration object that holds the scan result.
+        item (ScanEntry): The subdirectory.
+        parent (ListingFrame): The frame of the directory containing it.
+        config: The configuration object that holds ignore rules.
         logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        Optional[DirectoryListing]: The listing, or None if it could not be read.
+    """
+    path = item.entry.path
+    relative_dir = item.relative_path + "/"
+    matcher_stack = parent.listing.matcher_stack
+    logger.debug("Entering directory: %s", path)
+
+    pending = parent.pending.get(item.relative_path)
+    if pending is not None:
+        return resolve_listing(
+            pending, path, relative_dir, matcher_stack, config, logger
+        )
+    return read_directory(path, relative_dir, matcher_stack, config, logger)
+
+
+def process_file(
+    path: os.DirEntry, logger: Optional[logging.Logger], prefix, connector
+) -> str:
+    """
+    Renders a file line and handles encoding issues.
+
+    Args:
+        path (os.DirEntry): The file entry.
+        logger (Optional[logging.Logger]): Logger for per-entry messages, or
+            None if they are disabled.
         prefix (str): The current prefix used for formatting the output.
         connector (str): The string used to indicate the hierarchy.
+
+    Returns:
+        str: The rendered line.
     """
     try:
-        config.result.append(f"{prefix}{connector}{path.name}")
-        logger.info(f"Added file: {path.name}")
+        line = f"{prefix}{connector}{path.name}"
+        log_info(logger, "Added file: %s", path.name)
     except UnicodeEncodeError:
         safe_name = path.name.encode("utf-8", "replace").decode("utf-8")
-        config.result.append(f"{prefix}{connector}{safe_name}")
-        logger.warning(f"Unicode issue with file: {path.name}")
+        line = f"{prefix}{connector}{safe_name}"
+        if logger is not None:
+            logger.warning("Unicode issue with file: %s", safe_name)
+    return line
 
 
 def handle_ignored_path(
-    path: Path, relative_path, config, logger: logging.Logger, prefix, connector
-):
+    path: os.DirEntry,
+    relative_path,
+    logger: Optional[logging.Logger],
+    prefix,
+    connector,
+    summary: Optional[IgnoredSummary] = None,
+) -> Optional[str]:
     """
     Handles paths that are ignored based on .gitignore or other rules.
 
+    Ignored directories are indicated without their content; ignored files
+    are left out.
+
     Args:
-        path (Path): The path being ignored.
-        relative_path (Path): The relative path of the ignored file or directory.
-        config: The configuration object that holds the scan result.
-        logger (logging.Logger): Logger instance for logging.
+        path (os.DirEntry): The entry being ignored.
+        relative_path (str): The relative path of the ignored file or directory.
+        logger (Optional[logging.Logger]): Logger for per-entry messages, or
+            None if they are disabled.
         prefix (str): The current prefix used for formatting the output.
         connector (str): The string used to indicate the hierarchy.
+        summary (Optional[IgnoredSummary]): Totals shown after an ignored
+            directory, if they were computed.
+
+    Returns:
+        Optional[str]: The rendered line, or None if nothing is shown.
     """
-    if path.is_dir():
-        config.result.append(f"{prefix}{connector}{path.name}/")
-        logger.info(f"Ignored directory indicated: {relative_path}")
+    if entry_is_dir(path):
+        log_info(logger, "Ignored directory indicated: %s", relative_path)
+        if summary is not None:
+            return f"{prefix}{connector}{path.name}/ {format_summary(summary)}"
+        return f"{prefix}{connector}{path.name}/"
+    return None
@@ -0,0 +1,340 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Size, modification time and line count of the files in a scanned tree.
+
+Sizes and modification times come from the stat result the scanner's
+directory entries already cache. Line counts are read on a bounded thread
+pool; each file is opened once and its size and modification time are taken
+from the open file, so counting lines needs no separate stat call. The
+values are kept in arrays aligned with the compact tree model and rolled up
+into the directories in one pass from the last node to the first.
+"""
+
+# file_metadata.py
+
+import logging
+import os
+import time
+from array import array
+from collections import deque
+from concurrent.futures import Executor
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .ignored_summary import format_size
+from .long_paths import open_path
+
+DEFAULT_LINE_WORKERS = 4
+PENDING_PER_WORKER = 4
+READ_CHUNK_SIZE = 1 << 20
+UNKNOWN = -1
+PARTIAL = -2
+
+
+class EntryMetadata(NamedTuple):
+    """
+    The requested metadata of a file, or the totals of a directory.
+
+    Fields that were not requested are None. For a directory, size and lines
+    are the sums over all shown files below it and mtime_ns is the latest
+    modification of the directory itself or anything shown below it. Size
+    and lines are also None for a directory whose totals are incomplete,
+    because a directory below it was cut off by the depth or entry limit.
+    """
+
+    size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+    lines: Optional[int] = None
+
+
+def wants_metadata(config) -> bool:
+    """
+    Args:
+        config: The configuration object that holds the metadata switches.
+
+    Returns:
+        bool: Whether any metadata column was requested.
+    """
+    return config.with_size or config.with_mtime or config.with_lines
+
+
+def read_file_metadata(path) -> EntryMetadata:
+    """
+    Reads a file once to count its lines.
+
+    The last line counts even if it does not end with a newline.
+
+    Args:
+        path: The file to read.
+
+    Returns:
+        EntryMetadata: The size and modification time of the open file and
+        its number of lines.
+
+    Raises:
+        OSError: If the file cannot be opened or read.
+    """
+    with open(path, "rb", buffering=0, opener=open_path) as file:
+        status = os.fstat(file.fileno())
+        buffer = bytearray(max(1, min(READ_CHUNK_SIZE, status.st_size + 1)))
+        lines = 0
+        last_byte = ord("\n")
+        while True:
+            length = file.readinto(buffer)
+            if not length:
+                break
+            lines += buffer.count(b"\n", 0, length)
+            last_byte = buffer[length - 1]
+    if last_byte != ord("\n"):
+        lines += 1
+    return EntryMetadata(status.st_size, status.st_mtime_ns, lines)
+
+
+def format_mtime(mtime_ns: int) -> str:
+    """
+    Returns:
+        str: The modification time in local time, e.g. "2024-05-01 12:30".
+    """
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime_ns // 1_000_000_000))
+
+
+def format_mtime_utc(mtime_ns: int) -> str:
+    """
+    Returns:
+        str: The modification time as ISO 8601 in UTC, e.g. "2024-05-01T10:30:00Z".
+    """
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(mtime_ns // 1_000_000_000))
+
+
+def format_metadata(metadata: EntryMetadata) -> str:
+    """
+    Formats metadata as the annotation shown after a file or directory.
+
+    Args:
+        metadata (EntryMetadata): The metadata to format.
+
+    Returns:
+        str: The annotation, e.g. "[1.2 KB, 2024-05-01 12:30, 42 lines]".
+    """
+    parts = []
+    if metadata.size is not None:
+        parts.append(format_size(metadata.size))
+    if metadata.mtime_ns is not None:
+        parts.append(format_mtime(metadata.mtime_ns))
+    if metadata.lines is not None:
+        noun = "line" if metadata.lines == 1 else "lines"
+        parts.append(f"{metadata.lines} {noun}")
+    return f"[{', '.join(parts)}]"
+
+
+class MetadataColumns:
+    """
+    Metadata of every node of a compact tree, stored as parallel arrays.
+
+    A node whose metadata is unknown, such as an ignored entry or a file that
+    could not be read, holds UNKNOWN in every column. A directory whose
+    content was not visited, the marker of a truncated directory and every
+    directory containing one of them hold PARTIAL as size and line count.
+    """
+
+    __slots__ = (
+        "with_size",
+        "with_mtime",
+        "with_lines",
+        "max_depth",
+        "sizes",
+        "mtimes",
+        "lines",
+    )
+
+    def __init__(
+        self,
+        with_size: bool,
+        with_mtime: bool,
+        with_lines: bool,
+        root_mtime_ns=0,
+        max_depth: Optional[int] = None,
+    ):
+        """
+        Creates the columns with the entry of the tree's root.
+
+        Args:
+            with_size (bool): Whether sizes are shown.
+            with_mtime (bool): Whether modification times are shown.
+            with_lines (bool): Whether line counts are shown.
+            root_mtime_ns (int): Modification time of the scanned directory.
+            max_depth (Optional[int]): The depth limit of the scan; shown
+                directories at that depth are not visited.
+        """
+        self.with_size = with_size
+        self.with_mtime = with_mtime
+        self.with_lines = with_lines
+        self.max_depth = max_depth
+        self.sizes = array("q", [0])
+        self.mtimes = array("q", [root_mtime_ns])
+        self.lines = array("q", [0])
+
+    def append(self) -> int:
+        """
+        Adds an unknown entry for the next node.
+
+        Returns:
+            int: The index of the entry.
+        """
+        self.sizes.append(UNKNOWN)
+        self.mtimes.append(UNKNOWN)
+        self.lines.append(UNKNOWN)
+        return len(self.sizes) - 1
+
+    def set(self, index: int, metadata: EntryMetadata) -> None:
+        """
+        Stores the metadata of a node.
+
+        Args:
+            index (int): The index of the node.
+            metadata (EntryMetadata): Its metadata; missing fields count as 0.
+        """
+        self.sizes[index] = metadata.size or 0
+        self.mtimes[index] = metadata.mtime_ns or 0
+        self.lines[index] = metadata.lines or 0
+
+    def record(
+        self,
+        nodes: Iterable,
+        logger: logging.Logger,
+        executor: Optional[Executor] = None,
+        max_pending: int = DEFAULT_LINE_WORKERS * PENDING_PER_WORKER,
+    ) -> Iterator:
+        """
+        Passes nodes through while gathering the metadata of the shown files.
+
+        The nodes must be consumed in the same order as they are added to the
+        tree. Shown directories start from their own modification time.
+        Without line counts, the stat result of each file's directory entry
+        is used. With line counts, files are read on the executor, at most
+        max_pending at a time, and the generator waits for all of them
+        before it finishes.
+
+        Args:
+            nodes (Iterable[TreeNode]): The nodes of a scan in walking order.
+            logger (logging.Logger): Logger instance for logging.
+            executor (Optional[Executor]): Pool that counts lines; required if
+                line counts are requested.
+            max_pending (int): Maximum number of files queued for counting.
+
+        Yields:
+            TreeNode: The nodes, unchanged.
+        """
+        pending = deque()
+        try:
+            for node in nodes:
+                index = self.append()
+                if node.omitted:
+                    self.sizes[index] = self.lines[index] = PARTIAL
+                if node.omitted or node.ignored:
+                    yield node
+                    continue
+
+                entry = node.item.entry
+                if self.with_lines and not node.is_dir:
+                    if len(pending) >= max_pending:
+                        self.resolve(pending.popleft(), logger)
+                    future = executor.submit(read_file_metadata, entry.path)
+                    pending.append((index, entry.path, future))
+                else:
+                    try:
+                        status = entry.stat()
+                    except OSError as error:
+                        logger.warning("Could not stat '%s': %s", entry.path, error)
+                    else:
+                        size = 0 if node.is_dir else status.st_size
+                        self.set(index, EntryMetadata(size, status.st_mtime_ns))
+                        if node.is_dir and self.is_cut_off(node.depth):
+                            self.sizes[index] = self.lines[index] = PARTIAL
+                yield node
+
+            while pending:
+                self.resolve(pending.popleft(), logger)
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+    def is_cut_off(self, depth: int) -> bool:
+        """
+        Returns:
+            bool: Whether directories at a depth are shown but not visited.
+        """
+        return self.max_depth is not None and depth >= self.max_depth
+
+    def resolve(self, pending, logger: logging.Logger) -> None:
+        """
+        Waits for a line count and stores its result.
+
+        Args:
+            pending: The index, path and future of the counted file.
+            logger (logging.Logger): Logger instance for logging.
+        """
+        index, path, future = pending
+        try:
+            self.set(index, future.result())
+        except OSError as error:
+            logger.warning("Could not count lines of '%s': %s", path, error)
+
+    def roll_up(self, parents) -> None:
+        """
+        Adds the metadata of every node to its parent directory.
+
+        Pre-order puts every node after its parent, so walking the nodes from
+        last to first completes each directory before it is added to its own
+        parent. Partial totals make the totals of the parent partial.
+
+        Args:
+            parents: The parent index of every node, as in the compact tree.
+        """
+        sizes = self.sizes
+        mtimes = self.mtimes
+        lines = self.lines
+        for index in range(len(sizes) - 1, 0, -1):
+            parent = parents[index]
+            if sizes[index] == UNKNOWN or sizes[parent] == UNKNOWN:
+                continue
+            if sizes[index] == PARTIAL:
+                sizes[parent] = lines[parent] = PARTIAL
+            elif sizes[parent] != PARTIAL:
+                sizes[parent] += sizes[index]
+                lines[parent] += lines[index]
+            if mtimes[index] > mtimes[parent]:
+                mtimes[parent] = mtimes[index]
+
+    def get(self, index: int) -> Optional[EntryMetadata]:
+        """
+        Returns the requested metadata of a node.
+
+        Args:
+            index (int): The index of the node.
+
+        Returns:
+            Optional[EntryMetadata]: The metadata, or None if none of the
+            requested fields is known.
+        """
+        size = self.sizes[index]
+        if size == UNKNOWN:
+            return None
+        mtime_ns = self.mtimes[index]
+        partial = size == PARTIAL
+        metadata = EntryMetadata(
+            size if self.with_size and not partial else None,
+            mtime_ns if self.with_mtime and mtime_ns != UNKNOWN else None,
+            self.lines[index] if self.with_lines and not partial else None,
+        )
+        if metadata == EntryMetadata():
+            return None
+        return metadata
@@ -0,0 +1,404 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Builds the tree of a git checkout from its index instead of the filesystem.
+
+The index (.git/index) already lists every tracked file, so reading it
+replaces walking the checkout and matching every entry against .gitignore
+patterns. The binary format (versions 2, 3 and 4) is parsed directly from a
+memory map; git itself is not needed. Untracked files that are not ignored
+can be merged in with a walk that does not descend into ignored
+directories.
+
+The resulting nodes are ordered, limited and marked like those of a
+filesystem scan, so every renderer accepts them.
+"""
+
+# git_index.py
+
+import logging
+import mmap
+import os
+import struct
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from .directory_scanner import (
+    GITIGNORE_FILENAME,
+    ScanEntry,
+    TreeNode,
+    can_descend,
+    is_on_include_path,
+    iter_nodes,
+    truncate_entries,
+)
+from .gitignore_handler import log_info
+from .scan_cache import CachedEntry
+
+INDEX_SIGNATURE = b"DIRC"
+SUPPORTED_VERSIONS = (2, 3, 4)
+HEADER = struct.Struct(">4sII")
+ENTRY_FIXED_SIZE = 62
+HASH_SIZE = 20
+MODE_OFFSET = 24
+FLAGS_OFFSET = 60
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE = 0x3000
+EXTENDED_SKIP_WORKTREE = 0x4000
+MODE_TYPE_MASK = 0o170000
+MODE_GITLINK = 0o160000
+SPLIT_INDEX_EXTENSION = b"link"
+
+IndexTree = Dict[str, Optional[dict]]
+
+
+class GitIndexError(ValueError):
+    """
+    Raised if a directory has no index that can be read.
+    """
+
+
+def find_index(directory: Path) -> Path:
+    """
+    Locates the index of the checkout rooted at a directory.
+
+    Args:
+        directory (Path): The root of the checkout.
+
+    Returns:
+        Path: The index file. A .git file pointing to the git directory, as
+        used by worktrees and submodules, is followed.
+
+    Raises:
+        GitIndexError: If the directory is not the root of a git checkout.
+    """
+    git_path = Path(directory) / ".git"
+    if git_path.is_file():
+        content = git_path.read_text(encoding="utf-8").strip()
+        if not content.startswith("gitdir:"):
+            raise GitIndexError(f"Unrecognized .git file: {git_path}")
+        git_path = Path(directory, content[len("gitdir:") :].strip())
+    index_path = git_path / "index"
+    if not index_path.is_file():
+        raise GitIndexError(f"No git index found for '{directory}'.")
+    return index_path
+
+
+def read_varint(data, position: int) -> Tuple[int, int]:
+    """
+    Decodes a variable-length integer as used by index version 4.
+
+    Args:
+        data: The index content.
+        position (int): Offset of the first byte.
+
+    Returns:
+        Tuple[int, int]: The value and the offset after it.
+    """
+    byte = data[position]
+    position += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[position]
+        position += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, position
+
+
+def find_name_end(data, position: int) -> int:
+    """
+    Finds the NUL byte ending the path of an entry.
+
+    Args:
+        data: The index content.
+        position (int): Offset of the path.
+
+    Returns:
+        int: The offset of the NUL byte.
+
+    Raises:
+        IndexError: If the path is not terminated.
+    """
+    end = data.find(b"\0", position)
+    if end < 0:
+        raise IndexError("Unterminated path in git index.")
+    return end
+
+
+def parse_index(data) -> List[Tuple[str, bool]]:
+    """
+    Parses the entries of an index.
+
+    Entries of unmerged paths appear once. Entries outside a sparse checkout
+    are skipped, because they are not in the working tree.
+
+    Args:
+        data: The content of the index file.
+
+    Returns:
+        List[Tuple[str, bool]]: The path of every entry in index order, and
+        whether it stands for a directory (a submodule or a directory of a
+        sparse index).
+
+    Raises:
+        GitIndexError: If the data is not an index in a supported version,
+            or is truncated.
+    """
+    try:
+        signature, version, count = HEADER.unpack_from(data, 0)
+        if signature != INDEX_SIGNATURE or version not in SUPPORTED_VERSIONS:
+            raise GitIndexError("Not a git index in version 2, 3 or 4.")
+
+        entries = []
+        position = HEADER.size
+        previous = b""
+        for _ in range(count):
+            start = position
+            (mode,) = struct.unpack_from(">I", data, start + MODE_OFFSET)
+            (flags,) = struct.unpack_from(">H", data, start + FLAGS_OFFSET)
+            position = start + ENTRY_FIXED_SIZE
+            extended = 0
+            if flags & FLAG_EXTENDED:
+                (extended,) = struct.unpack_from(">H", data, position)
+                position += 2
+
+            if version == 4:
+                strip, position = read_varint(data, position)
+                end = find_name_end(data, position)
+                name = previous[: len(previous) - strip] + data[position:end]
+                position = end + 1
+            else:
+                end = find_name_end(data, position)
+                name = data[position:end]
+                position = start + ((end - start + 8) & ~7)
+            previous = name
+
+            if extended & EXTENDED_SKIP_WORKTREE and not name.endswith(b"/"):
+                continue
+            if flags & FLAG_STAGE and entries and entries[-1][0] == name:
+                continue
+            is_dir = name.endswith(b"/") or mode & MODE_TYPE_MASK == MODE_GITLINK
+            entries.append((name, is_dir))
+
+        check_extensions(data, position)
+    except (struct.error, IndexError) as error:
+        raise GitIndexError("The git index is truncated.") from error
+    return [(os.fsdecode(name.rstrip(b"/")), is_dir) for name, is_dir in entries]
+
+
+def check_extensions(data, position: int) -> None:
+    """
+    Rejects indexes whose entries are incomplete without another file.
+
+    Args:
+        data: The content of the index file.
+        position (int): Offset of the first extension.
+
+    Raises:
+        GitIndexError: If the index is split.
+    """
+    end = len(data) - HASH_SIZE
+    while position + 8 <= end:
+        signature, size = struct.unpack_from(">4sI", data, position)
+        if signature == SPLIT_INDEX_EXTENSION:
+            raise GitIndexError("Split git indexes are not supported.")
+        position += 8 + size
+
+
+def read_index(index_path: Path) -> List[Tuple[str, bool]]:
+    """
+    Reads the entries of an index file through a memory map.
+
+    Args:
+        index_path (Path): The index file.
+
+    Returns:
+        List[Tuple[str, bool]]: The entries, as returned by parse_index.
+
+    Raises:
+        GitIndexError: If the index is empty or cannot be parsed.
+    """
+    with open(index_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise GitIndexError(f"The git index '{index_path}' is empty.")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_index(data)
+
+
+def add_path(tree: IndexTree, path: str, is_dir: bool) -> None:
+    """
+    Adds a path and its parent directories to a nested tree.
+
+    Args:
+        tree (IndexTree): The tree, mapping names to subtrees or None for files.
+        path (str): The slash-separated path relative to the root.
+        is_dir (bool): Whether the path is a directory.
+    """
+    *parents, name = path.split("/")
+    for parent in parents:
+        child = tree.get(parent)
+        if child is None:
+            child = tree[parent] = {}
+        tree = child
+    if is_dir:
+        tree.setdefault(name, {})
+    elif name not in tree:
+        tree[name] = None
+
+
+def build_index_tree(
+    directory: Path, config, logger: logging.Logger
+) -> Tuple[IndexTree, int]:
+    """
+    Builds the nested tree of the tracked and, if requested, untracked paths.
+
+    Args:
+        directory (Path): The root of the checkout.
+        config: The configuration object that holds ignore rules and limits.
+        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        Tuple[IndexTree, int]: The tree and the number of index entries.
+    """
+    index_path = find_index(directory)
+    entries = read_index(index_path)
+    logger.info("Read %d entries from git index '%s'.", len(entries), index_path)
+
+    tree: IndexTree = {}
+    for path, is_dir in entries:
+        add_path(tree, path, is_dir)
+
+    if config.include_untracked:
+        walk_config = replace(
+            config,
+            prune_ignored=True,
+            summarize_ignored=False,
+            max_entries_per_dir=None,
+            with_size=False,
+            with_mtime=False,
+            with_lines=False,
+        )
+        for node in iter_nodes(directory, walk_config, logger):
+            if not node.omitted:
+                add_path(tree, node.relative_path, node.is_dir)
+    return tree, len(entries)
+
+
+def list_index_directory(
+    children: IndexTree, path: str, relative_dir: str, config
+) -> Tuple[List[ScanEntry], int]:
+    """
+    Turns the children of a tree directory into sorted, limited entries.
+
+    Args:
+        children (IndexTree): The children of the directory.
+        path (str): The filesystem path of the directory.
+        relative_dir (str): Path of the directory relative to the root, with
+            a trailing slash.
+        config: The configuration object that holds the limits.
+
+    Returns:
+        Tuple[List[ScanEntry], int]: The entries in scan order and the number
+        of entries left out.
+    """
+    include_paths = config.include_paths
+    entries = []
+    for name, child in children.items():
+        relative_path = relative_dir + name
+        if include_paths and not is_on_include_path(relative_path, include_paths):
+            continue
+        is_dir = child is not None
+        entry = CachedEntry(name, os.path.join(path, name), is_dir, not is_dir)
+        entries.append(ScanEntry(entry, relative_path, is_dir, False))
+    entries.sort(key=lambda item: (not item.is_dir, item.entry.name.lower()))
+
+    if config.max_entries_per_dir is not None:
+        return truncate_entries(entries, config.max_entries_per_dir)
+    return entries, 0
+
+
+def iter_index_nodes(
+    directory: Path, config, logger: logging.Logger
+) -> Tuple[bool, Iterator[TreeNode]]:
+    """
+    Reads the index of a checkout and prepares the walk over its tree.
+
+    The index is read before this function returns.
+
+    Args:
+        directory (Path): The root of the checkout.
+        config: The configuration object that holds ignore rules and limits.
+        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        Tuple[bool, Iterator[TreeNode]]: Whether the root holds a tracked
+        .gitignore, and the nodes below the root in rendering order.
+
+    Raises:
+        GitIndexError: If the directory is not the root of a readable checkout.
+    """
+    tree, _ = build_index_tree(directory, config, logger)
+    return has_gitignore(tree), walk_index_tree(tree, str(directory), config, logger)
+
+
+def has_gitignore(children: IndexTree) -> bool:
+    """
+    Returns:
+        bool: Whether the directory holds a .gitignore file.
+    """
+    return GITIGNORE_FILENAME in children and children[GITIGNORE_FILENAME] is None
+
+
+def walk_index_tree(
+    tree: IndexTree, root_path: str, config, logger: logging.Logger
+) -> Iterator[TreeNode]:
+    """
+    Walks a nested tree in the order of a filesystem scan.
+
+    Args:
+        tree (IndexTree): The tree of the root.
+        root_path (str): The filesystem path of the root.
+        config: The configuration object that holds the limits.
+        logger (logging.Logger): Logger instance for logging.
+
+    Yields:
+        TreeNode: The nodes below the root. Nothing is ignored.
+    """
+    log_info(logger, "Walking the tree from the git index.")
+    entries, omitted = list_index_directory(tree, root_path, "", config)
+    stack = [(entries, omitted, tree, "", [0])]
+    while stack:
+        entries, omitted, children, relative_dir, position = stack[-1]
+        depth = len(stack)
+        index = position[0]
+        if index >= len(entries):
+            if index == len(entries) and omitted:
+                position[0] += 1
+                item = ScanEntry(None, relative_dir[:-1], False, False)
+                yield TreeNode(item, depth, True, False, omitted=omitted)
+                continue
+            stack.pop()
+            continue
+
+        item = entries[index]
+        position[0] += 1
+        is_last = position[0] == len(entries) and not omitted
+        if not item.is_dir or not can_descend(depth, config):
+            yield TreeNode(item, depth, is_last, False)
+            continue
+
+        child = children[item.entry.name]
+        yield TreeNode(item, depth, is_last, has_gitignore(child))
+        child_dir = item.relative_path + "/"
+        child_entries, child_omitted = list_index_directory(
+            child, item.entry.path, child_dir, config
+        )
+        stack.append((child_entries, child_omitted, child, child_dir, [0]))
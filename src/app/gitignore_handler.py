@@ -14,10 +14,400 @@ Utility functions for handling .gitignore files.
 
 # gitignore_handler.py
 
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Set, Optional
-import fnmatch
+from typing import Dict, Hashable, Iterable, List, Set, Optional, Union
+import hashlib
 import logging
+import os
+import re
+import threading
+import time
+import warnings
+from .long_paths import open_path
+
+GLOB_CHARACTERS = frozenset("*?[\\")
+CASE_INSENSITIVE = os.path.normcase("A") == "a"
+
+MATCHER_CACHE_SIZE = 1024
+FILE_CACHE_SIZE = 8192
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class IgnoreRule:
+    """
+    A single parsed .gitignore pattern.
+
+    Attributes:
+        pattern (str): The pattern as written in the .gitignore file.
+        index (int): Position of the pattern within its file; later patterns win.
+        body (str): The pattern without negation, anchor and trailing slash.
+        negated (bool): True for ``!pattern`` re-inclusion rules.
+        directory_only (bool): True if the pattern ended with a slash.
+        anchored (bool): True if the pattern is relative to its .gitignore directory.
+    """
+
+    __slots__ = ("pattern", "index", "body", "negated", "directory_only", "anchored")
+
+    def __init__(self, pattern: str, index: int = 0):
+        self.pattern = pattern
+        self.index = index
+        body = pattern
+        self.negated = body.startswith("!")
+        if self.negated:
+            body = body[1:]
+        elif body.startswith(("\\!", "\\#")):
+            body = body[1:]
+        self.directory_only = body.endswith("/")
+        body = body.rstrip("/")
+        self.anchored = "/" in body
+        self.body = normalize_case(body.lstrip("/"))
+
+    def __repr__(self) -> str:
+        return f"IgnoreRule({self.pattern!r})"
+
+    def applies_to(self, is_dir: bool) -> bool:
+        """
+        Checks whether the rule may match an entry of the given type.
+
+        Args:
+            is_dir (bool): Whether the entry is a directory.
+
+        Returns:
+            bool: False for directory-only rules checked against files.
+        """
+        return is_dir or not self.directory_only
+
+    def to_regex(self) -> str:
+        """
+        Translates the rule into a regular expression over a relative path.
+
+        Directory paths are matched with a trailing slash, which lets
+        directory-only rules require it while other rules accept it optionally.
+
+        Returns:
+            str: The regular expression source.
+        """
+        prefix = "" if self.anchored else "(?:.*/)?"
+        suffix = "/" if self.directory_only else "/?"
+        return f"{prefix}{translate_glob(self.body)}{suffix}\\Z"
+
+
+class GitignoreMatcher:
+    """
+    A precompiled set of .gitignore patterns.
+
+    Patterns are split into three groups when the matcher is built: literal
+    names and paths are stored in hash tables, simple extension patterns such
+    as ``*.log`` are stored in a suffix table, and every remaining glob is
+    translated into one combined regular expression. A check therefore costs a
+    few dictionary lookups and at most one regex match, independent of the
+    number of patterns. As in git, the last matching pattern wins, so negated
+    patterns can re-include entries ignored by earlier ones.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Compiles the given patterns.
+
+        Args:
+            patterns (Iterable[str]): Patterns in .gitignore order.
+        """
+        self.rules: List[IgnoreRule] = [
+            IgnoreRule(pattern, index) for index, pattern in enumerate(patterns)
+        ]
+        self._names: Dict[str, List[IgnoreRule]] = {}
+        self._paths: Dict[str, List[IgnoreRule]] = {}
+        self._suffixes: Dict[str, List[IgnoreRule]] = {}
+        globs: List[IgnoreRule] = []
+
+        for rule in reversed(self.rules):
+            if not GLOB_CHARACTERS.intersection(rule.body):
+                table = self._paths if rule.anchored else self._names
+                table.setdefault(rule.body, []).append(rule)
+            elif not rule.anchored and is_suffix_pattern(rule.body):
+                self._suffixes.setdefault(rule.body[1:], []).append(rule)
+            else:
+                globs.append(rule)
+
+        self._globs = globs
+        self._regex = (
+            re.compile(
+                "|".join(
+                    f"(?P<r{position}>{rule.to_regex()})"
+                    for position, rule in enumerate(globs)
+                ),
+                re.DOTALL,
+            )
+            if globs
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @property
+    def patterns(self) -> List[str]:
+        """
+        Returns the source patterns of the matcher.
+
+        Returns:
+            List[str]: Patterns in .gitignore order.
+        """
+        return [rule.pattern for rule in self.rules]
+
+    def match(self, relative_path: str, is_dir: bool = False) -> Optional[IgnoreRule]:
+        """
+        Returns the last rule matching the path, if any.
+
+        Args:
+            relative_path (str): Path relative to the .gitignore directory,
+                using "/" separators.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            Optional[IgnoreRule]: The deciding rule, or None if nothing matches.
+        """
+        relative_path = normalize_case(relative_path)
+        name = relative_path.rsplit("/", 1)[-1]
+
+        best = first_applicable(self._paths.get(relative_path), is_dir)
+        best = later_rule(best, first_applicable(self._names.get(name), is_dir))
+
+        if self._suffixes:
+            index = name.find(".")
+            while index != -1:
+                candidates = self._suffixes.get(name[index:])
+                best = later_rule(best, first_applicable(candidates, is_dir))
+                index = name.find(".", index + 1)
+
+        if self._regex is not None:
+            subject = relative_path + "/" if is_dir else relative_path
+            found = self._regex.match(subject)
+            if found:
+                best = later_rule(best, self._globs[int(found.lastgroup[1:])])
+        return best
+
+
+class MatcherStack:
+    """
+    An immutable stack of .gitignore matchers along the current scan path.
+
+    Pushing returns a new stack whose parent is the current one, so a matcher
+    is compiled once for its directory and shared by every descendant. Leaving
+    a directory simply means continuing with the parent stack again.
+    """
+
+    __slots__ = ("matcher", "base", "parent")
+
+    def __init__(
+        self,
+        matcher: Optional[GitignoreMatcher] = None,
+        base: str = "",
+        parent: Optional["MatcherStack"] = None,
+    ):
+        """
+        Creates a stack level.
+
+        Args:
+            matcher (Optional[GitignoreMatcher]): The matcher of this level.
+            base (str): Relative path of the directory owning the matcher,
+                with a trailing slash, or "" for the scan root.
+            parent (Optional[MatcherStack]): The enclosing level.
+        """
+        self.matcher = matcher
+        self.base = base
+        self.parent = parent
+
+    def push(self, matcher: GitignoreMatcher, base: str) -> "MatcherStack":
+        """
+        Returns a new stack with the matcher on top.
+
+        Args:
+            matcher (GitignoreMatcher): The matcher of the entered directory.
+            base (str): Relative path of the entered directory.
+
+        Returns:
+            MatcherStack: The extended stack.
+        """
+        if base and not base.endswith("/"):
+            base += "/"
+        return MatcherStack(matcher, base, self)
+
+    def pop(self) -> Optional["MatcherStack"]:
+        """
+        Returns the stack without its top level.
+
+        Returns:
+            Optional[MatcherStack]: The parent stack.
+        """
+        return self.parent
+
+    def match(self, relative_path: str, is_dir: bool = False) -> Optional[IgnoreRule]:
+        """
+        Returns the deciding rule for a path relative to the scan root.
+
+        Deeper .gitignore files take precedence over their parents.
+
+        Args:
+            relative_path (str): Path relative to the scan root.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            Optional[IgnoreRule]: The deciding rule, or None if nothing matches.
+        """
+        level = self
+        while level is not None:
+            if level.matcher is not None and relative_path.startswith(level.base):
+                rule = level.matcher.match(relative_path[len(level.base) :], is_dir)
+                if rule is not None:
+                    return rule
+            level = level.parent
+        return None
+
+
+def translate_glob(pattern: str) -> str:
+    """
+    Translates a .gitignore glob into a regular expression.
+
+    Unlike fnmatch, wildcards never match a slash, and ``**`` matches any
+    number of directories when it forms a whole path segment.
+
+    Args:
+        pattern (str): The glob to translate.
+
+    Returns:
+        str: The regular expression source, without anchors.
+    """
+    result = []
+    index, length = 0, len(pattern)
+    while index < length:
+        char = pattern[index]
+        index += 1
+        if char == "*":
+            if index < length and pattern[index] == "*":
+                index += 1
+                starts_segment = index == 2 or pattern[index - 3] == "/"
+                if starts_segment and index == length:
+                    result.append(".*")
+                    continue
+                if starts_segment and pattern[index] == "/":
+                    index += 1
+                    result.append("(?:.*/)?")
+                    continue
+            result.append("[^/]*")
+        elif char == "?":
+            result.append("[^/]")
+        elif char == "[":
+            end = index
+            if end < length and pattern[end] in "!^":
+                end += 1
+            if end < length and pattern[end] == "]":
+                end += 1
+            while end < length and pattern[end] != "]":
+                end += 1
+            if end >= length:
+                result.append("\\[")
+                continue
+            content = pattern[index:end].replace("\\", "\\\\")
+            index = end + 1
+            if content[0] in "!^":
+                content = "^" + content[1:]
+            result.append(f"[{content}]")
+        elif char == "\\" and index < length:
+            result.append(re.escape(pattern[index]))
+            index += 1
+        else:
+            result.append(re.escape(char))
+    return "".join(result)
+
+
+def first_applicable(
+    rules: Optional[List[IgnoreRule]], is_dir: bool
+) -> Optional[IgnoreRule]:
+    """
+    Returns the latest rule of a candidate list that applies to the entry type.
+
+    Args:
+        rules (Optional[List[IgnoreRule]]): Candidates, latest first.
+        is_dir (bool): Whether the entry is a directory.
+
+    Returns:
+        Optional[IgnoreRule]: The applicable rule, or None.
+    """
+    if rules:
+        for rule in rules:
+            if rule.applies_to(is_dir):
+                return rule
+    return None
+
+
+def later_rule(
+    current: Optional[IgnoreRule], candidate: Optional[IgnoreRule]
+) -> Optional[IgnoreRule]:
+    """
+    Returns whichever rule appears later in the .gitignore file.
+
+    Args:
+        current (Optional[IgnoreRule]): The best rule so far.
+        candidate (Optional[IgnoreRule]): Another matching rule.
+
+    Returns:
+        Optional[IgnoreRule]: The rule that takes precedence.
+    """
+    if candidate is None:
+        return current
+    if current is None or candidate.index > current.index:
+        return candidate
+    return current
+
+
+def normalize_case(value: str) -> str:
+    """
+    Applies the platform's case rules, mirroring fnmatch.fnmatch.
+
+    Args:
+        value (str): The value to normalize.
+
+    Returns:
+        str: The value, lowercased on case-insensitive platforms.
+    """
+    return value.lower() if CASE_INSENSITIVE else value
+
+
+def is_suffix_pattern(pattern: str) -> bool:
+    """
+    Checks whether a pattern has the form ``*.<literal>``.
+
+    Args:
+        pattern (str): The pattern to check.
+
+    Returns:
+        bool: True if the pattern only matches on a literal dot-suffix.
+    """
+    return (
+        len(pattern) > 2
+        and pattern[0] == "*"
+        and pattern[1] == "."
+        and "/" not in pattern
+        and not GLOB_CHARACTERS.intersection(pattern[1:])
+    )
+
+
+def order_base_patterns(patterns: Iterable[str]) -> List[str]:
+    """
+    Orders an unordered collection of patterns deterministically.
+
+    Negated patterns are placed last so that they override the others, which
+    is what a re-inclusion in a pattern set is meant to do.
+
+    Args:
+        patterns (Iterable[str]): The patterns to order.
+
+    Returns:
+        List[str]: The ordered patterns.
+    """
+    return sorted(patterns, key=lambda pattern: (pattern.startswith("!"), pattern))
 
 
 def load_gitignore(path: Path, logger: Optional[logging.Logger] = None) -> List[str]:
@@ -33,7 +423,7 @@ def load_gitignore(path: Path, logger: Optional[logging.Logger] = None) -> List[
     """
     ignore_patterns = []
     if path.is_file():
-        log_info(logger, f"Loading .gitignore from: {path}")
+        log_info(logger, "Loading .gitignore from: %s", path)
         ignore_patterns = extract_patterns_from_file(path, logger)
     return ignore_patterns
 
@@ -49,19 +439,149 @@ def extract_patterns_from_file(
         logger (Optional[logging.Logger]): Logger instance for logging.
 
     Returns:
-        List[str]: Normalized patterns from the file.
+        List[str]: Patterns from the file, in file order.
     """
+    text = Path(path).read_text(encoding="utf-8")
+    return patterns_from_lines(text.splitlines(), logger)
+
+
+def patterns_from_lines(
+    lines: Iterable[str], logger: Optional[logging.Logger] = None
+) -> List[str]:
+    """
+    Extracts ignore patterns from the lines of a .gitignore file.
+
+    Args:
+        lines (Iterable[str]): The lines of the file.
+        logger (Optional[logging.Logger]): Logger instance for logging.
+
+    Returns:
+        List[str]: Patterns from the lines, in order.
+    """
+    if logger is None or not logger.isEnabledFor(logging.DEBUG):
+        return [line for line in map(str.strip, lines) if line and line[0] != "#"]
+
     patterns = []
-    with path.open("r", encoding="utf-8") as file:
-        for line in file:
-            clean_pattern = clean_gitignore_line(line)
-            if clean_pattern:
-                normalized_pattern = normalize_gitignore_pattern(clean_pattern)
-                patterns.append(normalized_pattern)
-                log_debug(logger, f"Added ignore pattern: {normalized_pattern}")
+    for line in lines:
+        clean_pattern = clean_gitignore_line(line)
+        if clean_pattern:
+            patterns.append(clean_pattern)
+            log_debug(logger, "Added ignore pattern: %s", clean_pattern)
     return patterns
 
 
+class LRUCache:
+    """
+    A thread-safe mapping that evicts the least recently used entries.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size (int): Number of entries kept before evicting.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """
+        Returns:
+            The cached value for the key, or None.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value):
+        """
+        Stores a value unless another thread stored one for the key first.
+
+        Returns:
+            The value now cached for the key.
+        """
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None:
+                self._entries.move_to_end(key)
+                return current
+            self._entries[key] = value
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return value
+
+    def clear(self) -> None:
+        """
+        Drops all entries and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+matcher_cache = LRUCache(MATCHER_CACHE_SIZE)
+file_cache = LRUCache(FILE_CACHE_SIZE)
+
+
+def load_gitignore_matcher(
+    path: Path, logger: Optional[logging.Logger] = None
+) -> GitignoreMatcher:
+    """
+    Loads a .gitignore file as a compiled matcher.
+
+    Matchers are cached process-wide by the size and hash of the file
+    content, so identical files, such as the same generated file in many
+    directories, are parsed and compiled once. Matchers hold no path
+    information and can be shared between matcher stacks.
+
+    The content hash of every file is remembered together with its size,
+    modification time and inode. A file that has not changed since it was
+    last loaded is neither read nor hashed again, unless it was modified so
+    recently that a change could go unnoticed by its modification time.
+
+    Args:
+        path (Path): Path to the .gitignore file.
+        logger (Optional[logging.Logger]): Logger instance for logging.
+
+    Returns:
+        GitignoreMatcher: The matcher for the file's patterns.
+    """
+    path = os.fspath(path)
+    with open(path, "rb", opener=open_path) as file:
+        status = os.fstat(file.fileno())
+        file_key = (status.st_size, status.st_mtime_ns, status.st_ino)
+        known = file_cache.get(path)
+        if known is not None and known[0] == file_key:
+            matcher = matcher_cache.get(known[1])
+            if matcher is not None:
+                log_debug(logger, "Reusing compiled patterns for: %s", path)
+                return matcher
+        data = file.read()
+
+    key = (len(data), hashlib.sha1(data).digest())
+    if status.st_mtime_ns < time.time_ns() - RACY_WINDOW_NS:
+        file_cache.put(path, (file_key, key))
+
+    matcher = matcher_cache.get(key)
+    if matcher is not None:
+        log_debug(logger, "Reusing compiled patterns for: %s", path)
+        return matcher
+
+    patterns = patterns_from_lines(data.decode("utf-8").splitlines(), logger)
+    return matcher_cache.put(key, GitignoreMatcher(patterns))
+
+
 def clean_gitignore_line(line: str) -> Optional[str]:
     """
     Cleans a line from a .gitignore file by stripping comments and whitespace.
@@ -82,49 +602,81 @@ def normalize_gitignore_pattern(pattern: str) -> str:
     """
     Normalize .gitignore patterns to ensure consistency in matching.
 
+    Deprecated: the scanner no longer uses this function. GitignoreMatcher
+    keeps the leading and trailing slashes, which anchor a pattern and
+    restrict it to directories.
+
     Args:
         pattern (str): The pattern from .gitignore to normalize.
 
     Returns:
         str: The normalized pattern.
     """
+    warnings.warn(
+        "normalize_gitignore_pattern is deprecated; use GitignoreMatcher",
+        DeprecationWarning,
+        stacklevel=2,
+    )
     return pattern.rstrip("/").lstrip("/")
 
 
 def is_ignored(
-    path: Path,
-    ignore_patterns: List[str],
+    path: Union[Path, str],
+    ignore_patterns: Union[MatcherStack, GitignoreMatcher, List[str]],
     inclusion_rules: Set[str],
     logger: Optional[logging.Logger] = None,
+    is_dir: bool = False,
 ) -> bool:
     """
     Checks if a path should be ignored based on .gitignore patterns,
     while considering inclusion rules.
 
+    Only the path itself is checked; callers are expected not to descend into
+    directories that were already ignored.
+
     Args:
-        path (Path): The path to check.
-        ignore_patterns (List[str]): Patterns from the .gitignore file.
-        inclusion_rules (Set[str]): Paths that should be included, regardless of .gitignore rules.
+        path (Union[Path, str]): The path to check, relative to the scan root.
+        ignore_patterns (Union[MatcherStack, GitignoreMatcher, List[str]]): A
+            matcher stack, a compiled matcher, or raw patterns from a
+            .gitignore file which are compiled on the fly.
+        inclusion_rules (Set[str]): Paths or names that should be included,
+            regardless of .gitignore rules, at any depth.
         logger (Optional[logging.Logger]): Logger instance for logging.
+        is_dir (bool): Whether the path is a directory.
 
     Returns:
         bool: True if the path should be ignored, False otherwise.
     """
-    relative_path = str(path).replace("\\", "/")
-    log_debug(logger, f"Checking if path '{relative_path}' should be ignored.")
-
-    if relative_path in inclusion_rules:
-        log_debug(logger, f"Path explicitly included: {relative_path}")
+    if isinstance(path, str):
+        relative_path = path.replace("\\", "/")
+        file_name = relative_path.rsplit("/", 1)[-1]
+    else:
+        relative_path = str(path).replace("\\", "/")
+        file_name = path.name
+    debug = logger is not None and logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Checking if path '%s' should be ignored.", relative_path)
+
+    if relative_path in inclusion_rules or file_name in inclusion_rules:
+        if debug:
+            logger.debug("Path explicitly included: %s", relative_path)
         return False
 
-    for pattern in ignore_patterns:
-        if match_pattern(relative_path, path.name, pattern, logger):
-            log_info(
-                logger, f"Path ignored: {relative_path} based on pattern: {pattern}"
-            )
-            return True
+    if not isinstance(ignore_patterns, (MatcherStack, GitignoreMatcher)):
+        ignore_patterns = GitignoreMatcher(ignore_patterns)
+
+    rule = ignore_patterns.match(relative_path, is_dir)
+    if rule is not None and not rule.negated:
+        log_info(
+            logger,
+            "Path ignored: %s based on pattern: %s",
+            relative_path,
+            rule.pattern,
+        )
+        return True
 
-    log_debug(logger, f"Path not ignored: {relative_path}")
+    if debug:
+        logger.debug("Path not ignored: %s", relative_path)
     return False
 
 
@@ -135,7 +687,7 @@ def match_pattern(
     logger: Optional[logging.Logger] = None,
 ) -> bool:
     """
-    Checks if a path or file name matches a given pattern.
+    Checks if a path or file name matches a single .gitignore pattern.
 
     Args:
         relative_path (str): The relative path to check.
@@ -146,30 +698,38 @@ def match_pattern(
     Returns:
         bool: True if the pattern matches, False otherwise.
     """
-    if fnmatch.fnmatch(relative_path, pattern) or fnmatch.fnmatch(file_name, pattern):
-        return True
-    return False
+    key = ("pattern", pattern)
+    matcher = matcher_cache.get(key) or matcher_cache.put(
+        key, GitignoreMatcher([pattern])
+    )
+    return bool(matcher.match(relative_path) or matcher.match(file_name))
 
 
-def log_info(logger: Optional[logging.Logger], message: str):
+def log_info(logger: Optional[logging.Logger], message: str, *args):
     """
-    Logs an info-level message if a logger is provided.
+    Logs an info-level message if a logger is provided and enabled for it.
+
+    The message is only formatted with args when the record is emitted.
 
     Args:
         logger (Optional[logging.Logger]): Logger instance for logging.
-        message (str): The message to log.
+        message (str): The message to log, with %-style placeholders.
+        *args: Values for the placeholders.
     """
-    if logger:
-        logger.info(message)
+    if logger is not None and logger.isEnabledFor(logging.INFO):
+        logger.info(message, *args)
 
 
-def log_debug(logger: Optional[logging.Logger], message: str):
+def log_debug(logger: Optional[logging.Logger], message: str, *args):
     """
-    Logs a debug-level message if a logger is provided.
+    Logs a debug-level message if a logger is provided and enabled for it.
+
+    The message is only formatted with args when the record is emitted.
 
     Args:
         logger (Optional[logging.Logger]): Logger instance for logging.
-        message (str): The message to log.
+        message (str): The message to log, with %-style placeholders.
+        *args: Values for the placeholders.
     """
-    if logger:
-        logger.debug(message)
+    if logger is not None and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, *args)
@@ -0,0 +1,101 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Size summaries for ignored directories.
+
+The scanner does not descend into ignored directories. When a summary is
+requested, their content is counted by a separate walk that neither applies
+ignore rules nor renders anything, so it can run on its own pool while the
+main scan continues.
+"""
+
+# ignored_summary.py
+
+from typing import NamedTuple
+from .long_paths import scandir_path
+
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
+class IgnoredSummary(NamedTuple):
+    """
+    The number of entries and total file size below a directory.
+    """
+
+    entries: int
+    size: int
+
+
+def summarize_directory(directory) -> IgnoredSummary:
+    """
+    Counts all entries below a directory and adds up the size of its files.
+
+    Symbolic links are counted but not followed, and entries that cannot be
+    read are skipped.
+
+    Args:
+        directory: The directory to summarize.
+
+    Returns:
+        IgnoredSummary: The totals for everything below the directory.
+    """
+    entries = 0
+    size = 0
+    pending = [directory]
+    while pending:
+        try:
+            listed = scandir_path(pending.pop())
+        except OSError:
+            continue
+        for entry in listed:
+            entries += 1
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    size += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+    return IgnoredSummary(entries, size)
+
+
+def format_size(size: int) -> str:
+    """
+    Formats a byte count for display.
+
+    Args:
+        size (int): The number of bytes.
+
+    Returns:
+        str: The size with a binary unit, e.g. "1.5 MB".
+    """
+    value = float(size)
+    for unit in SIZE_UNITS:
+        if value < 1024 or unit == SIZE_UNITS[-1]:
+            break
+        value /= 1024
+    if unit == SIZE_UNITS[0]:
+        return f"{size} {unit}"
+    return f"{value:.1f} {unit}"
+
+
+def format_summary(summary: IgnoredSummary) -> str:
+    """
+    Formats a summary as the annotation shown after an ignored directory.
+
+    Args:
+        summary (IgnoredSummary): The summary to format.
+
+    Returns:
+        str: The annotation, e.g. "[ignored: 12 entries, 3.4 MB]".
+    """
+    noun = "entry" if summary.entries == 1 else "entries"
+    return f"[ignored: {summary.entries} {noun}, {format_size(summary.size)}]"
@@ -11,61 +11,174 @@
 """
 Logger component for the directory scanning application.
 
-This module provides functions to set up a logger that captures logs in memory
-and later saves them to a file.
+This module provides functions to set up a logger that captures logs in a
+spooled buffer and later saves them to a file.
 """
 
 # logger.py
 
 import logging
+import shutil
 from pathlib import Path
 from io import StringIO
+from typing import Dict, Optional, Union
 
+LOGGER_NAME = "DirectoryScanner"
+SPOOL_MAX_SIZE = 8 << 20
 
-def setup_logger(log_level=logging.INFO) -> (logging.Logger, StringIO):
+console_handlers: Dict[str, logging.Handler] = {}
+
+
+class SpooledLogBuffer(logging.Handler):
+    """
+    Log handler collecting formatted records for an optional log file.
+
+    Records are kept in memory up to a size threshold and spilled to a
+    temporary file beyond it. Once attached to a logger, records reach the
+    buffer through a queue drained by a background thread, so writing the
+    buffer never blocks the thread that logs.
+    """
+
+    def __init__(self, max_size: int = SPOOL_MAX_SIZE):
+        """
+        Args:
+            max_size (int): Number of bytes kept in memory before spilling
+                to a temporary file.
+        """
+        import queue
+        import tempfile
+        from logging.handlers import QueueHandler, QueueListener
+
+        super().__init__()
+        self._spool = tempfile.SpooledTemporaryFile(
+            max_size=max_size, mode="w+", encoding="utf-8"
+        )
+        self._queue = queue.Queue()
+        self._listener = QueueListener(self._queue, self)
+        self._queue_handler = QueueHandler(self._queue)
+        self._logger = None
+
+    def attach(self, logger: logging.Logger) -> None:
+        """
+        Starts the background thread and routes the logger's records to it.
+
+        Args:
+            logger (logging.Logger): The logger to capture.
+        """
+        self._queue_handler.setLevel(self.level)
+        logger.addHandler(self._queue_handler)
+        self._logger = logger
+        self._listener.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Writes a formatted record to the spool.
+
+        Args:
+            record (logging.LogRecord): The record to write.
+        """
+        try:
+            self._spool.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """
+        Waits until all queued records have been written.
+        """
+        if self._logger is not None:
+            self._queue.join()
+        with self.lock:
+            self._spool.flush()
+
+    def getvalue(self) -> str:
+        """
+        Returns:
+            str: All records written so far.
+        """
+        self.flush()
+        with self.lock:
+            self._spool.seek(0)
+            value = self._spool.read()
+            self._spool.seek(0, 2)
+        return value
+
+    def save(self, log_path: Path) -> None:
+        """
+        Copies the buffered records to a file without loading them at once.
+
+        Args:
+            log_path (Path): Full path where the log file will be saved.
+        """
+        self.flush()
+        with self.lock, log_path.open("w", encoding="utf-8") as file:
+            self._spool.seek(0)
+            shutil.copyfileobj(self._spool, file)
+            self._spool.seek(0, 2)
+
+    def close(self) -> None:
+        """
+        Detaches from the logger, stops the background thread and discards
+        the buffered records.
+        """
+        if self._logger is not None:
+            self._logger.removeHandler(self._queue_handler)
+            self._listener.stop()
+            self._logger = None
+        self._spool.close()
+        super().close()
+
+
+def setup_logger(
+    log_level=logging.INFO, capture: bool = True
+) -> (logging.Logger, Optional[SpooledLogBuffer]):
     """
     Sets up the logger for the application.
 
-    Logs are simultaneously written to memory (for optional saving to file)
-    and to the console.
+    Logs are written to the console and, if capture is enabled, collected in
+    a spooled buffer for optional saving to file. Calling it again adjusts
+    the level of the existing console handler instead of adding another one.
 
     Args:
         log_level (int): Logging level (default: logging.INFO)
+        capture (bool): Whether to collect records for a log file.
 
     Returns:
-        Tuple[Logger, StringIO]: Configured logger and in-memory log stream.
+        Tuple[Logger, Optional[SpooledLogBuffer]]: Configured logger and the
+        log buffer, or None if capture is disabled.
     """
-    logger = logging.getLogger("DirectoryScanner")
+    logger = logging.getLogger(LOGGER_NAME)
     logger.setLevel(log_level)
 
-    log_stream = StringIO()
+    log_buffer = attach_log_buffer(logger, log_level) if capture else None
 
-    stream_handler = create_stream_handler(log_stream, log_level)
-    logger.addHandler(stream_handler)
+    console_handler = console_handlers.get(logger.name)
+    if console_handler in logger.handlers:
+        console_handler.setLevel(log_level)
+    else:
+        console_handler = create_console_handler(log_level)
+        console_handlers[logger.name] = console_handler
+        logger.addHandler(console_handler)
 
-    console_handler = create_console_handler(log_level)
-    logger.addHandler(console_handler)
+    return logger, log_buffer
 
-    return logger, log_stream
 
-
-def create_stream_handler(
-    log_stream: StringIO, log_level: int
-) -> logging.StreamHandler:
+def attach_log_buffer(logger: logging.Logger, log_level: int) -> SpooledLogBuffer:
     """
-    Creates a stream handler for in-memory logging.
+    Starts capturing a logger's records in a new spooled buffer.
 
     Args:
-        log_stream (StringIO): The stream where logs will be stored.
-        log_level (int): Logging level for this handler.
+        logger (logging.Logger): The logger to capture.
+        log_level (int): Logging level for the buffer.
 
     Returns:
-        logging.StreamHandler: Configured in-memory log handler.
+        SpooledLogBuffer: The attached buffer; close it to stop capturing.
     """
-    handler = logging.StreamHandler(log_stream)
-    handler.setLevel(log_level)
-    handler.setFormatter(create_log_formatter())
-    return handler
+    log_buffer = SpooledLogBuffer()
+    log_buffer.setLevel(log_level)
+    log_buffer.setFormatter(create_log_formatter())
+    log_buffer.attach(logger)
+    return log_buffer
 
 
 def create_console_handler(log_level: int) -> logging.StreamHandler:
@@ -94,14 +207,19 @@ def create_log_formatter() -> logging.Formatter:
     return logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 
 
-def save_logs_to_file(log_stream: StringIO, log_path: Path) -> None:
+def save_logs_to_file(
+    log_stream: Union[SpooledLogBuffer, StringIO], log_path: Path
+) -> None:
     """
-    Saves the in-memory logs to a specified log file.
+    Saves the captured logs to a specified log file.
 
     Args:
-        log_stream (StringIO): The in-memory log stream.
+        log_stream (Union[SpooledLogBuffer, StringIO]): The captured log records.
         log_path (Path): Full path where the log file will be saved.
     """
     log_path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(log_stream, SpooledLogBuffer):
+        log_stream.save(log_path)
+        return
     with log_path.open("w", encoding="utf-8") as file:
         file.write(log_stream.getvalue())
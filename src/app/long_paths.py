@@ -0,0 +1,173 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Access to paths longer than the operating system accepts in one call.
+
+Very deep trees reach paths beyond PATH_MAX, which os.scandir and open reject
+with ENAMETOOLONG. Where os.open supports dir_fd, such a path is opened in
+pieces that each fit, every piece relative to the directory opened before
+it. Paths of a normal length take the usual single call.
+"""
+
+# long_paths.py
+
+import errno
+import os
+import stat
+from typing import List
+
+PIECE_SIZE = 1000
+SUPPORTS_DIR_FD = os.open in os.supports_dir_fd
+DIRECTORY_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+
+
+class DetachedEntry:
+    """
+    A directory entry read through a file descriptor, usable after it closed.
+
+    Entries of os.scandir(fd) only carry their name and resolve their type
+    and stat through the descriptor. This copy keeps the full path and
+    resolves both while the descriptor is open.
+    """
+
+    __slots__ = ("name", "path", "_stat", "_lstat")
+
+    def __init__(self, entry: os.DirEntry, directory):
+        """
+        Args:
+            entry (os.DirEntry): An entry of os.scandir(fd).
+            directory: The path of the listed directory.
+        """
+        self.name = entry.name
+        self.path = os.path.join(os.fspath(directory), entry.name)
+        self._lstat = entry.stat(follow_symlinks=False)
+        try:
+            self._stat = entry.stat()
+        except OSError:
+            self._stat = None
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<DetachedEntry {self.name!r}>"
+
+    def stat(self, *, follow_symlinks: bool = True) -> os.stat_result:
+        """
+        Returns:
+            os.stat_result: The status taken when the directory was listed.
+
+        Raises:
+            FileNotFoundError: If the entry is a broken symbolic link.
+        """
+        status = self._stat if follow_symlinks else self._lstat
+        if status is None:
+            raise FileNotFoundError(errno.ENOENT, "Broken symbolic link", self.path)
+        return status
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        status = self._stat if follow_symlinks else self._lstat
+        return status is not None and stat.S_ISDIR(status.st_mode)
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        status = self._stat if follow_symlinks else self._lstat
+        return status is not None and stat.S_ISREG(status.st_mode)
+
+    def is_symlink(self) -> bool:
+        return stat.S_ISLNK(self._lstat.st_mode)
+
+    def inode(self) -> int:
+        return self._lstat.st_ino
+
+
+def open_path(path, flags: int, mode: int = 0o777) -> int:
+    """
+    Opens a path like os.open, even if it is too long to pass at once.
+
+    The signature fits the opener argument of open().
+
+    Args:
+        path: The path to open.
+        flags (int): Flags for os.open.
+        mode (int): Mode for files that are created.
+
+    Returns:
+        int: The file descriptor.
+    """
+    try:
+        return os.open(path, flags, mode)
+    except OSError as error:
+        if error.errno != errno.ENAMETOOLONG or not SUPPORTS_DIR_FD:
+            raise
+    *parents, last = split_path(os.fsencode(path))
+    directory_fd = None
+    try:
+        for piece in parents:
+            parent_fd = directory_fd
+            directory_fd = os.open(piece, DIRECTORY_FLAGS, dir_fd=parent_fd)
+            if parent_fd is not None:
+                os.close(parent_fd)
+        return os.open(last, flags, mode, dir_fd=directory_fd)
+    finally:
+        if directory_fd is not None:
+            os.close(directory_fd)
+
+
+def scandir_path(directory) -> list:
+    """
+    Lists a directory like os.scandir, even if its path is too long.
+
+    Args:
+        directory: The directory to list.
+
+    Returns:
+        list: The os.DirEntry objects, or DetachedEntry objects for a
+        directory that had to be opened in pieces.
+    """
+    try:
+        with os.scandir(directory) as iterator:
+            return list(iterator)
+    except OSError as error:
+        if error.errno != errno.ENAMETOOLONG or not SUPPORTS_DIR_FD:
+            raise
+    directory_fd = open_path(directory, DIRECTORY_FLAGS)
+    try:
+        with os.scandir(directory_fd) as iterator:
+            return [DetachedEntry(entry, directory) for entry in iterator]
+    finally:
+        os.close(directory_fd)
+
+
+def split_path(path: bytes) -> List[bytes]:
+    """
+    Splits a path at slashes into pieces of at most PIECE_SIZE bytes.
+
+    A single component longer than that stays in one piece; the file system
+    limits components to far less than PATH_MAX.
+
+    Args:
+        path (bytes): The path to split.
+
+    Returns:
+        List[bytes]: The pieces; all but the first are relative.
+    """
+    pieces = []
+    start = 0
+    while len(path) - start > PIECE_SIZE:
+        end = path.rfind(b"/", start + 1, start + PIECE_SIZE + 1)
+        if end < 0:
+            end = path.find(b"/", start + PIECE_SIZE + 1)
+            if end < 0:
+                break
+        pieces.append(path[start:end])
+        start = end + 1
+    pieces.append(path[start:])
+    return pieces
@@ -13,20 +13,41 @@ Entry point for the directory scanning application.
 
 This module scans the structure of subdirectories relative to the executable location
 or a given root, and saves the output and logs to timestamped files.
+
+Modules that only some commands or options need, such as those for watching,
+extracting, caching or profiling, are imported in the branch that uses them,
+so a plain scan starts quickly.
 """
 
 # main.py
 
 from pathlib import Path
-from datetime import datetime
+from itertools import chain
+from contextlib import nullcontext
+from dataclasses import replace
+import hashlib
+import logging
 import os
 import sys
-import ctypes
-import argparse
-from app.config import DirectoryScannerConfig
-from app.directory_scanner import scan_directory
+import time
+from app.config import (
+    CACHE_FILENAME,
+    DEFAULT_INTERVAL,
+    DEFAULT_SUFFIXES,
+    DEFAULT_TOP_DIRECTORIES,
+    FORMAT_EXTENSIONS,
+    FORMAT_JSON,
+    FORMAT_NDJSON,
+    FORMAT_TEXT,
+    SOURCE_FILESYSTEM,
+    SOURCE_GIT_INDEX,
+    DirectoryScannerConfig,
+)
 from app.gitignore_handler import load_gitignore
-from app.logger import setup_logger, save_logs_to_file
+from app.logger import attach_log_buffer, setup_logger, save_logs_to_file
+
+STDOUT_OUTPUT = "-"
+OUTPUT_BUFFER_SIZE = 1 << 20
 
 
 def parse_arguments():
@@ -36,15 +57,252 @@ def parse_arguments():
     Returns:
         Namespace: Parsed arguments.
     """
+    import argparse
+
     parser = argparse.ArgumentParser(description="Skryper - Directory Scanning Tool")
     parser.add_argument(
         "-l", "--logging", action="store_true", help="Enable logging to file"
     )
     parser.add_argument(
-        "--output", type=str, default=None, help="Specify output file name"
+        "--output",
+        type=str,
+        default=None,
+        help="Specify output file name, or '-' to write to stdout; "
+        "with several roots, the directory for their output files",
+    )
+    parser.add_argument(
+        "--root",
+        type=str,
+        action="append",
+        default=None,
+        help="Root directory to scan; repeat to scan several roots in a batch",
+    )
+    parser.add_argument(
+        "--roots-file",
+        type=str,
+        default=None,
+        help="File listing one root directory per line to scan in a batch",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of processes scanning roots of a batch (default: CPU count)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of threads listing directories in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=(FORMAT_TEXT, FORMAT_JSON, FORMAT_NDJSON),
+        default=FORMAT_TEXT,
+        help="Output format: text tree, JSON array or one JSON node per line "
+        "(default: text)",
+    )
+    ignored_group = parser.add_mutually_exclusive_group()
+    ignored_group.add_argument(
+        "--prune-ignored",
+        action="store_true",
+        help="Leave ignored files and directories out of the output entirely",
+    )
+    ignored_group.add_argument(
+        "--summarize-ignored",
+        action="store_true",
+        help="Show the number of entries and total size of ignored directories",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        help="List directories only down to this depth below the root",
+    )
+    parser.add_argument(
+        "--include-path",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Only scan this path relative to the root (can be repeated)",
+    )
+    parser.add_argument(
+        "--max-entries-per-dir",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Show at most N entries per directory and summarize the rest",
+    )
+    parser.add_argument(
+        "--source",
+        choices=(SOURCE_FILESYSTEM, SOURCE_GIT_INDEX),
+        default=SOURCE_FILESYSTEM,
+        help="Walk the filesystem, or build the tree from the tracked files "
+        "in .git/index without walking (default: filesystem)",
+    )
+    parser.add_argument(
+        "--include-untracked",
+        action="store_true",
+        help="With --source git-index, add untracked files that are not ignored",
+    )
+    parser.add_argument(
+        "--with-size",
+        action="store_true",
+        help="Show the size of every file and the total size of every directory",
+    )
+    parser.add_argument(
+        "--with-mtime",
+        action="store_true",
+        help="Show the modification time of every file and the latest one "
+        "below every directory",
+    )
+    parser.add_argument(
+        "--with-lines",
+        action="store_true",
+        help="Show the line count of every file and the total of every directory",
+    )
+    parser.add_argument(
+        "--extract",
+        action="store_true",
+        help="Merge the content of all matching files that are not ignored "
+        "into one file instead of writing the tree",
+    )
+    parser.add_argument(
+        "--extract-suffix",
+        action="append",
+        default=None,
+        metavar="SUFFIX",
+        help="File name ending collected by --extract (can be repeated; "
+        f"default: {' '.join(DEFAULT_SUFFIXES)})",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and update the text tree whenever the directory changes",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Seconds between checks in watch mode (default: {DEFAULT_INTERVAL})",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Do not log a message for every scanned file and directory",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=CACHE_FILENAME,
+        default=None,
+        help="Reuse directory listings from a cache file between runs "
+        f"(default file: {CACHE_FILENAME} in the scanned root)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="REPORT",
+        help="Time every phase of the scan and save a JSON report "
+        "(default file: <timestamp>_<root>_profile.json in the scanned root; "
+        "'-' for stderr)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=DEFAULT_TOP_DIRECTORIES,
+        metavar="N",
+        help="Number of slowest directories listed in the profile "
+        f"(default: {DEFAULT_TOP_DIRECTORIES})",
+    )
+    args = parser.parse_args()
+    if args.max_depth is not None and args.max_depth < 1:
+        parser.error("--max-depth must be at least 1")
+    if args.max_entries_per_dir is not None and args.max_entries_per_dir < 0:
+        parser.error("--max-entries-per-dir must not be negative")
+    if args.watch and args.summarize_ignored:
+        parser.error("--watch does not support --summarize-ignored")
+    return args
+
+
+def parse_diff_arguments(argv):
+    """
+    Parses the arguments of the diff command.
+
+    Args:
+        argv (List[str]): The arguments following 'diff'.
+
+    Returns:
+        Namespace: Parsed arguments.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="skryper diff",
+        description="Compare the structure of two trees. Each side is a "
+        "directory or a scan saved in the text, json or ndjson format.",
+    )
+    parser.add_argument("old", help="The old tree")
+    parser.add_argument("new", help="The new tree")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the report to a file instead of stdout",
     )
-    parser.add_argument("--root", type=str, default=None, help="Root directory to scan")
-    return parser.parse_args()
+    parser.add_argument(
+        "--prune-ignored",
+        action="store_true",
+        help="Leave out ignored directories when scanning a directory",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        help="Descend at most this many levels when scanning a directory",
+    )
+    args = parser.parse_args(argv)
+    if args.max_depth is not None and args.max_depth < 1:
+        parser.error("--max-depth must be at least 1")
+    return args
+
+
+def run_diff(args):
+    """
+    Writes the structural diff of two trees.
+
+    Args:
+        args: Arguments parsed by parse_diff_arguments.
+
+    Returns:
+        int: 1 if the trees differ, otherwise 0.
+    """
+    from app.tree_diff import diff_nodes, iter_source_nodes, render_diff
+
+    for source in (args.old, args.new):
+        if not Path(source).exists():
+            raise SystemExit(f"No such file or directory: '{source}'.")
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    config = configure_directory_scanner(args)
+    config.log_entries = False
+
+    changes, unchanged = diff_nodes(
+        iter_source_nodes(args.old, config, logger),
+        iter_source_nodes(args.new, config, logger),
+    )
+    lines = render_diff(changes, unchanged, args.old, args.new)
+    if args.output is None or args.output == STDOUT_OUTPUT:
+        write_lines(lines, sys.stdout)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            write_lines(lines, file)
+            file.write("\n")
+    return 1 if changes else 0
 
 
 def initialize_logger(args):
@@ -55,29 +313,66 @@ def initialize_logger(args):
         args: Command-line arguments.
 
     Returns:
-        logger, log_stream: Configured logger and log stream.
+        logger, log_stream: Configured logger and the log buffer, which is
+        None unless logging to file is enabled.
     """
-    logger, log_stream = setup_logger()
+    logger, log_stream = setup_logger(capture=args.logging)
     logger.info("Logger initialized successfully.")
     if args.logging:
         logger.info("Logging to file enabled.")
     return logger, log_stream
 
 
-def configure_directory_scanner():
+def configure_directory_scanner(args=None):
     """
     Configures the directory scanner and loads .gitignore patterns.
 
+    Args:
+        args: Command-line arguments, if any.
+
     Returns:
         DirectoryScannerConfig: Configured directory scanner.
     """
     config = DirectoryScannerConfig()
+    if args is not None:
+        config.workers = max(1, getattr(args, "workers", 1))
+        config.log_entries = not getattr(args, "quiet", False)
+        config.prune_ignored = getattr(args, "prune_ignored", False)
+        config.summarize_ignored = getattr(args, "summarize_ignored", False)
+        config.max_depth = getattr(args, "max_depth", None)
+        config.max_entries_per_dir = getattr(args, "max_entries_per_dir", None)
+        config.with_size = getattr(args, "with_size", False)
+        config.with_mtime = getattr(args, "with_mtime", False)
+        config.with_lines = getattr(args, "with_lines", False)
+        config.source = getattr(args, "source", SOURCE_FILESYSTEM)
+        config.include_untracked = getattr(args, "include_untracked", False)
+        include_paths = map(normalize_include_path, getattr(args, "include_path", ()))
+        config.include_paths = tuple(path for path in include_paths if path != ".")
     gitignore_patterns = load_gitignore(Path(".gitignore"))
     config.base_gitignore_paths = set(gitignore_patterns)
     config.base_gitignore_paths.update(config.excluded_files)
+    if args is not None and getattr(args, "cache", None):
+        config.base_gitignore_paths.add(Path(args.cache).name)
     return config
 
 
+def normalize_include_path(path):
+    """
+    Converts an include path argument to the form used for relative paths.
+
+    Args:
+        path (str): The path as given on the command line.
+
+    Returns:
+        str: The path with forward slashes and without leading './' or
+        surrounding slashes, or '.' for the root itself.
+    """
+    path = path.replace("\\", "/").strip("/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path or "."
+
+
 def generate_output_and_log_filenames(args, current_dir_name):
     """
     Generates filenames for the structure and log files based on arguments or timestamp.
@@ -89,78 +384,556 @@ def generate_output_and_log_filenames(args, current_dir_name):
     Returns:
         tuple: (structure_filename, log_filename)
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    structure_filename = args.output or f"{timestamp}_{current_dir_name}_structure.txt"
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    extension = FORMAT_EXTENSIONS[getattr(args, "format", FORMAT_TEXT)]
+    structure_filename = (
+        args.output or f"{timestamp}_{current_dir_name}_structure{extension}"
+    )
     log_filename = f"{timestamp}_scan.log"
+    if structure_filename == STDOUT_OUTPUT:
+        log_filename = f"{timestamp}_{current_dir_name}_log.txt"
     return structure_filename, log_filename
 
 
-def save_directory_structure(config, logger, output_path):
+def write_lines(lines, stream):
     """
-    Saves the scanned directory structure to a file.
+    Writes lines separated by newlines to a stream as they are produced.
 
     Args:
-        config: DirectoryScannerConfig containing the scan result.
+        lines: Iterable of lines without line terminators.
+        stream: Text stream to write to.
+
+    Returns:
+        int: Number of lines written.
+    """
+    count = 0
+    for line in lines:
+        if count:
+            stream.write("\n")
+        stream.write(line)
+        count += 1
+    return count
+
+
+def save_directory_structure(lines, logger, output_path):
+    """
+    Streams the scanned directory structure to a file or stdout.
+
+    Args:
+        lines: Iterable of rendered structure lines.
         logger: The logger instance.
-        output_path (Path): Full path to the structure output file.
+        output_path (Optional[Path]): Full path to the structure output file,
+            or None to write to stdout.
     """
-    with output_path.open("w", encoding="utf-8") as f:
-        f.write("\n".join(config.result))
+    if output_path is None:
+        write_lines(lines, sys.stdout)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+        logger.info("Directory structure written to stdout.")
+        return
+
+    with output_path.open("w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f:
+        write_lines(lines, f)
     logger.info("Directory structure saved to '%s'.", output_path)
     print(f"Directory structure saved to {output_path}")
 
 
-def save_log_file(log_stream, output_filename, base_path):
+def log_cache_usage(scan_cache, logger):
     """
-    Saves the in-memory log to a file with the same timestamp as the structure file.
+    Reports how many directory listings were served from the scan cache.
 
     Args:
-        log_stream (StringIO): In-memory log stream.
-        output_filename (str): Name of the structure output file.
-        base_path (Path): Directory where the log file will be saved.
+        scan_cache (ScanCache): The cache used by the scan.
+        logger: The logger instance.
+    """
+    logger.info(
+        "Scan cache '%s': %d directories reused, %d listed.",
+        scan_cache.path,
+        scan_cache.hits,
+        scan_cache.misses,
+    )
+
+
+def scan_root(
+    args,
+    config,
+    execution_dir,
+    logger,
+    log_stream,
+    output_dir=None,
+    output_name=None,
+):
     """
-    log_filename = output_filename.replace("_structure.txt", "_scan.log")
-    log_path = base_path / log_filename
-    save_logs_to_file(log_stream, log_path)
+    Scans one root and saves its structure and, if requested, its log.
+
+    Args:
+        args: Command-line arguments.
+        config (DirectoryScannerConfig): The scanner configuration.
+        execution_dir (Path): The root to scan.
+        logger: The logger instance.
+        log_stream (Optional[SpooledLogBuffer]): The captured log records.
+        output_dir (Optional[Path]): Directory for the output files. Defaults
+            to the scanned root.
+        output_name (Optional[str]): Name of the root in the output file
+            names. Defaults to the name of the scanned root.
+
+    Returns:
+        Optional[Path]: The structure file, or None if it went to stdout.
+    """
+    from app.scanner import iter_output_lines
+
+    current_dir_name = output_name or execution_dir.name
+    output_dir = output_dir or execution_dir
+    logger.info("Starting directory scan in '%s'.", execution_dir)
+
+    cache_filename = getattr(args, "cache", None)
+    if cache_filename:
+        from app.scan_cache import ScanCache
+
+        config.scan_cache = ScanCache(execution_dir / cache_filename)
+
+    with config.scan_cache or nullcontext():
+        output_format = getattr(args, "format", FORMAT_TEXT)
+        lines = iter_output_lines(execution_dir, output_format, config, logger)
+
+        structure_filename, log_filename = generate_output_and_log_filenames(
+            args, current_dir_name
+        )
+        to_stdout = structure_filename == STDOUT_OUTPUT
+        structure_path = None if to_stdout else output_dir / structure_filename
+
+        config.output_filename = structure_filename
+        profiler = config.profiler
+        if profiler is None:
+            save_directory_structure(lines, logger, structure_path)
+        else:
+            from app.profiling import PHASE_SCAN, PHASE_WRITE
+
+            started = time.perf_counter_ns()
+            scanned = profiler.elapsed(PHASE_SCAN)
+            save_directory_structure(
+                profiler.time_iterator(PHASE_SCAN, lines), logger, structure_path
+            )
+            producing = profiler.elapsed(PHASE_SCAN) - scanned
+            profiler.add(PHASE_WRITE, time.perf_counter_ns() - started - producing)
+    if config.scan_cache is not None:
+        log_cache_usage(config.scan_cache, logger)
+
+    if args.logging:
+        if not to_stdout:
+            extension = FORMAT_EXTENSIONS[output_format]
+            derived_filename = config.output_filename.replace(
+                f"_structure{extension}", "_log.txt"
+            )
+            if derived_filename != config.output_filename:
+                log_filename = derived_filename
+        log_path = output_dir / log_filename
+        if config.profiler is None:
+            save_logs_to_file(log_stream, log_path)
+        else:
+            from app.profiling import PHASE_LOG_SAVE
+
+            with config.profiler.phase(PHASE_LOG_SAVE):
+                save_logs_to_file(log_stream, log_path)
+    return structure_path
+
+
+def publish_structure(lines, root_line, output_path):
+    """
+    Replaces the structure file with a new version of the tree.
+
+    The tree is written to a temporary file next to the output, which then
+    replaces it, so readers never see a partially written file.
+
+    Args:
+        lines (List[str]): The rendered lines below the root.
+        root_line (str): The line naming the root.
+        output_path (Optional[Path]): The structure file, or None for stdout.
+    """
+    if output_path is None:
+        write_lines(chain([root_line], lines), sys.stdout)
+        sys.stdout.write("\n\n")
+        sys.stdout.flush()
+        return
+
+    temporary_path = output_path.with_name(f".{output_path.name}.tmp")
+    with temporary_path.open(
+        "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE
+    ) as file:
+        write_lines(chain([root_line], lines), file)
+    os.replace(temporary_path, output_path)
+
+
+def run_watch(args, config, execution_dir, logger, log_stream):
+    """
+    Writes the text tree of a root and keeps it up to date until interrupted,
+    then saves the log of the session.
+
+    Args:
+        args: Command-line arguments.
+        config (DirectoryScannerConfig): The scanner configuration.
+        execution_dir (Path): The root to watch.
+        logger: The logger instance.
+        log_stream (Optional[SpooledLogBuffer]): The captured log records.
+    """
+    from app.file_metadata import wants_metadata
+    from app.watch import watch_tree
+
+    if getattr(args, "format", FORMAT_TEXT) != FORMAT_TEXT:
+        raise SystemExit("--watch only supports the text format.")
+    if wants_metadata(config):
+        raise SystemExit(
+            "--watch does not support --with-size, --with-mtime or --with-lines."
+        )
+
+    structure_filename, _ = generate_output_and_log_filenames(args, execution_dir.name)
+    output_path = None
+    if structure_filename != STDOUT_OUTPUT:
+        output_path = execution_dir / structure_filename
+        config.base_gitignore_paths.update(
+            {output_path.name, f".{output_path.name}.tmp"}
+        )
+        config.base_stack = None
+
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    root_line = f"{execution_dir.name}/"
+    logger.info("Watching '%s'. Press Ctrl+C to stop.", execution_dir)
+    try:
+        watch_tree(
+            execution_dir,
+            config,
+            logger,
+            lambda lines: publish_structure(lines, root_line, output_path),
+            args.interval,
+        )
+    except KeyboardInterrupt:
+        logger.info("Watch stopped.")
+    finally:
+        if args.logging:
+            log_path = execution_dir / f"{timestamp}_{execution_dir.name}_log.txt"
+            save_logs_to_file(log_stream, log_path)
+
+
+def run_extract(args, config, execution_dir, logger, log_stream):
+    """
+    Merges the source files of a root into one file and saves the log.
+
+    Args:
+        args: Command-line arguments.
+        config (DirectoryScannerConfig): The scanner configuration.
+        execution_dir (Path): The root to extract.
+        logger: The logger instance.
+        log_stream (Optional[SpooledLogBuffer]): The captured log records.
+    """
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    output_filename = args.output or f"{timestamp}_{execution_dir.name}_codebase.txt"
+    suffixes = args.extract_suffix or DEFAULT_SUFFIXES
+    logger.info("Extracting %s files from '%s'.", ", ".join(suffixes), execution_dir)
+
+    from app.codebase_extractor import extract_codebase
+
+    profiled = nullcontext()
+    if config.profiler is not None:
+        from app.profiling import PHASE_EXTRACT
+
+        profiled = config.profiler.phase(PHASE_EXTRACT)
+    if output_filename == STDOUT_OUTPUT:
+        with profiled:
+            written, failed = extract_codebase(
+                execution_dir, sys.stdout.buffer, config, logger, suffixes
+            )
+        sys.stdout.flush()
+    else:
+        output_path = execution_dir / output_filename
+        config.base_gitignore_paths.add(output_path.name)
+        config.base_stack = None
+        with profiled, output_path.open("wb", buffering=OUTPUT_BUFFER_SIZE) as output:
+            written, failed = extract_codebase(
+                execution_dir, output, config, logger, suffixes
+            )
+        print(f"Codebase saved to {output_path}")
+
+    logger.info("%d files extracted, %d could not be read.", written, failed)
+    if args.logging:
+        log_path = execution_dir / f"{timestamp}_{execution_dir.name}_log.txt"
+        save_logs_to_file(log_stream, log_path)
+
+
+def collect_roots(args):
+    """
+    Collects the roots to scan from --root and --roots-file.
+
+    Args:
+        args: Command-line arguments.
+
+    Returns:
+        List[str]: The roots in the given order, without duplicates.
+    """
+    roots = args.root or []
+    if isinstance(roots, str):
+        roots = [roots]
+    roots = list(roots)
+    roots_file = getattr(args, "roots_file", None)
+    if roots_file:
+        with open(roots_file, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    roots.append(line)
+    return list(dict.fromkeys(roots))
+
+
+_batch_worker = {}
+
+
+def init_batch_worker(args, config):
+    """
+    Prepares a batch worker process.
+
+    The configuration arrives with its base matcher stack already compiled,
+    and the worker keeps one logger for all roots it scans.
+
+    Args:
+        args: Command-line arguments.
+        config (DirectoryScannerConfig): The configuration shared by all roots.
+    """
+    logger, _ = setup_logger(capture=False)
+    _batch_worker.update(args=args, config=config, logger=logger)
+
+
+def scan_batch_root(root):
+    """
+    Scans one root of a batch in a worker process.
+
+    Args:
+        root (str): The root to scan.
+
+    Returns:
+        str: The path of the structure file.
+
+    Raises:
+        OSError: If the root is not a readable directory.
+    """
+    import argparse
+
+    args = _batch_worker["args"]
+    logger = _batch_worker["logger"]
+    config = replace(_batch_worker["config"], scan_cache=None)
+    execution_dir = Path(root)
+    if not execution_dir.is_dir():
+        raise FileNotFoundError(f"No such directory: '{root}'")
+    if not os.access(execution_dir, os.R_OK | os.X_OK):
+        raise PermissionError(f"Cannot read directory: '{root}'")
+    output_dir = output_name = None
+    if args.output:
+        output_dir = Path(args.output)
+        output_name = batch_output_name(execution_dir)
+    root_args = argparse.Namespace(**{**vars(args), "output": None})
+
+    log_stream = attach_log_buffer(logger, logger.level) if args.logging else None
+    try:
+        return str(
+            scan_root(
+                root_args,
+                config,
+                execution_dir,
+                logger,
+                log_stream,
+                output_dir,
+                output_name,
+            )
+        )
+    finally:
+        if log_stream is not None:
+            log_stream.close()
+
+
+def batch_output_name(execution_dir):
+    """
+    Names a root in a shared output directory.
+
+    Roots with the same name, such as two 'src' directories, are told apart
+    by a short hash of their resolved path, which stays the same across runs.
+
+    Args:
+        execution_dir (Path): The root.
+
+    Returns:
+        str: The root's name followed by the hash.
+    """
+    resolved = os.fsencode(os.path.realpath(execution_dir))
+    return f"{execution_dir.name}_{hashlib.sha1(resolved).hexdigest()[:8]}"
+
+
+def run_batch(args, config, roots, logger):
+    """
+    Scans several roots concurrently in a process pool.
+
+    Each root gets its own structure file, placed in the root itself or in
+    the directory given by --output. Ignore rules of the working directory
+    are compiled once and handed to every worker, and each worker reuses
+    compiled .gitignore matchers across the roots it scans.
+
+    Args:
+        args: Command-line arguments.
+        config (DirectoryScannerConfig): The configuration shared by all roots.
+        roots (List[str]): The roots to scan.
+        logger: The logger instance.
+
+    Returns:
+        int: The number of roots that failed.
+    """
+    if args.output:
+        if args.output == STDOUT_OUTPUT:
+            raise SystemExit("--output - cannot be used with several roots.")
+        Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from app.directory_scanner import get_base_stack
+
+    unique_roots = list({os.path.realpath(root): root for root in roots}.values())
+    if len(unique_roots) < len(roots):
+        logger.warning("Skipping %d duplicate roots.", len(roots) - len(unique_roots))
+        roots = unique_roots
+
+    get_base_stack(config)
+    failures = 0
+    with ProcessPoolExecutor(
+        max_workers=getattr(args, "processes", None),
+        initializer=init_batch_worker,
+        initargs=(args, config),
+    ) as executor:
+        futures = {executor.submit(scan_batch_root, root): root for root in roots}
+        for future in as_completed(futures):
+            root = futures[future]
+            try:
+                logger.info("Scanned '%s' to '%s'.", root, future.result())
+            except Exception as error:
+                failures += 1
+                logger.error("Scanning '%s' failed: %s", root, error)
+
+    print(f"Scanned {len(roots) - failures} of {len(roots)} roots.")
+    return failures
 
 
 def main(args=None):
     """
     Executes the directory scan and saves the structure and logs to files.
+
+    With 'diff' as the first command-line argument, compares two trees instead.
+
+    Returns:
+        Optional[int]: The exit status of the diff command or of a batch,
+        which is 1 if any root failed, otherwise None.
     """
     if args is None:
+        if sys.argv[1:2] == ["diff"]:
+            return run_diff(parse_diff_arguments(sys.argv[2:]))
         args = parse_arguments()
 
     if os.name == "nt":
-        ctypes.windll.kernel32.SetConsoleOutputCP(65001)
+        import ctypes
 
-    logger, log_stream = initialize_logger(args)
-    config = configure_directory_scanner()
-
-    execution_dir = (
-        Path(args.root) if args.root else Path(os.path.dirname(sys.executable))
-    )
-    current_dir_name = execution_dir.name
-    config.result.append(f"{current_dir_name}/")
-    logger.info("Starting directory scan in '%s'.", execution_dir)
-
-    scan_directory(execution_dir, config, logger)
+        ctypes.windll.kernel32.SetConsoleOutputCP(65001)
 
-    structure_filename, log_filename = generate_output_and_log_filenames(
-        args, current_dir_name
-    )
-    structure_path = execution_dir / structure_filename
-    log_path = execution_dir / log_filename
+    profiler = None
+    setup_phase = nullcontext()
+    if getattr(args, "profile", None) is not None:
+        if getattr(args, "watch", False):
+            raise SystemExit("--profile cannot be used with --watch.")
+        from app.profiling import PHASE_SETUP, Profiler
+
+        profiler = Profiler(args.profile_top)
+        setup_phase = profiler.phase(PHASE_SETUP)
+
+    with setup_phase:
+        logger, log_stream = initialize_logger(args)
+        config = configure_directory_scanner(args)
+    roots = collect_roots(args)
+    if profiler is not None:
+        if len(roots) > 1:
+            raise SystemExit("--profile cannot be used with several roots.")
+        from app.profiling import profile_handlers
+
+        profile_handlers(logger, profiler)
+        config.profiler = profiler
+
+    if len(roots) > 1:
+        if log_stream is not None:
+            log_stream.close()
+        return 1 if run_batch(args, config, roots, logger) else 0
+
+    execution_dir = Path(roots[0]) if roots else Path(os.path.dirname(sys.executable))
+    try:
+        run_root(args, config, execution_dir, logger, log_stream)
+    finally:
+        if log_stream is not None:
+            log_stream.close()
+        if profiler is not None:
+            from app.profiling import unprofile_handlers
+
+            unprofile_handlers(logger)
+    if profiler is not None:
+        save_profile(profiler, args.profile, execution_dir, logger)
+
+
+def run_root(args, config, execution_dir, logger, log_stream):
+    """
+    Scans, extracts or watches a single root, as the arguments ask.
 
-    config.output_filename = structure_filename
-    save_directory_structure(config, logger, structure_path)
+    Args:
+        args: Command-line arguments.
+        config (DirectoryScannerConfig): The scanner configuration.
+        execution_dir (Path): The root.
+        logger: The logger instance.
+        log_stream (Optional[SpooledLogBuffer]): The captured log records.
+    """
+    if config.source == SOURCE_GIT_INDEX and (
+        getattr(args, "extract", False) or getattr(args, "watch", False)
+    ):
+        raise SystemExit("--source git-index does not support --extract or --watch.")
+    if getattr(args, "extract", False):
+        run_extract(args, config, execution_dir, logger, log_stream)
+    elif getattr(args, "watch", False):
+        run_watch(args, config, execution_dir, logger, log_stream)
+    elif config.source == SOURCE_GIT_INDEX:
+        from app.git_index import GitIndexError
+
+        try:
+            scan_root(args, config, execution_dir, logger, log_stream)
+        except GitIndexError as error:
+            raise SystemExit(str(error))
+    else:
+        scan_root(args, config, execution_dir, logger, log_stream)
+
+
+def save_profile(profiler, report_filename, execution_dir, logger):
+    """
+    Writes the profile of a run as JSON.
 
-    if args.logging:
-        log_filename = config.output_filename.replace("_structure.txt", "_log.txt")
-        log_path = execution_dir / log_filename
-        save_logs_to_file(log_stream, log_path)
-        log_stream.close()
+    Args:
+        profiler (Profiler): The profiler of the run.
+        report_filename (str): The report file, '-' for stderr, or '' for a
+            timestamped file in the scanned root.
+        execution_dir (Path): The scanned root.
+        logger: The logger instance.
+    """
+    if report_filename == STDOUT_OUTPUT:
+        profiler.write_report(sys.stderr)
+        return
+    if not report_filename:
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        report_filename = f"{timestamp}_{execution_dir.name}_profile.json"
+    report_path = execution_dir / report_filename
+    with report_path.open("w", encoding="utf-8") as file:
+        profiler.write_report(file)
+    logger.info("Profile saved to '%s'.", report_path)
+    print(f"Profile saved to {report_path}")
 
 
 if __name__ == "__main__":
-    main()
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        multiprocessing.freeze_support()
+    sys.exit(main())
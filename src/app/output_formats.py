@@ -0,0 +1,179 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Machine-readable output formats for the scanned tree.
+
+Both formats describe every node with its path relative to the scan root,
+its type, its depth and whether it is ignored, plus the requested size,
+modification time and line count. NDJSON writes one node per line; JSON
+writes a single array with one node per line, so both can be streamed while
+the scan is still running.
+"""
+
+# output_formats.py
+
+from typing import Dict, Iterable, Iterator, Optional
+from .config import FORMAT_JSON, FORMAT_NDJSON
+from .file_metadata import EntryMetadata, format_mtime_utc
+
+ROOT_PATH = "."
+TYPE_DIRECTORY = "directory"
+TYPE_FILE = "file"
+TYPE_TRUNCATED = "truncated"
+
+
+def node_record(node) -> Dict[str, object]:
+    """
+    Converts a scanned node into its serializable form.
+
+    Args:
+        node (TreeNode): The node to convert.
+
+    Returns:
+        Dict[str, object]: The path, type, depth and ignored flag of the node,
+        plus the entry count and bytes of summarized ignored directories and
+        any gathered metadata. The marker of a truncated directory carries the
+        directory's path and the number of omitted entries.
+    """
+    if node.omitted:
+        return {
+            "path": node.relative_path or ROOT_PATH,
+            "type": TYPE_TRUNCATED,
+            "depth": node.depth,
+            "ignored": False,
+            "omitted": node.omitted,
+        }
+    record = {
+        "path": node.relative_path,
+        "type": TYPE_DIRECTORY if node.is_dir else TYPE_FILE,
+        "depth": node.depth,
+        "ignored": node.ignored,
+    }
+    if node.summary is not None:
+        record["entries"] = node.summary.entries
+        record["bytes"] = node.summary.size
+    if node.metadata is not None:
+        add_metadata(record, node.metadata)
+    return record
+
+
+def add_metadata(record: Dict[str, object], metadata: EntryMetadata) -> None:
+    """
+    Adds the gathered size, modification time and line count to a record.
+
+    Args:
+        record (Dict[str, object]): The record to extend.
+        metadata (EntryMetadata): The metadata of the node.
+    """
+    if metadata.size is not None:
+        record["size"] = metadata.size
+    if metadata.mtime_ns is not None:
+        record["mtime"] = format_mtime_utc(metadata.mtime_ns)
+    if metadata.lines is not None:
+        record["lines"] = metadata.lines
+
+
+def root_record(metadata: Optional[EntryMetadata] = None) -> Dict[str, object]:
+    """
+    Args:
+        metadata (Optional[EntryMetadata]): The totals of the scan root, if
+            they were gathered.
+
+    Returns:
+        Dict[str, object]: The record describing the scan root itself.
+    """
+    record = {"path": ROOT_PATH, "type": TYPE_DIRECTORY, "depth": 0, "ignored": False}
+    if metadata is not None:
+        add_metadata(record, metadata)
+    return record
+
+
+def iter_records(
+    nodes: Iterable, root_metadata: Optional[EntryMetadata] = None
+) -> Iterator[str]:
+    """
+    Serializes the root and the given nodes as compact JSON objects.
+
+    Args:
+        nodes (Iterable[TreeNode]): The scanned nodes.
+        root_metadata (Optional[EntryMetadata]): The totals of the scan root.
+
+    Yields:
+        str: One JSON object per node, starting with the root.
+    """
+    import json
+
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    yield encode(root_record(root_metadata))
+    for node in nodes:
+        yield encode(node_record(node))
+
+
+def iter_ndjson_lines(
+    nodes: Iterable, root_metadata: Optional[EntryMetadata] = None
+) -> Iterator[str]:
+    """
+    Renders nodes as newline-delimited JSON.
+
+    Args:
+        nodes (Iterable[TreeNode]): The scanned nodes.
+        root_metadata (Optional[EntryMetadata]): The totals of the scan root.
+
+    Returns:
+        Iterator[str]: One line per node, without line terminators.
+    """
+    return iter_records(nodes, root_metadata)
+
+
+def iter_json_lines(
+    nodes: Iterable, root_metadata: Optional[EntryMetadata] = None
+) -> Iterator[str]:
+    """
+    Renders nodes as a JSON array holding one node per line.
+
+    Args:
+        nodes (Iterable[TreeNode]): The scanned nodes.
+        root_metadata (Optional[EntryMetadata]): The totals of the scan root.
+
+    Yields:
+        str: The lines of the document, without line terminators.
+    """
+    yield "["
+    previous = None
+    for record in iter_records(nodes, root_metadata):
+        if previous is not None:
+            yield f"  {previous},"
+        previous = record
+    yield f"  {previous}"
+    yield "]"
+
+
+def iter_format_lines(
+    output_format: str,
+    nodes: Iterable,
+    root_metadata: Optional[EntryMetadata] = None,
+) -> Iterator[str]:
+    """
+    Renders nodes in one of the machine-readable formats.
+
+    Args:
+        output_format (str): FORMAT_JSON or FORMAT_NDJSON.
+        nodes (Iterable[TreeNode]): The scanned nodes.
+        root_metadata (Optional[EntryMetadata]): The totals of the scan root.
+
+    Returns:
+        Iterator[str]: The rendered lines, without line terminators.
+    """
+    if output_format == FORMAT_JSON:
+        return iter_json_lines(nodes, root_metadata)
+    if output_format == FORMAT_NDJSON:
+        return iter_ndjson_lines(nodes, root_metadata)
+    raise ValueError(f"Unsupported output format: {output_format}")
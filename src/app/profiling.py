@@ -0,0 +1,265 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Per-phase timings of a scan, collected with --profile.
+
+A Profiler is carried on the scanner configuration. Instrumented code reads
+config.profiler once and only takes timestamps if it is set, so a scan
+without --profile pays for one attribute lookup and a None check per
+directory. Log handlers are only wrapped while profiling.
+
+Phases nest: the time spent reading directories is part of the scan, and
+listing, loading .gitignore files and matching are part of reading a
+directory. Directories are read on worker threads with --workers, so their
+phase totals are summed over all threads and may exceed the wall time.
+"""
+
+# profiling.py
+
+import bisect
+import heapq
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+from .config import DEFAULT_TOP_DIRECTORIES
+
+HISTOGRAM_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+PHASE_SETUP = "main.setup"
+PHASE_SCAN = "main.scan"
+PHASE_WRITE = "main.write"
+PHASE_EXTRACT = "main.extract"
+PHASE_DIRECTORY = "directory_scanner.read_directory"
+PHASE_LIST = "directory_scanner.list_directory"
+PHASE_LOAD_GITIGNORE = "gitignore_handler.load_gitignore_matcher"
+PHASE_IS_IGNORED = "gitignore_handler.is_ignored"
+PHASE_LOG_EMIT = "logger.emit"
+PHASE_LOG_SAVE = "logger.save_logs_to_file"
+
+
+class Profiler:
+    """
+    Thread-safe collector of phase timings and directory latencies.
+    """
+
+    def __init__(self, top: int = DEFAULT_TOP_DIRECTORIES):
+        """
+        Args:
+            top (int): Number of slowest directories kept for the report.
+        """
+        self.top = top
+        self.started_ns = time.perf_counter_ns()
+        self.phases: Dict[str, List[int]] = {}
+        self.bounds_ns = [int(bound * 1_000_000) for bound in HISTOGRAM_BOUNDS_MS]
+        self.histogram = [0] * (len(self.bounds_ns) + 1)
+        self.directories = 0
+        self.slowest: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, elapsed_ns: int, calls: int = 1) -> None:
+        """
+        Adds time and calls to a phase.
+
+        Args:
+            phase (str): The name of the phase.
+            elapsed_ns (int): Time spent, in nanoseconds.
+            calls (int): Number of calls covered by the time.
+        """
+        with self._lock:
+            totals = self.phases.get(phase)
+            if totals is None:
+                totals = self.phases[phase] = [0, 0]
+            totals[0] += elapsed_ns
+            totals[1] += calls
+
+    def add_directory(self, path: str, elapsed_ns: int) -> None:
+        """
+        Records the time it took to read one directory.
+
+        Args:
+            path (str): The directory.
+            elapsed_ns (int): Time spent reading it, in nanoseconds.
+        """
+        bucket = bisect.bisect_left(self.bounds_ns, elapsed_ns)
+        with self._lock:
+            self.directories += 1
+            self.histogram[bucket] += 1
+            if len(self.slowest) < self.top:
+                heapq.heappush(self.slowest, (elapsed_ns, path))
+            elif self.top and elapsed_ns > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (elapsed_ns, path))
+
+    def add_directory_read(
+        self,
+        path: str,
+        timestamps: Tuple[int, int, int, int],
+        entries: int,
+        loaded_gitignore: bool,
+    ) -> None:
+        """
+        Records the phases of reading one directory.
+
+        Args:
+            path (str): The directory.
+            timestamps (Tuple[int, int, int, int]): When reading started, the
+                listing ended, the .gitignore was loaded and the entries were
+                matched, in nanoseconds.
+            entries (int): Number of entries matched against the patterns.
+            loaded_gitignore (bool): Whether a .gitignore was loaded.
+        """
+        started, listed, loaded, finished = timestamps
+        self.add(PHASE_LIST, listed - started)
+        if loaded_gitignore:
+            self.add(PHASE_LOAD_GITIGNORE, loaded - listed)
+        self.add(PHASE_IS_IGNORED, finished - loaded, entries)
+        self.add(PHASE_DIRECTORY, finished - started)
+        self.add_directory(path, finished - started)
+
+    @contextmanager
+    def phase(self, phase: str):
+        """
+        Times the body of a with statement as one call of a phase.
+
+        Args:
+            phase (str): The name of the phase.
+        """
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter_ns() - started)
+
+    def time_iterator(self, phase: str, items: Iterable) -> Iterator:
+        """
+        Passes items through, timing how long each takes to produce.
+
+        The time spent by the consumer between two items is not counted. The
+        whole iteration is recorded as one call of the phase.
+
+        Args:
+            phase (str): The name of the phase.
+            items (Iterable): The items to pass through.
+
+        Yields:
+            The items, unchanged.
+        """
+        iterator = iter(items)
+        elapsed = 0
+        clock = time.perf_counter_ns
+        try:
+            while True:
+                started = clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    elapsed += clock() - started
+                    break
+                elapsed += clock() - started
+                yield item
+        finally:
+            self.add(phase, elapsed)
+
+    def elapsed(self, phase: str) -> int:
+        """
+        Returns:
+            int: The time recorded for a phase so far, in nanoseconds.
+        """
+        with self._lock:
+            return self.phases.get(phase, (0, 0))[0]
+
+    def report(self) -> dict:
+        """
+        Summarizes everything recorded so far.
+
+        Returns:
+            dict: The wall time, the time and calls of every phase, the
+            histogram of directory read times and the slowest directories.
+        """
+        wall_ns = time.perf_counter_ns() - self.started_ns
+        with self._lock:
+            phases = {
+                name: {
+                    "calls": calls,
+                    "total_ms": round(total / 1e6, 3),
+                    "mean_us": round(total / calls / 1e3, 3) if calls else 0.0,
+                }
+                for name, (total, calls) in sorted(self.phases.items())
+            }
+            labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS]
+            labels.append(f">{HISTOGRAM_BOUNDS_MS[-1]}ms")
+            histogram = dict(zip(labels, self.histogram))
+            slowest = [
+                {"path": path, "ms": round(elapsed / 1e6, 3)}
+                for elapsed, path in sorted(self.slowest, reverse=True)
+            ]
+            directories = self.directories
+        return {
+            "wall_ms": round(wall_ns / 1e6, 3),
+            "phases": phases,
+            "directories": {
+                "count": directories,
+                "histogram": histogram,
+                "slowest": slowest,
+            },
+        }
+
+    def write_report(self, stream) -> None:
+        """
+        Writes the report as indented JSON.
+
+        Args:
+            stream: Text stream to write to.
+        """
+        json.dump(self.report(), stream, indent=2)
+        stream.write("\n")
+
+
+def profile_handlers(logger: logging.Logger, profiler: Profiler) -> None:
+    """
+    Times every handler of a logger as the logging phase.
+
+    The handlers are wrapped in place, so a logger that is not profiled keeps
+    its handlers unchanged.
+
+    Args:
+        logger (logging.Logger): The logger whose handlers are timed.
+        profiler (Profiler): The profiler receiving the times.
+    """
+    for handler in logger.handlers:
+        if getattr(handler, "_skryper_profiled", False):
+            continue
+        handle = handler.handle
+
+        def timed_handle(record, handle=handle):
+            started = time.perf_counter_ns()
+            try:
+                return handle(record)
+            finally:
+                profiler.add(PHASE_LOG_EMIT, time.perf_counter_ns() - started)
+
+        handler.handle = timed_handle
+        handler._skryper_profiled = True
+
+
+def unprofile_handlers(logger: logging.Logger) -> None:
+    """
+    Removes the timing added by profile_handlers.
+
+    Args:
+        logger (logging.Logger): The logger whose handlers were timed.
+    """
+    for handler in logger.handlers:
+        if getattr(handler, "_skryper_profiled", False):
+            del handler.handle
+            del handler._skryper_profiled
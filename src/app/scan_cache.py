@@ -0,0 +1,267 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Persistent cache of directory listings for incremental rescans.
+
+Every listed directory is stored together with the modification time and
+inode it had when it was listed. On the next run, a directory whose stat
+result still matches is served from the cache with a single stat call instead
+of being listed again. Adding, removing or renaming an entry updates the
+directory's modification time, so changed directories are always relisted.
+.gitignore files are still read on every run, because editing a file does not
+touch the modification time of its directory.
+"""
+
+# scan_cache.py
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+RACY_WINDOW_NS = 2_000_000_000
+
+ENTRY_DIRECTORY = b"d"
+ENTRY_FILE = b"f"
+ENTRY_OTHER = b"o"
+
+
+class CachedEntry:
+    """
+    A directory entry restored from the cache.
+
+    Provides the subset of the os.DirEntry interface used by the scanner.
+    """
+
+    __slots__ = ("name", "path", "_is_dir", "_is_file")
+
+    def __init__(self, name: str, path: str, is_dir: bool, is_file: bool):
+        self.name = name
+        self.path = path
+        self._is_dir = is_dir
+        self._is_file = is_file
+
+    def __repr__(self) -> str:
+        return f"<CachedEntry {self.name!r}>"
+
+    def is_dir(self) -> bool:
+        """
+        Returns:
+            bool: True if the entry was a directory when it was cached.
+        """
+        return self._is_dir
+
+    def is_file(self) -> bool:
+        """
+        Returns:
+            bool: True if the entry was a file when it was cached.
+        """
+        return self._is_file
+
+    def stat(self) -> os.stat_result:
+        """
+        Returns:
+            os.stat_result: A fresh stat result of the entry.
+        """
+        return os.stat(self.path)
+
+
+class ScanCache:
+    """
+    SQLite-backed store of sorted directory listings keyed by path.
+
+    Lookups may come from several scanner threads; they share one connection
+    guarded by a lock. New listings are collected in memory and written in a
+    single transaction when the cache is closed.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Opens or creates the cache file.
+
+        Args:
+            path (Path): Location of the cache database.
+        """
+        import sqlite3
+
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[bytes, int, int, bytes]] = []
+        self._seen: List[Tuple[bytes]] = []
+        self._started_ns = time.time_ns()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._prepare_schema()
+
+    def __enter__(self) -> "ScanCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(prune=exc_type is None)
+
+    def _prepare_schema(self) -> None:
+        """
+        Creates the table, discarding caches written by other schema versions.
+        """
+        connection = self._connection
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            connection.execute("DROP TABLE IF EXISTS listings")
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            "path BLOB PRIMARY KEY, mtime_ns INTEGER, inode INTEGER, entries BLOB)"
+        )
+        connection.commit()
+
+    def lookup(self, directory) -> Tuple[Optional[list], Optional[os.stat_result]]:
+        """
+        Returns the cached, sorted listing of a directory if it is still valid.
+
+        Args:
+            directory: The directory to look up.
+
+        Returns:
+            Tuple[Optional[list], Optional[os.stat_result]]: The cached
+            entries, or None on a cache miss, together with the current stat
+            result of the directory, or None if it cannot be read.
+        """
+        directory = os.fspath(directory)
+        key = os.fsencode(directory)
+        try:
+            status = os.stat(directory)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        with self._lock:
+            self._seen.append((key,))
+            row = self._connection.execute(
+                "SELECT mtime_ns, inode, entries FROM listings WHERE path = ?", (key,)
+            ).fetchone()
+            valid = row is not None and row[:2] == (status.st_mtime_ns, status.st_ino)
+            if valid:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not valid:
+            return None, status
+        return decode_entries(directory, row[2]), status
+
+    def store(self, directory, status: os.stat_result, entries: list) -> None:
+        """
+        Remembers the sorted listing of a directory.
+
+        Listings of directories modified shortly before the scan started are
+        not stored, since a change within the same timestamp tick would go
+        unnoticed on the next run.
+
+        Args:
+            directory: The listed directory.
+            status (Optional[os.stat_result]): Stat result taken before
+                listing, or None if the directory could not be read.
+            entries (list): The sorted entries.
+        """
+        if status is None or status.st_mtime_ns >= self._started_ns - RACY_WINDOW_NS:
+            return
+        key = os.fsencode(os.fspath(directory))
+        record = (key, status.st_mtime_ns, status.st_ino, encode_entries(entries))
+        with self._lock:
+            self._pending.append(record)
+
+    def close(self, prune: bool = True) -> None:
+        """
+        Writes the collected listings and closes the database.
+
+        Args:
+            prune (bool): Remove entries for directories not visited in this run.
+        """
+        with self._lock:
+            connection = self._connection
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?)",
+                    self._pending,
+                )
+                if prune:
+                    connection.execute("CREATE TEMP TABLE seen (path BLOB)")
+                    connection.executemany("INSERT INTO seen VALUES (?)", self._seen)
+                    connection.execute(
+                        "DELETE FROM listings WHERE path NOT IN (SELECT path FROM seen)"
+                    )
+            connection.close()
+            self._pending = []
+            self._seen = []
+
+
+def entry_flag(entry) -> bytes:
+    """
+    Encodes the type of an entry as a single byte.
+
+    Args:
+        entry: A directory entry.
+
+    Returns:
+        bytes: The type flag.
+    """
+    try:
+        if entry.is_dir():
+            return ENTRY_DIRECTORY
+        if entry.is_file():
+            return ENTRY_FILE
+    except OSError:
+        pass
+    return ENTRY_OTHER
+
+
+def encode_entries(entries: list) -> bytes:
+    """
+    Serializes sorted entries as NUL-separated, type-prefixed names.
+
+    Args:
+        entries (list): The entries to encode.
+
+    Returns:
+        bytes: The encoded listing.
+    """
+    return b"\0".join(entry_flag(entry) + os.fsencode(entry.name) for entry in entries)
+
+
+def decode_entries(directory: str, data: bytes) -> List[CachedEntry]:
+    """
+    Restores entries encoded with encode_entries.
+
+    Args:
+        directory (str): The directory the entries belong to.
+        data (bytes): The encoded listing.
+
+    Returns:
+        List[CachedEntry]: The entries in their stored order.
+    """
+    if not data:
+        return []
+    entries = []
+    for record in data.split(b"\0"):
+        flag, name = record[:1], os.fsdecode(record[1:])
+        entries.append(
+            CachedEntry(
+                name,
+                os.path.join(directory, name),
+                flag == ENTRY_DIRECTORY,
+                flag == ENTRY_FILE,
+            )
+        )
+    return entries
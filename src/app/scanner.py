@@ -0,0 +1,226 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Reentrant scanner for running many scans inside one process.
+
+A Scanner copies its configuration once, freezes the ignore rules and
+compiles the base patterns before the first scan. Scans only read that copy:
+their lines and nodes go straight to the caller, and a scan cache or a
+profiler is handed to the single scan that uses it. One Scanner can
+therefore serve any number of scans at once from different threads, and
+scanners with different configurations can run side by side.
+
+The git index, the tree model and the json formats are imported by the
+scans that use them, so a plain text scan does not load them.
+
+The scanner logs to the "DirectoryScanner" logger unless it is given another
+one, and never configures it, so creating a scanner or starting a scan adds
+no handlers.
+"""
+
+# scanner.py
+
+import logging
+from dataclasses import replace
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from .config import FORMAT_TEXT, SOURCE_GIT_INDEX, DirectoryScannerConfig
+from .directory_scanner import (
+    TreeNode,
+    get_base_stack,
+    iter_directory,
+    iter_nodes,
+    render_lines,
+)
+from .file_metadata import format_metadata, wants_metadata
+from .logger import LOGGER_NAME
+
+
+class Scanner:
+    """
+    Scans directories with a fixed configuration, safely from any thread.
+    """
+
+    def __init__(
+        self,
+        config: Optional[DirectoryScannerConfig] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Args:
+            config (Optional[DirectoryScannerConfig]): The configuration to
+                copy. The excluded files are added to the base ignore
+                patterns. Its scan cache and profiler are not used.
+            logger (Optional[logging.Logger]): Logger for the scans. Defaults
+                to the "DirectoryScanner" logger, as configured by the caller.
+        """
+        config = config or DirectoryScannerConfig()
+        self._config = replace(
+            config,
+            base_gitignore_paths=frozenset(
+                config.base_gitignore_paths | config.excluded_files
+            ),
+            excluded_files=frozenset(config.excluded_files),
+            inclusion_rules=frozenset(config.inclusion_rules),
+            include_paths=tuple(config.include_paths),
+            scan_cache=None,
+            profiler=None,
+            base_stack=None,
+        )
+        get_base_stack(self._config)
+        self.logger = logger or logging.getLogger(LOGGER_NAME)
+
+    @property
+    def config(self) -> DirectoryScannerConfig:
+        """
+        Returns:
+            DirectoryScannerConfig: A copy of the configuration; changing it
+            does not affect the scanner.
+        """
+        return replace(self._config)
+
+    def scan(
+        self,
+        root: Union[str, Path],
+        output_format: str = FORMAT_TEXT,
+        scan_cache=None,
+        profiler=None,
+    ) -> List[str]:
+        """
+        Scans a directory into rendered lines.
+
+        Args:
+            root (Union[str, Path]): The directory to scan.
+            output_format (str): The output format.
+            scan_cache (Optional[ScanCache]): Cache used by this scan only.
+            profiler (Optional[Profiler]): Profiler timing this scan only.
+
+        Returns:
+            List[str]: The lines of the output file, starting with the root.
+        """
+        return list(self.iter_lines(root, output_format, scan_cache, profiler))
+
+    def iter_lines(
+        self,
+        root: Union[str, Path],
+        output_format: str = FORMAT_TEXT,
+        scan_cache=None,
+        profiler=None,
+    ) -> Iterator[str]:
+        """
+        Scans a directory, yielding the rendered lines as they are produced.
+
+        Args:
+            root (Union[str, Path]): The directory to scan.
+            output_format (str): The output format.
+            scan_cache (Optional[ScanCache]): Cache used by this scan only.
+            profiler (Optional[Profiler]): Profiler timing this scan only.
+
+        Returns:
+            Iterator[str]: The lines of the output file, starting with the root.
+        """
+        config = self._scan_config(scan_cache, profiler)
+        return iter_output_lines(Path(root), output_format, config, self.logger)
+
+    def iter_nodes(
+        self, root: Union[str, Path], scan_cache=None, profiler=None
+    ) -> Iterator[TreeNode]:
+        """
+        Scans a directory, yielding its nodes in output order.
+
+        Args:
+            root (Union[str, Path]): The directory to scan.
+            scan_cache (Optional[ScanCache]): Cache used by this scan only.
+            profiler (Optional[Profiler]): Profiler timing this scan only.
+
+        Returns:
+            Iterator[TreeNode]: The nodes below the root.
+        """
+        config = self._scan_config(scan_cache, profiler)
+        if config.source == SOURCE_GIT_INDEX:
+            from .git_index import iter_index_nodes
+
+            return iter_index_nodes(Path(root), config, self.logger)[1]
+        return iter_nodes(Path(root), config, self.logger)
+
+    def _scan_config(self, scan_cache, profiler) -> DirectoryScannerConfig:
+        """
+        Returns:
+            DirectoryScannerConfig: The configuration of one scan, sharing the
+            frozen rules and compiled base patterns.
+        """
+        if scan_cache is None and profiler is None:
+            return self._config
+        return replace(self._config, scan_cache=scan_cache, profiler=profiler)
+
+
+def iter_output_lines(
+    directory: Path, output_format: str, config, logger: logging.Logger
+) -> Iterator[str]:
+    """
+    Scans a directory into the lines of an output file.
+
+    Args:
+        directory (Path): The directory to scan.
+        output_format (str): The output format.
+        config (DirectoryScannerConfig): The scanner configuration.
+        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        Iterator[str]: The rendered lines, starting with the root.
+    """
+    root_line = f"{directory.name}/"
+    if wants_metadata(config):
+        from .tree_model import build_tree
+
+        return render_tree(
+            build_tree(directory, config, logger), output_format, config, logger
+        )
+    if config.source == SOURCE_GIT_INDEX:
+        from .git_index import iter_index_nodes
+
+        has_gitignore, nodes = iter_index_nodes(directory, config, logger)
+        if output_format != FORMAT_TEXT:
+            from .output_formats import iter_format_lines
+
+            return iter_format_lines(output_format, nodes)
+        return chain(
+            [root_line], render_lines(nodes, config, logger, "", has_gitignore)
+        )
+    if output_format != FORMAT_TEXT:
+        from .output_formats import iter_format_lines
+
+        return iter_format_lines(output_format, iter_nodes(directory, config, logger))
+    return chain([root_line], iter_directory(directory, config, logger))
+
+
+def render_tree(tree, output_format, config, logger):
+    """
+    Renders a scanned tree model, including its gathered metadata.
+
+    Args:
+        tree (CompactTree): The scanned tree.
+        output_format (str): The output format.
+        config (DirectoryScannerConfig): The scanner configuration.
+        logger: The logger instance.
+
+    Returns:
+        Iterator[str]: The rendered lines, starting with the root.
+    """
+    if output_format != FORMAT_TEXT:
+        return tree.iter_format_lines(output_format)
+    root_line = f"{Path(tree.root_path).name}/"
+    root_metadata = tree.root_metadata()
+    if root_metadata is not None:
+        root_line = f"{root_line} {format_metadata(root_metadata)}"
+    return chain([root_line], tree.iter_lines(config, logger))
@@ -0,0 +1,405 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Structural diff between two scans.
+
+Each side is a saved scan in the text, JSON or NDJSON format, or a live
+directory that is scanned while diffing. Both are read as streams of nodes in
+the scanner's order: pre-order, with directories before files and names
+compared case-insensitively. Comparing the path components of two nodes in
+that order tells which comes first, so the diff is a single merge over both
+streams that keeps only the path of the current node per side in memory.
+
+A node present on one side only starts an added or removed subtree, which
+takes in all nodes below it. While a subtree is consumed, a hash of its
+structure is built, so a removed and an added directory with the same name
+and contents are reported as one move. Only the changed subtrees are kept
+until the end, and unchanged subtrees are never expanded.
+
+Saved text trees are read like the scanner renders them: the .gitignore line
+shown first in every directory that has one is dropped, because the file
+itself is listed again among the other files, and entries left out by
+--max-entries-per-dir cannot be compared. Ignored files, which the text
+format does not show, are skipped on the other sides as well.
+"""
+
+# tree_diff.py
+
+import hashlib
+import logging
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from .directory_scanner import GITIGNORE_FILENAME, PREFIX_CONTINUED, iter_nodes
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_MOVED = "moved"
+CHANGE_MARKERS = {CHANGE_ADDED: "+", CHANGE_REMOVED: "-", CHANGE_MOVED: ">"}
+
+CONNECTOR_HEADS = "├└"
+CONNECTOR_TAIL = "── "
+UNIT = len(PREFIX_CONTINUED)
+OMITTED_START = "… ("
+OMITTED_MARKER = re.compile(r"… \(\d+ more\)$")
+FILE_ANNOTATION = re.compile(
+    r" \[(?:\d+(?:\.\d)? [KMGT]?B|\d{4}-\d\d-\d\d \d\d:\d\d|\d+ lines?)"
+    r"(?:, (?:\d+(?:\.\d)? [KMGT]?B|\d{4}-\d\d-\d\d \d\d:\d\d|\d+ lines?))*\]$"
+)
+RECORD_ROOT = "."
+RECORD_DIRECTORY = "directory"
+RECORD_FILE = "file"
+
+
+class DiffNode(NamedTuple):
+    """
+    A node of one side of a diff.
+
+    The key is a string that orders nodes like the scanner. Every path
+    component adds "0" for a directory or "1" for a file, the lowercase name,
+    the name itself if it differs from that, and a NUL character, which sorts
+    before every character of a name; the key of a directory is therefore a
+    prefix of the keys of everything below it.
+    """
+
+    key: str
+    path: str
+    is_dir: bool
+
+
+class SubtreeChange(NamedTuple):
+    """
+    A subtree found on one side only, or moved between the sides.
+    """
+
+    kind: str
+    path: str
+    is_dir: bool
+    entries: int
+    digest: bytes
+    moved_to: Optional[str] = None
+
+
+def component_key(name: str, is_dir: bool) -> str:
+    """
+    Returns:
+        str: The part of a node key contributed by one path component.
+    """
+    lower = name.lower()
+    if lower == name:
+        return f"{0 if is_dir else 1}{lower}\0"
+    return f"{0 if is_dir else 1}{lower}\1{name}\0"
+
+
+def path_key(path: str, is_dir: bool) -> str:
+    """
+    Builds the key of a relative path whose parents are all directories.
+
+    Args:
+        path (str): The slash-separated path relative to the scan root.
+        is_dir (bool): Whether the path itself is a directory.
+
+    Returns:
+        str: The key, as stored in DiffNode.
+    """
+    *parents, name = path.split("/")
+    return "".join(component_key(parent, True) for parent in parents) + (
+        component_key(name, is_dir)
+    )
+
+
+def iter_text_nodes(lines: Iterable[str]) -> Iterator[DiffNode]:
+    """
+    Reads the nodes of a tree saved in the text format.
+
+    Args:
+        lines (Iterable[str]): The lines of the file, starting with the root.
+
+    Yields:
+        DiffNode: The nodes below the root in scan order.
+    """
+    key_prefixes = [""]
+    path_prefixes = [""]
+    previous_depth = 0
+    tail, heads, unit, omitted = CONNECTOR_TAIL, CONNECTOR_HEADS, UNIT, OMITTED_START
+    for line in lines:
+        position = line.find(tail) - 1
+        if position < 0 or position % unit or line[position] not in heads:
+            continue
+        depth = position // unit + 1
+        open_depth = len(key_prefixes)
+        if depth > open_depth:
+            continue
+        first_child = depth > previous_depth
+        previous_depth = depth
+        text = line[position + unit :].rstrip("\r\n")
+        if text.startswith(omitted) and OMITTED_MARKER.match(text):
+            continue
+
+        separator = text.find("/")
+        if separator >= 0:
+            is_dir = True
+            name = text[:separator]
+        else:
+            is_dir = False
+            name = text
+            if name.endswith("]"):
+                name = FILE_ANNOTATION.sub("", name)
+            if first_child and name == GITIGNORE_FILENAME:
+                continue
+
+        if depth < open_depth:
+            del key_prefixes[depth:]
+            del path_prefixes[depth:]
+        key = key_prefixes[-1] + component_key(name, is_dir)
+        path = path_prefixes[-1] + name
+        yield DiffNode(key, path, is_dir)
+        if is_dir:
+            key_prefixes.append(key)
+            path_prefixes.append(path + "/")
+
+
+def iter_record_nodes(lines: Iterable[str]) -> Iterator[DiffNode]:
+    """
+    Reads the nodes of a tree saved in the JSON or NDJSON format.
+
+    Both formats hold one record per line, so the file is read line by line.
+
+    Args:
+        lines (Iterable[str]): The lines of the file.
+
+    Yields:
+        DiffNode: The shown nodes below the root in scan order.
+    """
+    import json
+
+    decode = json.JSONDecoder().decode
+    for line in lines:
+        line = line.strip().rstrip(",")
+        if not line.startswith("{"):
+            continue
+        record = decode(line)
+        path = record["path"]
+        is_dir = record["type"] == RECORD_DIRECTORY
+        if path == RECORD_ROOT or record["type"] not in (RECORD_DIRECTORY, RECORD_FILE):
+            continue
+        if record.get("ignored") and not is_dir:
+            continue
+        yield DiffNode(path_key(path, is_dir), path, is_dir)
+
+
+def iter_scan_nodes(
+    directory: Path, config, logger: logging.Logger
+) -> Iterator[DiffNode]:
+    """
+    Scans a live directory.
+
+    Args:
+        directory (Path): The directory to scan.
+        config: The configuration object that holds ignore rules and limits.
+        logger (logging.Logger): Logger instance for logging.
+
+    Yields:
+        DiffNode: The shown nodes below the directory in scan order.
+    """
+    for node in iter_nodes(directory, config, logger):
+        if node.omitted or (node.ignored and not node.is_dir):
+            continue
+        yield DiffNode(
+            path_key(node.relative_path, node.is_dir), node.relative_path, node.is_dir
+        )
+
+
+def iter_source_nodes(source, config, logger: logging.Logger) -> Iterator[DiffNode]:
+    """
+    Reads one side of a diff from a directory or a saved scan.
+
+    The format of a saved scan is recognized by its first line.
+
+    Args:
+        source: A directory or a file written by Skryper.
+        config: The configuration used to scan a directory.
+        logger (logging.Logger): Logger instance for logging.
+
+    Yields:
+        DiffNode: The nodes below the root in scan order.
+    """
+    source = Path(source)
+    if source.is_dir():
+        yield from iter_scan_nodes(source, config, logger)
+        return
+    with source.open("r", encoding="utf-8") as file:
+        first_line = file.readline()
+        if first_line.lstrip().startswith(("[", "{")):
+            yield from iter_record_nodes(chain_first(first_line, file))
+        else:
+            yield from iter_text_nodes(file)
+
+
+def chain_first(first: str, rest: Iterable[str]) -> Iterator[str]:
+    """
+    Yields a line that was already read, then the remaining lines.
+    """
+    yield first
+    yield from rest
+
+
+def diff_nodes(
+    old: Iterable[DiffNode], new: Iterable[DiffNode]
+) -> Tuple[List[SubtreeChange], int]:
+    """
+    Merges two node streams into the subtrees that differ.
+
+    Args:
+        old (Iterable[DiffNode]): The nodes of the old tree in scan order.
+        new (Iterable[DiffNode]): The nodes of the new tree in scan order.
+
+    Returns:
+        Tuple[List[SubtreeChange], int]: The changed subtrees in scan order,
+        with moved directories reported once at their old place, and the
+        number of nodes found on both sides.
+    """
+    old = iter(old)
+    new = iter(new)
+    old_node = next(old, None)
+    new_node = next(new, None)
+    changes: List[SubtreeChange] = []
+    unchanged = 0
+    current = None
+
+    def close() -> None:
+        kind, root, entries, digest = current
+        changes.append(
+            SubtreeChange(kind, root.path, root.is_dir, entries, digest.digest())
+        )
+
+    while old_node is not None or new_node is not None:
+        if new_node is None or (old_node is not None and old_node.key < new_node.key):
+            kind, node = CHANGE_REMOVED, old_node
+            old_node = next(old, None)
+        elif old_node is None or new_node.key < old_node.key:
+            kind, node = CHANGE_ADDED, new_node
+            new_node = next(new, None)
+        else:
+            unchanged += 1
+            old_node = next(old, None)
+            new_node = next(new, None)
+            continue
+
+        if current is not None:
+            root = current[1]
+            if current[0] == kind and node.key.startswith(root.key):
+                current[2] += 1
+                relative_path = node.path[len(root.path) :]
+                current[3].update(f"{relative_path}|{node.is_dir:d}\n".encode())
+                continue
+            close()
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{node.path.rpartition('/')[2]}|{node.is_dir:d}\n".encode())
+        current = [kind, node, 1, digest]
+    if current is not None:
+        close()
+    return pair_moves(changes), unchanged
+
+
+def pair_moves(changes: List[SubtreeChange]) -> List[SubtreeChange]:
+    """
+    Reports removed and added directories with equal contents as moves.
+
+    Args:
+        changes (List[SubtreeChange]): The added and removed subtrees.
+
+    Returns:
+        List[SubtreeChange]: The changes with every pair replaced by one
+        move at the position of the removed directory.
+    """
+    removed: Dict[bytes, deque] = {}
+    for index, change in enumerate(changes):
+        if change.kind == CHANGE_REMOVED and change.is_dir:
+            removed.setdefault(change.digest, deque()).append(index)
+
+    moved_to: Dict[int, str] = {}
+    paired = set()
+    for index, change in enumerate(changes):
+        if change.kind != CHANGE_ADDED or not change.is_dir:
+            continue
+        candidates = removed.get(change.digest)
+        if candidates:
+            moved_to[candidates.popleft()] = change.path
+            paired.add(index)
+
+    return [
+        (
+            change._replace(kind=CHANGE_MOVED, moved_to=moved_to[index])
+            if index in moved_to
+            else change
+        )
+        for index, change in enumerate(changes)
+        if index not in paired
+    ]
+
+
+def render_diff(
+    changes: Iterable[SubtreeChange],
+    unchanged: int,
+    old_label: str,
+    new_label: str,
+) -> Iterator[str]:
+    """
+    Renders the changes as an indented tree of their paths.
+
+    Directories leading to a change are shown once as context; unchanged
+    subtrees are left out.
+
+    Args:
+        changes (Iterable[SubtreeChange]): The changes in scan order.
+        unchanged (int): The number of nodes found on both sides.
+        old_label (str): The name shown for the old tree.
+        new_label (str): The name shown for the new tree.
+
+    Yields:
+        str: The lines of the report, without line terminators.
+    """
+    yield f"--- {old_label}"
+    yield f"+++ {new_label}"
+    shown: List[str] = []
+    counts = {CHANGE_ADDED: 0, CHANGE_REMOVED: 0, CHANGE_MOVED: 0}
+    for change in changes:
+        counts[change.kind] += 1
+        *parents, name = change.path.split("/")
+        common = 0
+        while (
+            common < len(parents)
+            and common < len(shown)
+            and parents[common] == shown[common]
+        ):
+            common += 1
+        del shown[common:]
+        for depth in range(common, len(parents)):
+            yield f"  {'  ' * depth}{parents[depth]}/"
+            shown.append(parents[depth])
+
+        line = f"{CHANGE_MARKERS[change.kind]} {'  ' * len(parents)}{name}"
+        if change.is_dir:
+            line += "/"
+        if change.kind == CHANGE_MOVED:
+            line += f" -> {change.moved_to}/"
+        if change.is_dir:
+            below = change.entries - 1
+            noun = "entry" if below == 1 else "entries"
+            line += f" ({below} {noun})"
+        yield line
+
+    yield (
+        f"{counts[CHANGE_ADDED]} added, {counts[CHANGE_REMOVED]} removed, "
+        f"{counts[CHANGE_MOVED]} moved, {unchanged} unchanged"
+    )
@@ -0,0 +1,419 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Compact in-memory model of a scanned tree.
+
+The tree is stored in pre-order as parallel arrays instead of one object per
+entry: an index into a table of distinct names, the index of the parent, the
+index just past the node's subtree, and a byte of flags. Names are stored
+once no matter how often they occur, so a node costs 13 bytes plus its share
+of the name table. Paths, depths and the position among siblings are derived
+while walking and never stored.
+
+The model replays the scan as TreeNode objects, created one at a time, so
+the text and machine-readable renderers work on it unchanged. If file
+metadata was requested, it is gathered while the tree is built and rolled up
+into the directories once the scan is complete.
+"""
+
+# tree_model.py
+
+import logging
+import os
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+from .config import SOURCE_GIT_INDEX
+from .directory_scanner import (
+    ScanEntry,
+    TreeNode,
+    read_root,
+    render_lines,
+    walk_listing,
+)
+from .file_metadata import (
+    DEFAULT_LINE_WORKERS,
+    PENDING_PER_WORKER,
+    EntryMetadata,
+    MetadataColumns,
+    wants_metadata,
+)
+from .git_index import iter_index_nodes
+from .ignored_summary import IgnoredSummary
+from .output_formats import iter_format_lines
+from .scan_cache import CachedEntry
+
+FLAG_DIRECTORY = 1
+FLAG_IGNORED = 2
+FLAG_GITIGNORE = 4
+FLAG_TRUNCATED = 8
+
+ROOT_INDEX = 0
+
+
+class CompactTree:
+    """
+    A scanned tree stored as parallel arrays in pre-order.
+
+    Index 0 is the scanned directory itself. The subtree of a node spans the
+    indices from the node up to, but excluding, its end index.
+    """
+
+    __slots__ = (
+        "root_path",
+        "names",
+        "name_ids",
+        "parents",
+        "ends",
+        "flags",
+        "summaries",
+        "omitted",
+        "metadata",
+        "_name_table",
+    )
+
+    def __init__(self, root_path: str, root_name: str, has_gitignore: bool = False):
+        """
+        Creates a tree holding only its root.
+
+        Args:
+            root_path (str): Filesystem path of the scanned directory.
+            root_name (str): Name of the scanned directory.
+            has_gitignore (bool): Whether the scanned directory holds a .gitignore.
+        """
+        self.root_path = root_path
+        self.names: List[str] = []
+        self.name_ids = array("I")
+        self.parents = array("i")
+        self.ends = array("I")
+        self.flags = array("B")
+        self.summaries: Dict[int, IgnoredSummary] = {}
+        self.omitted: Dict[int, int] = {}
+        self.metadata: Optional[MetadataColumns] = None
+        self._name_table: Dict[str, int] = {}
+        root_flags = FLAG_DIRECTORY | (FLAG_GITIGNORE if has_gitignore else 0)
+        self.append(root_name, -1, root_flags)
+        self.ends[ROOT_INDEX] = 1
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def append(self, name: str, parent: int, flags: int) -> int:
+        """
+        Adds a node after all existing ones.
+
+        The end index of the new node is left at 0 until close() is called.
+
+        Args:
+            name (str): Name of the entry.
+            parent (int): Index of the enclosing directory.
+            flags (int): Combination of the FLAG_* values.
+
+        Returns:
+            int: The index of the new node.
+        """
+        name_id = self._name_table.get(name)
+        if name_id is None:
+            name_id = self._name_table[name] = len(self.names)
+            self.names.append(name)
+        self.name_ids.append(name_id)
+        self.parents.append(parent)
+        self.ends.append(0)
+        self.flags.append(flags)
+        return len(self.flags) - 1
+
+    def close(self, index: int) -> None:
+        """
+        Marks the end of a directory's subtree at the current size.
+
+        Args:
+            index (int): The index of the directory.
+        """
+        self.ends[index] = len(self.flags)
+
+    @classmethod
+    def from_nodes(
+        cls,
+        nodes: Iterable[TreeNode],
+        root_path: str,
+        root_name: str,
+        has_gitignore: bool = False,
+    ) -> "CompactTree":
+        """
+        Builds the model from the nodes of a scan.
+
+        Args:
+            nodes (Iterable[TreeNode]): The nodes in walking order.
+            root_path (str): Filesystem path of the scanned directory.
+            root_name (str): Name of the scanned directory.
+            has_gitignore (bool): Whether the scanned directory holds a .gitignore.
+
+        Returns:
+            CompactTree: The model of the scanned tree.
+        """
+        tree = cls(root_path, root_name, has_gitignore)
+        open_directories = [ROOT_INDEX]
+        for node in nodes:
+            while len(open_directories) > node.depth:
+                tree.close(open_directories.pop())
+            parent = open_directories[-1]
+
+            if node.omitted:
+                index = tree.append("", parent, FLAG_TRUNCATED)
+                tree.omitted[index] = node.omitted
+                tree.close(index)
+                continue
+
+            flags = (
+                (FLAG_DIRECTORY if node.is_dir else 0)
+                | (FLAG_IGNORED if node.ignored else 0)
+                | (FLAG_GITIGNORE if node.has_gitignore else 0)
+            )
+            index = tree.append(node.item.entry.name, parent, flags)
+            if node.summary is not None:
+                tree.summaries[index] = node.summary
+            if node.is_dir and not node.ignored:
+                open_directories.append(index)
+            else:
+                tree.close(index)
+
+        while open_directories:
+            tree.close(open_directories.pop())
+        return tree
+
+    def name(self, index: int) -> str:
+        """
+        Returns:
+            str: The name of the node, or "" for a truncation marker.
+        """
+        return self.names[self.name_ids[index]]
+
+    def is_dir(self, index: int) -> bool:
+        """
+        Returns:
+            bool: Whether the node is a directory.
+        """
+        return bool(self.flags[index] & FLAG_DIRECTORY)
+
+    def ignored(self, index: int) -> bool:
+        """
+        Returns:
+            bool: Whether the node is ignored.
+        """
+        return bool(self.flags[index] & FLAG_IGNORED)
+
+    def relative_path(self, index: int) -> str:
+        """
+        Builds the path of a node relative to the scan root.
+
+        Args:
+            index (int): The index of the node.
+
+        Returns:
+            str: The relative path; "" for the root. A truncation marker has
+            the path of its directory.
+        """
+        if self.flags[index] & FLAG_TRUNCATED:
+            index = self.parents[index]
+        parts = []
+        while index > ROOT_INDEX:
+            parts.append(self.name(index))
+            index = self.parents[index]
+        return "/".join(reversed(parts))
+
+    def children(self, index: int) -> Iterator[int]:
+        """
+        Yields the indices of a node's direct children in walking order.
+
+        Args:
+            index (int): The index of the node.
+
+        Yields:
+            int: The child indices.
+        """
+        child = index + 1
+        end = self.ends[index]
+        while child < end:
+            yield child
+            child = self.ends[child]
+
+    def find(self, relative_path: str) -> Optional[int]:
+        """
+        Looks up a node by its path relative to the scan root.
+
+        Args:
+            relative_path (str): Slash-separated path; "" for the root.
+
+        Returns:
+            Optional[int]: The index of the node, or None if it is not in the tree.
+        """
+        index = ROOT_INDEX
+        for part in filter(None, relative_path.split("/")):
+            for child in self.children(index):
+                if not self.flags[child] & FLAG_TRUNCATED and self.name(child) == part:
+                    index = child
+                    break
+            else:
+                return None
+        return index
+
+    def iter_nodes(self) -> Iterator[TreeNode]:
+        """
+        Replays the scan, yielding the same nodes as the walk that built it.
+
+        Only the nodes along the current path are alive at any time.
+
+        Yields:
+            TreeNode: The nodes below the root in walking order.
+        """
+        names = self.names
+        name_ids = self.name_ids
+        ends = self.ends
+        flags = self.flags
+        root_path = self.root_path
+        metadata = self.metadata
+        open_ends = [ends[ROOT_INDEX]]
+        open_paths = [""]
+
+        for index in range(1, len(flags)):
+            while index >= open_ends[-1]:
+                open_ends.pop()
+                open_paths.pop()
+            depth = len(open_ends)
+            is_last = ends[index] == open_ends[-1]
+            node_flags = flags[index]
+
+            if node_flags & FLAG_TRUNCATED:
+                item = ScanEntry(None, open_paths[-1][:-1], False, False)
+                yield TreeNode(item, depth, is_last, False, omitted=self.omitted[index])
+                continue
+
+            name = names[name_ids[index]]
+            relative_path = open_paths[-1] + name
+            is_dir = bool(node_flags & FLAG_DIRECTORY)
+            entry = CachedEntry(
+                name, os.path.join(root_path, relative_path), is_dir, not is_dir
+            )
+            item = ScanEntry(
+                entry, relative_path, is_dir, bool(node_flags & FLAG_IGNORED)
+            )
+            yield TreeNode(
+                item,
+                depth,
+                is_last,
+                bool(node_flags & FLAG_GITIGNORE),
+                self.summaries.get(index),
+                metadata=None if metadata is None else metadata.get(index),
+            )
+            if ends[index] > index + 1:
+                open_ends.append(ends[index])
+                open_paths.append(relative_path + "/")
+
+    def root_metadata(self) -> Optional[EntryMetadata]:
+        """
+        Returns:
+            Optional[EntryMetadata]: The totals of the whole tree, or None if
+            no metadata was gathered.
+        """
+        if self.metadata is None:
+            return None
+        return self.metadata.get(ROOT_INDEX)
+
+    def iter_lines(self, config, logger: logging.Logger) -> Iterator[str]:
+        """
+        Renders the tree as the box-drawing text tree, without the root line.
+
+        Args:
+            config: The configuration object that holds the logging switches.
+            logger (logging.Logger): Logger instance for logging.
+
+        Returns:
+            Iterator[str]: The rendered lines, without line terminators.
+        """
+        return render_lines(
+            self.iter_nodes(),
+            config,
+            logger,
+            has_gitignore=bool(self.flags[ROOT_INDEX] & FLAG_GITIGNORE),
+        )
+
+    def iter_format_lines(self, output_format: str) -> Iterator[str]:
+        """
+        Renders the tree in one of the machine-readable formats.
+
+        Args:
+            output_format (str): FORMAT_JSON or FORMAT_NDJSON.
+
+        Returns:
+            Iterator[str]: The rendered lines, without line terminators.
+        """
+        return iter_format_lines(output_format, self.iter_nodes(), self.root_metadata())
+
+
+def build_tree(directory: Path, config, logger: logging.Logger) -> CompactTree:
+    """
+    Scans a directory into a compact tree.
+
+    The tree is read from the filesystem or, with config.source set to
+    SOURCE_GIT_INDEX, from the git index of the checkout.
+
+    With any of the metadata switches of the config set, the metadata of
+    the shown files is gathered during the scan, with line counts read on a
+    thread pool of config.workers threads, and rolled up into the directories.
+
+    Args:
+        directory (Path): The directory to scan.
+        config: The configuration object that holds ignore rules and limits.
+        logger (logging.Logger): Logger instance for logging.
+
+    Returns:
+        CompactTree: The scanned tree; only the root if it could not be read.
+    """
+    directory = Path(directory)
+    if config.source == SOURCE_GIT_INDEX:
+        has_gitignore, nodes = iter_index_nodes(directory, config, logger)
+    else:
+        listing = read_root(directory, config, logger)
+        if listing is None:
+            return CompactTree(str(directory), directory.name)
+        has_gitignore = listing.has_gitignore
+        nodes = walk_listing(listing, config, logger)
+
+    if not wants_metadata(config):
+        return CompactTree.from_nodes(
+            nodes, str(directory), directory.name, has_gitignore
+        )
+
+    columns = MetadataColumns(
+        config.with_size,
+        config.with_mtime,
+        config.with_lines,
+        os.stat(directory).st_mtime_ns,
+        config.max_depth,
+    )
+    workers = config.workers if config.workers > 1 else DEFAULT_LINE_WORKERS
+    pool = nullcontext()
+    if config.with_lines:
+        pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="skryper-lines"
+        )
+    with pool as executor:
+        tree = CompactTree.from_nodes(
+            columns.record(nodes, logger, executor, workers * PENDING_PER_WORKER),
+            str(directory),
+            directory.name,
+            has_gitignore,
+        )
+    columns.roll_up(tree.parents)
+    tree.metadata = columns
+    return tree
@@ -0,0 +1,339 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Watch mode: keeps a scanned tree in memory and updates it incrementally.
+
+Every listed directory is remembered together with the stat results of the
+directory and of its .gitignore. Polling compares these with fresh stat
+calls, which costs two stat calls per directory and no listing. Only
+directories whose entries changed are listed again. If a .gitignore changed,
+the directory and everything below it is read again, because the matchers of
+the whole subtree depend on it.
+
+The rendered lines of every directory are cached together with the prefix
+they were rendered with, so after a change only the changed directories and
+their ancestors are rendered again.
+"""
+
+# watch.py
+
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from .config import DEFAULT_INTERVAL
+from .directory_scanner import (
+    GITIGNORE_FILENAME,
+    GITIGNORE_LINE,
+    PREFIX_CONTINUED,
+    PREFIX_LAST,
+    DirectoryListing,
+    MatcherStack,
+    TreeNode,
+    can_descend,
+    get_base_stack,
+    omitted_node,
+    read_directory,
+    render_node,
+)
+
+
+def stat_key(path) -> Optional[Tuple[int, int, int]]:
+    """
+    Returns the parts of a stat result that change when a path is modified.
+
+    Args:
+        path: The path to check.
+
+    Returns:
+        Optional[Tuple[int, int, int]]: Modification time, inode and size, or
+        None if the path does not exist.
+    """
+    try:
+        status = os.stat(path)
+    except OSError:
+        return None
+    return status.st_mtime_ns, status.st_ino, status.st_size
+
+
+def invalidate_ancestors(directory: "WatchedDirectory") -> None:
+    """
+    Drops the cached lines of all directories containing a changed directory.
+
+    Args:
+        directory (WatchedDirectory): The changed directory.
+    """
+    ancestor = directory.parent
+    while ancestor is not None and ancestor.block is not None:
+        ancestor.block = None
+        ancestor = ancestor.parent
+
+
+class WatchedDirectory:
+    """
+    A directory of the watched tree with its listing and rendered lines.
+    """
+
+    __slots__ = (
+        "path",
+        "parent",
+        "relative_dir",
+        "parent_stack",
+        "depth",
+        "status",
+        "gitignore_status",
+        "listing",
+        "children",
+        "block",
+        "block_prefix",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        parent: Optional["WatchedDirectory"],
+        relative_dir: str,
+        parent_stack: MatcherStack,
+        depth: int,
+    ):
+        self.path = path
+        self.parent = parent
+        self.relative_dir = relative_dir
+        self.parent_stack = parent_stack
+        self.depth = depth
+        self.status = None
+        self.gitignore_status = None
+        self.listing: Optional[DirectoryListing] = None
+        self.children: Dict[str, "WatchedDirectory"] = {}
+        self.block: Optional[List[str]] = None
+        self.block_prefix: Optional[str] = None
+
+
+class TreeWatcher:
+    """
+    Incrementally maintained scan of one root directory.
+    """
+
+    def __init__(self, root, config, logger: logging.Logger):
+        """
+        Reads the whole tree once.
+
+        Args:
+            root: The directory to watch.
+            config: The configuration object that holds ignore rules and limits.
+            logger (logging.Logger): Logger instance for logging.
+        """
+        self.config = config
+        self.logger = logger
+        self.root = WatchedDirectory(str(root), None, "", get_base_stack(config), 1)
+        self.relisted = 0
+        self.load(self.root, keep_children=False)
+
+    def load(self, directory: WatchedDirectory, keep_children: bool) -> None:
+        """
+        Lists a directory and brings its subdirectories in line with it.
+
+        A directory that is removed before or while it is listed keeps no
+        entries; the listing of its parent drops it on the next poll.
+
+        Args:
+            directory (WatchedDirectory): The directory to list.
+            keep_children (bool): Whether subdirectories that are still present
+                keep their state. If False, they are read again as well.
+        """
+        pending = [(directory, keep_children)]
+        while pending:
+            current, keep = pending.pop()
+            self.relisted += 1
+            current.status = stat_key(current.path)
+            current.gitignore_status = stat_key(
+                os.path.join(current.path, GITIGNORE_FILENAME)
+            )
+            current.block = None
+            current.listing = None
+            if current.status is not None:
+                try:
+                    current.listing = read_directory(
+                        current.path,
+                        current.relative_dir,
+                        current.parent_stack,
+                        self.config,
+                        self.logger,
+                    )
+                except OSError as error:
+                    self.logger.info(
+                        "'%s' changed while listing: %s", current.path, error
+                    )
+
+            previous = current.children if keep else {}
+            current.children = {}
+            if current.listing is None or not can_descend(current.depth, self.config):
+                continue
+            for item in current.listing.entries:
+                if not item.is_dir or item.ignored:
+                    continue
+                child = previous.get(item.entry.name)
+                if child is None:
+                    child = WatchedDirectory(
+                        item.entry.path,
+                        current,
+                        item.relative_path + "/",
+                        current.listing.matcher_stack,
+                        current.depth + 1,
+                    )
+                    pending.append((child, False))
+                current.children[item.entry.name] = child
+
+    def poll(self) -> bool:
+        """
+        Checks every known directory for changes and updates the tree.
+
+        Returns:
+            bool: True if any directory was listed again.
+        """
+        changed = False
+        pending = [self.root]
+        while pending:
+            directory = pending.pop()
+            gitignore_status = stat_key(
+                os.path.join(directory.path, GITIGNORE_FILENAME)
+            )
+            if gitignore_status != directory.gitignore_status:
+                self.logger.info("Reloading subtree of '%s'.", directory.path)
+                self.load(directory, keep_children=False)
+                invalidate_ancestors(directory)
+                changed = True
+                continue
+
+            if stat_key(directory.path) != directory.status:
+                self.logger.info("Relisting '%s'.", directory.path)
+                self.load(directory, keep_children=True)
+                invalidate_ancestors(directory)
+                changed = True
+
+            pending.extend(directory.children.values())
+        return changed
+
+    def render(self) -> List[str]:
+        """
+        Renders the tree below the root, reusing unchanged directories.
+
+        Returns:
+            List[str]: The lines of the text tree, without the root line.
+        """
+        return self.render_directory(self.root, "")
+
+    def render_directory(self, root: WatchedDirectory, root_prefix: str) -> List[str]:
+        """
+        Renders a directory and everything below it.
+
+        The traversal keeps an explicit stack, like the scanner, and stops at
+        every directory whose cached lines are still valid. Lines are rendered
+        by render_node, like those of a scan.
+
+        Args:
+            root (WatchedDirectory): The directory to render.
+            root_prefix (str): The prefix of the directory's lines.
+
+        Returns:
+            List[str]: The rendered lines.
+        """
+        if root.block is not None and root.block_prefix == root_prefix:
+            return root.block
+
+        stack = [(root, root_prefix, [], 0)]
+        while stack:
+            directory, prefix, lines, index = stack.pop()
+            listing = directory.listing
+            if listing is None:
+                finished = lines
+            else:
+                if index == 0 and listing.has_gitignore:
+                    lines.append(prefix + GITIGNORE_LINE)
+                finished = None
+                entries = listing.entries
+                while index < len(entries):
+                    item = entries[index]
+                    index += 1
+                    is_last = index == len(entries) and not listing.omitted
+                    line = render_node(TreeNode(item, 1, is_last, False), prefix, None)
+                    if line is not None:
+                        lines.append(line)
+                    if not item.is_dir or item.ignored:
+                        continue
+                    child = directory.children.get(item.entry.name)
+                    if child is None:
+                        continue
+                    child_prefix = prefix + (
+                        PREFIX_LAST if is_last else PREFIX_CONTINUED
+                    )
+                    if child.block is not None and child.block_prefix == child_prefix:
+                        lines.extend(child.block)
+                        continue
+                    stack.append((directory, prefix, lines, index))
+                    stack.append((child, child_prefix, [], 0))
+                    break
+                else:
+                    if listing.omitted:
+                        lines.append(
+                            render_node(omitted_node(listing, 1), prefix, None)
+                        )
+                    finished = lines
+
+            if finished is None:
+                continue
+            directory.block = finished
+            directory.block_prefix = prefix
+            if stack:
+                stack[-1][2].extend(finished)
+        return root.block
+
+
+def watch_tree(
+    root,
+    config,
+    logger: logging.Logger,
+    publish: Callable[[List[str]], None],
+    interval: float = DEFAULT_INTERVAL,
+    keep_running: Callable[[], bool] = lambda: True,
+) -> TreeWatcher:
+    """
+    Scans a tree, publishes it and republishes it whenever it changes.
+
+    Args:
+        root: The directory to watch.
+        config: The configuration object that holds ignore rules and limits.
+        logger (logging.Logger): Logger instance for logging.
+        publish (Callable[[List[str]], None]): Receives the rendered lines
+            after the first scan and after every change of the output.
+        interval (float): Seconds between two polls.
+        keep_running (Callable[[], bool]): Checked before every poll; the
+            watch ends when it returns False.
+
+    Returns:
+        TreeWatcher: The watcher holding the final state of the tree.
+    """
+    watcher = TreeWatcher(root, config, logger)
+    lines = watcher.render()
+    publish(lines)
+
+    while keep_running():
+        time.sleep(interval)
+        started = time.perf_counter()
+        if not watcher.poll():
+            continue
+        updated = watcher.render()
+        if updated == lines:
+            continue
+        lines = updated
+        publish(lines)
+        logger.info("Tree updated in %.1f ms.", (time.perf_counter() - started) * 1000)
+    return watcher
@@ -0,0 +1,122 @@
+# -----------------------------------------------------------------------------
+# Skryper - A tool to scan, analyze, and organize your project file structures
+#
+# Copyright (c) 2024 Jonas Zeihe
+# Licensed under the MIT License. See LICENSE file in the project root for details.
+#
+# Project URL: https://github.com/jonaszeihe/skryper
+# Contact: JonasZeihe@gmail.com
+# -----------------------------------------------------------------------------
+
+"""
+Unit tests for the .gitignore matching helpers.
+"""
+
+# test_gitignore_handler.py
+
+import os
+from app.gitignore_handler import (
+    GitignoreMatcher,
+    LRUCache,
+    MatcherStack,
+    file_cache,
+    is_ignored,
+    load_gitignore_matcher,
+)
+
+
+def ignored(matcher, path, is_dir=False):
+    """
+    Returns True if the matcher decides to ignore the path.
+    """
+    rule = matcher.match(path, is_dir)
+    return rule is not None and not rule.negated
+
+
+def test_matcher_follows_gitignore_semantics():
+    """
+    Covers basename, anchored, directory-only, double-star and negated patterns.
+    """
+    matcher = GitignoreMatcher(
+        ["*.log", "!keep.log", "/build", "cache/", "docs/**/*.tmp", "*.py[cod]"]
+    )
+
+    assert ignored(matcher, "debug.log")
+    assert ignored(matcher, "src/debug.log")
+    assert not ignored(matcher, "src/keep.log")
+    assert ignored(matcher, "build", is_dir=True)
+    assert not ignored(matcher, "src/build", is_dir=True)
+    assert ignored(matcher, "src/cache", is_dir=True)
+    assert not ignored(matcher, "src/cache")
+    assert ignored(matcher, "docs/a/b/x.tmp")
+    assert ignored(matcher, "docs/x.tmp")
+    assert not ignored(matcher, "src/x.tmp")
+    assert ignored(matcher, "main.pyc")
+    assert not ignored(matcher, "main.py")
+
+
+def test_matcher_stack_inherits_and_overrides_parent_rules():
+    """
+    Deeper .gitignore files add to and override the rules of their parents,
+    with anchored patterns resolved against their own directory.
+    """
+    root = MatcherStack().push(GitignoreMatcher(["*.log", "/out"]), "")
+    nested = root.push(GitignoreMatcher(["!trace.log", "/tmp"]), "pkg")
+
+    assert ignored(nested, "pkg/error.log")
+    assert not ignored(nested, "pkg/trace.log")
+    assert ignored(root, "trace.log")
+    assert ignored(nested, "pkg/tmp", is_dir=True)
+    assert not ignored(nested, "tmp", is_dir=True)
+    assert not ignored(nested, "pkg/out", is_dir=True)
+    assert nested.pop() is root
+
+
+def test_is_ignored_accepts_raw_patterns_and_inclusion_rules():
+    """
+    is_ignored keeps accepting plain pattern lists and honours inclusion rules.
+    """
+    assert is_ignored("debug.log", ["*.log"], set())
+    assert not is_ignored("main.py", ["*.log"], set())
+    assert not is_ignored(".github", [".*"], {".github"}, is_dir=True)
+    assert not is_ignored("docs/.github", [".*"], {".github"}, is_dir=True)
+
+
+def test_identical_gitignore_files_share_one_matcher(tmp_path):
+    """
+    Files with the same content are compiled once and reuse the matcher.
+    """
+    first = tmp_path / "first.gitignore"
+    second = tmp_path / "second.gitignore"
+    first.write_text("*.log\n# comment\n/build/\n", encoding="utf-8")
+    second.write_text("*.log\n# comment\n/build/\n", encoding="utf-8")
+
+    matcher = load_gitignore_matcher(first)
+
+    assert load_gitignore_matcher(second) is matcher
+    assert matcher.patterns == ["*.log", "/build/"]
+
+
+def test_matcher_cache_evicts_and_tracks_file_changes(tmp_path):
+    """
+    The LRU drops the least recently used entry, and a settled file is
+    reloaded when its size or modification time changes.
+    """
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    path = tmp_path / ".gitignore"
+    path.write_text("*.tmp\n", encoding="utf-8")
+    os.utime(path, ns=(10**18, 10**18))
+    first = load_gitignore_matcher(path)
+    assert file_cache.get(str(path)) is not None
+    assert load_gitignore_matcher(path) is first
+
+    path.write_text("*.bak\n", encoding="utf-8")
+    os.utime(path, ns=(15 * 10**17, 15 * 10**17))
+    assert load_gitignore_matcher(path).patterns == ["*.bak"]
@@ -17,11 +17,58 @@ and that the application behaves as expected.
 
 # test_skryper.py
 
+import asyncio
+import io
+import json
+import logging
 import os
+import shutil
+import struct
+import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import pytest
+from app.config import SOURCE_GIT_INDEX, DirectoryScannerConfig
+from app.async_scanner import scan_tree
+from app.codebase_extractor import READ_AHEAD_LIMIT, extract_codebase
+from app.directory_scanner import (
+    ScanEntry,
+    TreeNode,
+    iter_directory,
+    iter_nodes,
+    resolve_summaries,
+)
+from app.ignored_summary import IgnoredSummary
+from app.git_index import GitIndexError, parse_index
 from app.main import main
-from app.logger import setup_logger, save_logs_to_file
+from app.logger import SpooledLogBuffer, setup_logger, save_logs_to_file
+from app.output_formats import iter_format_lines
+from app.scan_cache import ScanCache
+from app.scanner import Scanner
+from app.tree_model import build_tree
+from app import watch
+from app.watch import TreeWatcher, WatchedDirectory
+
+IMPORT_BUDGET_MS = float(os.environ.get("SKRYPER_IMPORT_BUDGET_MS", "300"))
+LAZY_MODULES = (
+    "app.codebase_extractor",
+    "app.git_index",
+    "app.output_formats",
+    "app.profiling",
+    "app.scan_cache",
+    "app.tree_model",
+    "app.watch",
+    "concurrent.futures.process",
+    "ctypes",
+    "datetime",
+    "json",
+    "mmap",
+    "multiprocessing",
+    "sqlite3",
+    "tempfile",
+)
 
 
 @pytest.fixture(scope="function")
@@ -102,13 +149,18 @@ def test_logger_integration(test_environment):
     Args:
         test_environment (Path): Path to the test environment.
     """
+    threads = set(threading.enumerate())
     logger, log_stream = setup_logger()
-    logger.info("Test log entry for logger.")
+    try:
+        logger.info("Test log entry for logger.")
 
-    log_content = log_stream.getvalue()
-    assert "Test log entry for logger." in log_content
+        log_content = log_stream.getvalue()
+        assert "Test log entry for logger." in log_content
 
-    save_logs_to_file(log_stream, test_environment / "test_scan.log")
+        save_logs_to_file(log_stream, test_environment / "test_scan.log")
+    finally:
+        log_stream.close()
+    assert set(threading.enumerate()) <= threads
 
     log_files = list(test_environment.glob("*_scan.log"))
     assert log_files, "No log file was created."
@@ -117,3 +169,883 @@ def test_logger_integration(test_environment):
         log_data = log_file.read()
 
     assert "Test log entry for logger." in log_data
+
+
+def test_parallel_scan_matches_serial_scan(test_environment, monkeypatch):
+    """
+    Verifies that scanning with several worker threads yields the same tree
+    as a serial scan.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+    """
+    os.chdir(test_environment)
+    outputs = []
+    for workers in ("1", "4"):
+        output_file = test_environment.parent / f"output_{workers}.txt"
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            [
+                "main.py",
+                "--output",
+                str(output_file),
+                "--root",
+                str(test_environment),
+                "--workers",
+                workers,
+            ],
+        )
+        main()
+        outputs.append(output_file.read_text(encoding="utf-8"))
+
+    assert outputs[0] == outputs[1]
+    assert "file5.txt" in outputs[1]
+
+
+def test_structure_streams_to_stdout(test_environment, monkeypatch, capsys):
+    """
+    Verifies that '--output -' streams the tree to stdout without creating a file.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+        capsys (pytest.CaptureFixture): Pytest fixture capturing stdout.
+    """
+    monkeypatch.setattr(
+        sys, "argv", ["main.py", "--output", "-", "--root", str(test_environment)]
+    )
+    os.chdir(test_environment)
+
+    main()
+
+    output = capsys.readouterr().out
+    assert output.startswith("test_environment/\n")
+    assert "file5.txt" in output
+    assert "file6.log" not in output
+    assert not list(test_environment.glob("*_structure.txt"))
+
+
+@pytest.mark.skipif(
+    os.open not in os.supports_dir_fd, reason="needs os.open with dir_fd"
+)
+def test_deep_tree_exceeds_recursion_limit_and_path_max(tmp_path):
+    """
+    Verifies that trees deeper than Python's recursion limit, with paths
+    longer than PATH_MAX, can be scanned and extracted.
+
+    The tree is built and removed through directory file descriptors, as its
+    full paths are too long to pass to the operating system.
+
+    Args:
+        tmp_path (Path): Temporary directory provided by pytest.
+    """
+    name = "deep_directory"
+    depth = sys.getrecursionlimit() + 200
+    assert depth * (len(name) + 1) > os.pathconf(tmp_path, "PC_PATH_MAX")
+    directory_fd = os.open(tmp_path, os.O_RDONLY)
+    for _ in range(depth):
+        os.mkdir(name, dir_fd=directory_fd)
+        child_fd = os.open(name, os.O_RDONLY, dir_fd=directory_fd)
+        os.close(directory_fd)
+        directory_fd = child_fd
+    leaf_contents = {"leaf.txt": b"leaf", "large.txt": b"x" * (READ_AHEAD_LIMIT + 1)}
+    for leaf_name, content in leaf_contents.items():
+        leaf_fd = os.open(leaf_name, os.O_WRONLY | os.O_CREAT, dir_fd=directory_fd)
+        os.write(leaf_fd, content)
+        os.close(leaf_fd)
+
+    config = DirectoryScannerConfig(log_entries=False)
+    config.base_gitignore_paths = set(config.excluded_files)
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    output = io.BytesIO()
+
+    try:
+        lines = list(iter_directory(tmp_path, config, logger))
+        extracted = extract_codebase(tmp_path, output, config, logger, (".txt",))
+    finally:
+        for leaf_name in leaf_contents:
+            os.unlink(leaf_name, dir_fd=directory_fd)
+        for _ in range(depth):
+            parent_fd = os.open("..", os.O_RDONLY, dir_fd=directory_fd)
+            os.close(directory_fd)
+            directory_fd = parent_fd
+            os.rmdir(name, dir_fd=directory_fd)
+        os.close(directory_fd)
+
+    assert len(lines) == depth + 2
+    assert lines[-3] == "    " * (depth - 1) + f"└── {name}/"
+    assert lines[-1] == "    " * depth + "└── leaf.txt"
+    assert extracted == (2, 0)
+    assert b"\nleaf\n" in output.getvalue()
+    assert leaf_contents["large.txt"] in output.getvalue()
+
+
+def test_scan_cache_reuses_unchanged_directories(test_environment):
+    """
+    Verifies that a rescan with a cache reuses unchanged listings and still
+    picks up entries added to a directory.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    past = time.time() - 60
+    for directory in (test_environment, *test_environment.rglob("*")):
+        if directory.is_dir():
+            os.utime(directory, (past, past))
+
+    config = DirectoryScannerConfig()
+    config.base_gitignore_paths = set(config.excluded_files)
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    cache_path = test_environment.parent / "scan-cache.sqlite"
+
+    scans = []
+    for _ in range(2):
+        with ScanCache(cache_path) as config.scan_cache:
+            scans.append(list(iter_directory(test_environment, config, logger)))
+
+    assert scans[0] == scans[1]
+    assert config.scan_cache.hits == 3
+
+    (test_environment / "nested" / "added.txt").write_text("new")
+    with ScanCache(cache_path) as config.scan_cache:
+        lines = list(iter_directory(test_environment, config, logger))
+
+    assert any(line.endswith("added.txt") for line in lines)
+    assert config.scan_cache.misses == 1
+
+    with ScanCache(cache_path) as scan_cache:
+        assert scan_cache.lookup(test_environment / "missing") == (None, None)
+        assert scan_cache.misses == 1
+
+
+def test_spooled_log_buffer_spills_and_saves(test_environment):
+    """
+    Verifies that the log buffer keeps every record once it exceeds its
+    in-memory threshold and copies them to a log file.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    logger = logging.getLogger("SpooledLogBufferTest")
+    logger.setLevel(logging.INFO)
+    log_buffer = SpooledLogBuffer(max_size=256)
+    log_buffer.attach(logger)
+
+    try:
+        for index in range(100):
+            logger.info("Record %d", index)
+        log_path = test_environment / "spooled_scan.log"
+        save_logs_to_file(log_buffer, log_path)
+        content = log_buffer.getvalue()
+    finally:
+        log_buffer.close()
+
+    assert content.splitlines() == [f"Record {index}" for index in range(100)]
+    assert log_path.read_text(encoding="utf-8") == content
+    assert not logger.handlers
+
+
+def test_ndjson_output_describes_every_node(test_environment, monkeypatch, capsys):
+    """
+    Verifies that NDJSON output carries path, type, depth and ignored flag
+    for each node, including ignored files.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+        capsys (pytest.CaptureFixture): Pytest fixture capturing stdout.
+    """
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "main.py",
+            "--output",
+            "-",
+            "--format",
+            "ndjson",
+            "--root",
+            str(test_environment),
+        ],
+    )
+    os.chdir(test_environment)
+
+    main()
+
+    nodes = {
+        node["path"]: node
+        for node in map(json.loads, capsys.readouterr().out.splitlines())
+    }
+    assert nodes["."]["depth"] == 0
+    assert nodes["nested/subnested/file5.txt"] == {
+        "path": "nested/subnested/file5.txt",
+        "type": "file",
+        "depth": 3,
+        "ignored": False,
+    }
+    assert nodes["nested/subnested/file6.log"]["ignored"]
+    assert nodes["ignored_dir"]["type"] == "directory"
+    assert nodes["ignored_dir"]["ignored"]
+    assert "ignored_dir/file4.txt" not in nodes
+
+
+def test_ignored_directories_can_be_pruned_or_summarized(test_environment):
+    """
+    Verifies that pruning drops ignored entries with correct connectors and
+    that summaries report the content of ignored directories.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    (test_environment / ".gitignore").write_text("*.log\n/ignored_dir/\n*.exe\n*.txt\n")
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+
+    config = DirectoryScannerConfig(prune_ignored=True)
+    config.base_gitignore_paths = set(config.excluded_files)
+    pruned = list(iter_directory(test_environment, config, logger))
+
+    assert pruned == [
+        "├── .gitignore",
+        "├── nested/",
+        "│   ├── .gitignore",
+        "│   ├── subnested/",
+        "│   └── .gitignore",
+        "└── .gitignore",
+    ]
+
+    config = DirectoryScannerConfig(summarize_ignored=True)
+    config.base_gitignore_paths = set(config.excluded_files)
+    summarized = list(iter_directory(test_environment, config, logger))
+
+    size = (test_environment / "ignored_dir" / "file4.txt").stat().st_size
+    assert f"├── ignored_dir/ [ignored: 1 entry, {size} B]" in summarized
+
+
+def test_pending_summaries_let_the_walk_read_ahead():
+    """
+    Verifies that the walk keeps producing nodes while the summary of an
+    earlier ignored directory is still running, and that the order is kept.
+    """
+    summary = Future()
+    pulled = []
+
+    def walk():
+        for name in ("ignored", "next", "last"):
+            if name == "last":
+                summary.set_result(IgnoredSummary(1, 2))
+            pulled.append(name)
+            item = ScanEntry(None, name, True, name == "ignored")
+            yield TreeNode(
+                item, 1, name == "last", False, summary if name == "ignored" else None
+            )
+
+    nodes = resolve_summaries(walk())
+    first = next(nodes)
+    assert pulled == ["ignored", "next", "last"]
+    assert first.summary == IgnoredSummary(1, 2)
+    assert [node.relative_path for node in nodes] == ["next", "last"]
+
+
+def test_scan_limits_cut_off_depth_paths_and_entries(test_environment):
+    """
+    Verifies that max_depth, include_paths and max_entries_per_dir limit the
+    scan and mark truncated directories.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+
+    def scan(**limits):
+        config = DirectoryScannerConfig(**limits)
+        config.base_gitignore_paths = set(config.excluded_files)
+        return list(iter_directory(test_environment, config, logger))
+
+    assert "│   ├── subnested/" in scan(max_depth=2)
+    assert not any("file5.txt" in line for line in scan(max_depth=2))
+
+    assert scan(include_paths=("nested/subnested",)) == [
+        "├── .gitignore",
+        "└── nested/",
+        "    ├── .gitignore",
+        "    └── subnested/",
+        "        ├── file5.txt",
+    ]
+
+    truncated = scan(max_entries_per_dir=2)
+    assert truncated[:4] == [
+        "├── .gitignore",
+        "├── ignored_dir/",
+        "├── nested/",
+        "│   ├── .gitignore",
+    ]
+    assert truncated[-1] == "└── … (2 more)"
+
+
+@pytest.mark.parametrize(
+    "limit", [["--max-depth", "0"], ["--max-entries-per-dir", "-1"]]
+)
+def test_scan_limits_reject_values_without_meaning(monkeypatch, capsys, limit):
+    """
+    Verifies that a depth below 1 and a negative entry limit are rejected.
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+        capsys (pytest.CaptureFixture): Captures the usage error.
+        limit (List[str]): The rejected option and value.
+    """
+    monkeypatch.setattr(sys, "argv", ["main.py", *limit])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
+    assert limit[0] in capsys.readouterr().err
+
+
+def test_async_scan_matches_sync_scan_and_closes_early(test_environment):
+    """
+    Verifies that scan_tree yields the same nodes as the synchronous walk,
+    also for concurrent scans, and that an early close stops the scan.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    config = DirectoryScannerConfig()
+    config.base_gitignore_paths = set(config.excluded_files)
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    expected = [
+        node.relative_path for node in iter_nodes(test_environment, config, logger)
+    ]
+
+    async def collect():
+        return [
+            node.relative_path
+            async for node in scan_tree(
+                test_environment, config, logger, max_in_flight=1
+            )
+        ]
+
+    async def first_node():
+        scan = scan_tree(test_environment, config, logger)
+        async for node in scan:
+            await scan.aclose()
+            return node.relative_path
+
+    async def run_all():
+        return await asyncio.gather(collect(), collect(), first_node())
+
+    first, second, head = asyncio.run(run_all())
+
+    assert first == expected
+    assert second == expected
+    assert head == expected[0]
+
+
+def test_batch_mode_writes_one_output_per_root(test_environment, monkeypatch):
+    """
+    Verifies that several roots are scanned in a batch, each into its own
+    output file in the output directory, even if two roots share a name,
+    and that a missing root makes the batch fail.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+    """
+    other_nested = test_environment.parent / "other" / "nested"
+    other_nested.mkdir(parents=True)
+    (other_nested / "other.txt").write_text("other")
+    roots_file = test_environment.parent / "roots.txt"
+    roots_file.write_text(
+        f"{test_environment / 'nested'}\n{other_nested}\n", encoding="utf-8"
+    )
+    output_dir = test_environment.parent / "batch_output"
+    argv = [
+        "main.py",
+        "--root",
+        str(test_environment),
+        "--roots-file",
+        str(roots_file),
+        "--output",
+        str(output_dir),
+        "--processes",
+        "2",
+        "--quiet",
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    os.chdir(test_environment)
+
+    assert main() == 0
+
+    outputs = {}
+    for path in output_dir.iterdir():
+        name, _, digest = (
+            path.name.split("_", 2)[2].rpartition("_structure")[0].rpartition("_")
+        )
+        outputs.setdefault(name, []).append(path.read_text(encoding="utf-8"))
+        assert len(digest) == 8
+    assert sorted(outputs) == ["nested", "test_environment"]
+    assert "file5.txt" in outputs["test_environment"][0]
+    nested, other = sorted(outputs["nested"], key=lambda text: "other.txt" in text)
+    assert nested.startswith("nested/\n")
+    assert "ignored_file.txt" not in nested
+    assert "other.txt" in other
+
+    monkeypatch.setattr(
+        sys, "argv", argv + ["--root", str(test_environment.parent / "missing")]
+    )
+    assert main() == 1
+
+
+def test_watcher_updates_only_changed_directories(test_environment, monkeypatch):
+    """
+    Verifies that the watcher relists changed directories, reloads subtrees
+    whose .gitignore changed, survives directories that vanish and renders
+    the same tree as a full scan.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+    """
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    config = DirectoryScannerConfig()
+    config.base_gitignore_paths = set(config.excluded_files)
+
+    watcher = TreeWatcher(test_environment, config, logger)
+    assert watcher.render() == list(iter_directory(test_environment, config, logger))
+    assert not watcher.poll()
+
+    watcher.relisted = 0
+    (test_environment / "nested" / "subnested" / "file7.txt").write_text("new")
+    assert watcher.poll()
+    assert watcher.relisted == 1
+    assert "│   │   └── file7.txt" in watcher.render()
+
+    (test_environment / "nested" / ".gitignore").write_text("subnested/\n")
+    assert watcher.poll()
+    lines = watcher.render()
+    assert lines == list(iter_directory(test_environment, config, logger))
+    assert "│   ├── ignored_file.txt" in lines
+    assert not any("file7.txt" in line for line in lines)
+
+    shutil.rmtree(test_environment / "nested")
+    assert watcher.poll()
+    assert watcher.render() == list(iter_directory(test_environment, config, logger))
+
+    def vanish(directory, *args):
+        raise FileNotFoundError(directory)
+
+    monkeypatch.setattr(watch, "read_directory", vanish)
+    watched = WatchedDirectory(str(test_environment), None, "", None, 1)
+    watcher.load(watched, keep_children=False)
+    assert watched.listing is None
+
+
+def test_watch_saves_the_log_when_stopped(test_environment, monkeypatch):
+    """
+    Verifies that --watch with --logging saves the log of the session when
+    the watch is interrupted.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+    """
+
+    def interrupt(directory, config, logger, publish, interval):
+        logger.info("Watch interrupted.")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(watch, "watch_tree", interrupt)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["main.py", "--root", str(test_environment), "--watch", "--logging", "-q"],
+    )
+    main()
+
+    log_files = list(test_environment.glob("*_log.txt"))
+    assert len(log_files) == 1
+    log_text = log_files[0].read_text(encoding="utf-8")
+    assert "Watch interrupted." in log_text
+    assert "Watch stopped." in log_text
+
+
+def test_compact_tree_renders_like_the_scan(test_environment):
+    """
+    Verifies that the compact tree model renders the same text and records as
+    a direct scan and can be queried by path.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    config = DirectoryScannerConfig(max_entries_per_dir=4)
+    config.base_gitignore_paths = set(config.excluded_files)
+
+    tree = build_tree(test_environment, config, logger)
+
+    assert list(tree.iter_lines(config, logger)) == list(
+        iter_directory(test_environment, config, logger)
+    )
+    assert list(tree.iter_format_lines("ndjson")) == list(
+        iter_format_lines("ndjson", iter_nodes(test_environment, config, logger))
+    )
+
+    subnested = tree.find("nested/subnested")
+    assert tree.relative_path(subnested) == "nested/subnested"
+    assert [tree.name(child) for child in tree.children(subnested)] == [
+        "file5.txt",
+        "file6.log",
+    ]
+    assert tree.ignored(tree.find("nested/subnested/file6.log"))
+    assert tree.find("nested/missing") is None
+
+
+def test_metadata_columns_roll_up_into_directories(test_environment):
+    """
+    Verifies that file sizes and line counts are shown and that directories
+    show the totals of the files shown below them.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    (test_environment / "nested" / "subnested" / "file5.txt").write_text("a\nb\nc")
+    config = DirectoryScannerConfig(with_size=True, with_lines=True, workers=2)
+    config.base_gitignore_paths = set(config.excluded_files)
+
+    tree = build_tree(test_environment, config, logger)
+    lines = list(tree.iter_lines(config, logger))
+
+    assert "│   ├── subnested/ [5 B, 3 lines]" in lines
+    assert "│   │   ├── file5.txt [5 B, 3 lines]" in lines
+    assert "│   └── included_file.txt [29 B, 1 line]" in lines
+    assert "├── nested/ [51 B, 5 lines]" in lines
+    assert tree.root_metadata().size == 51 + 20 + 35
+    records = [json.loads(line) for line in tree.iter_format_lines("ndjson")]
+    assert records[0]["lines"] == 5 + 4 + 1
+    assert "size" not in records[-1] and records[-1]["ignored"]
+
+    config.max_depth = 1
+    lines = list(
+        build_tree(test_environment, config, logger).iter_lines(config, logger)
+    )
+    assert "├── nested/" in lines
+    assert "├── file1.txt [20 B, 1 line]" in lines
+
+    config.max_depth = None
+    config.max_entries_per_dir = 2
+    tree = build_tree(test_environment, config, logger)
+    lines = list(tree.iter_lines(config, logger))
+    assert "├── nested/" in lines
+    assert "│   ├── subnested/ [5 B, 3 lines]" in lines
+    assert tree.root_metadata() is None
+
+
+def test_extract_codebase_merges_files_that_are_not_ignored(test_environment):
+    """
+    Verifies that the extraction writes every matching file that is not
+    ignored, in walking order, and reports each file to the log stream.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    config = DirectoryScannerConfig(log_entries=False)
+    config.base_gitignore_paths = set(config.excluded_files)
+    output = io.BytesIO()
+    log = io.StringIO()
+
+    written, failed = extract_codebase(
+        test_environment, output, config, logger, (".txt",), log_file=log
+    )
+
+    content = output.getvalue().decode("utf-8")
+    headers = [line for line in content.splitlines() if line.startswith("----- ")]
+    assert (written, failed) == (3, 0)
+    assert headers == [
+        f"----- {test_environment / name} -----"
+        for name in (
+            "nested/subnested/file5.txt",
+            "nested/included_file.txt",
+            "file1.txt",
+        )
+    ]
+    assert "This is a test file.\n==============================" in content
+    assert log.getvalue().count("Processed: ") == 3
+
+
+def write_git_index(path, names, version):
+    """
+    Writes a minimal git index listing regular files.
+
+    Args:
+        path (Path): The index file to write.
+        names (List[str]): The tracked paths in index order.
+        version (int): The index version, 2 or 4.
+    """
+    data = bytearray(struct.pack(">4sII", b"DIRC", version, len(names)))
+    previous = b""
+    for name in names:
+        encoded = name.encode("utf-8")
+        entry = bytearray(62)
+        struct.pack_into(">I", entry, 24, 0o100644)
+        struct.pack_into(">H", entry, 60, min(len(encoded), 0xFFF))
+        if version == 4:
+            common = len(os.path.commonprefix([previous, encoded]))
+            entry += bytes([len(previous) - common]) + encoded[common:] + b"\0"
+        else:
+            entry += encoded + b"\0" * (8 - (62 + len(encoded)) % 8)
+        data += entry
+        previous = encoded
+    path.write_bytes(bytes(data) + bytes(20))
+
+
+def test_git_index_source_matches_pruned_scan(test_environment, monkeypatch):
+    """
+    Verifies that a tree built from the git index, in versions 2 and 4,
+    renders like a scan that hides ignored entries, that untracked files
+    can be merged in, and that empty or truncated indexes are reported.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+    """
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    tracked = [
+        ".gitignore",
+        "file1.txt",
+        "nested/.gitignore",
+        "nested/included_file.txt",
+        "nested/subnested/file5.txt",
+    ]
+    (test_environment / ".git").mkdir()
+    index_path = test_environment / ".git" / "index"
+    config = DirectoryScannerConfig(prune_ignored=True)
+    config.base_gitignore_paths = set(config.excluded_files)
+    expected = list(iter_directory(test_environment, config, logger))
+    index_config = DirectoryScannerConfig(source=SOURCE_GIT_INDEX)
+
+    for version in (2, 4):
+        write_git_index(index_path, tracked, version)
+        assert [path for path, _ in parse_index(index_path.read_bytes())] == tracked
+        tree = build_tree(test_environment, index_config, logger)
+        assert list(tree.iter_lines(index_config, logger)) == expected
+
+    (test_environment / "untracked.txt").write_text("new")
+    tree = build_tree(test_environment, index_config, logger)
+    assert tree.find("untracked.txt") is None
+    index_config.include_untracked = True
+    index_config.base_gitignore_paths = set(index_config.excluded_files)
+    tree = build_tree(test_environment, index_config, logger)
+    assert tree.find("untracked.txt") is not None
+    assert tree.find("file3.exe") is None
+
+    with pytest.raises(GitIndexError):
+        parse_index(index_path.read_bytes()[:100])
+    index_path.write_bytes(b"")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["main.py", "--root", str(test_environment), "--source", "git-index", "-q"],
+    )
+    with pytest.raises(SystemExit, match="is empty"):
+        main()
+
+
+def test_profile_reports_phases_and_slowest_directories(test_environment, monkeypatch):
+    """
+    Verifies that --profile writes a JSON report with the time and calls of
+    every phase, a histogram of directory read times and the slowest
+    directories, and that the log handlers are restored even if the scan
+    fails.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+    """
+    report_path = test_environment.parent / "profile.json"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "main.py",
+            "--output",
+            str(test_environment.parent / "output.txt"),
+            "--root",
+            str(test_environment),
+            "--profile",
+            str(report_path),
+            "--profile-top",
+            "2",
+        ],
+    )
+    os.chdir(test_environment)
+
+    main()
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    phases = report["phases"]
+    assert phases["directory_scanner.read_directory"]["calls"] == 3
+    assert phases["gitignore_handler.load_gitignore_matcher"]["calls"] == 2
+    assert phases["gitignore_handler.is_ignored"]["calls"] == 12
+    assert phases["main.scan"]["calls"] == 1
+    assert {"main.setup", "main.write", "logger.emit"} <= set(phases)
+    assert sum(report["directories"]["histogram"].values()) == 3
+    slowest = report["directories"]["slowest"]
+    assert len(slowest) == 2 and slowest[0]["ms"] >= slowest[1]["ms"]
+    assert all(
+        not hasattr(handler, "_skryper_profiled")
+        for handler in logging.getLogger("DirectoryScanner").handlers
+    )
+
+    def fail(*args):
+        raise OSError("disk vanished")
+
+    monkeypatch.setattr("app.main.scan_root", fail)
+    with pytest.raises(OSError):
+        main()
+    assert all(
+        not hasattr(handler, "_skryper_profiled")
+        for handler in logging.getLogger("DirectoryScanner").handlers
+    )
+
+
+def test_plain_scan_stays_within_import_budget(test_environment):
+    """
+    Verifies that a plain text scan to stdout stays within the import time
+    budget, measured with python -X importtime over the whole run, and leaves
+    the modules only some options need unimported.
+
+    The budget can be adjusted with SKRYPER_IMPORT_BUDGET_MS.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    source_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    run = (
+        "import sys\n"
+        "sys.stderr.write('run started\\n')\n"
+        "sys.stderr.flush()\n"
+        "from app.main import main\n"
+        "main()\n"
+        "print(' '.join(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            run,
+            "--root",
+            str(test_environment),
+            "--output",
+            "-",
+            "--quiet",
+        ],
+        cwd=source_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    started = False
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if line == "run started":
+            started = True
+        elif started and line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit() and not name.startswith("  "):
+                total_us += int(cumulative)
+    assert started and total_us
+    assert total_us / 1000 <= IMPORT_BUDGET_MS
+    output_lines = result.stdout.splitlines()
+    assert f"{test_environment.name}/" in output_lines
+    loaded = set(output_lines[-1].split())
+    assert "app.scanner" in loaded
+    assert loaded.isdisjoint(LAZY_MODULES), loaded.intersection(LAZY_MODULES)
+
+
+def test_diff_reports_added_removed_and_moved_subtrees(test_environment, monkeypatch):
+    """
+    Verifies that skryper diff compares a saved scan with a live directory,
+    reporting a moved directory once and changed subtrees as single entries.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+        monkeypatch (pytest.MonkeyPatch): Pytest utility to modify attributes during testing.
+    """
+    snapshot = test_environment.parent / "snapshot.txt"
+    report = test_environment.parent / "report.txt"
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["main.py", "-q", "--output", str(snapshot), "--root", str(test_environment)],
+    )
+    os.chdir(test_environment)
+    main()
+
+    os.rename(test_environment / "nested" / "subnested", test_environment / "subnested")
+    (test_environment / "file1.txt").unlink()
+    (test_environment / "docs" / "api").mkdir(parents=True)
+    (test_environment / "docs" / "api" / "index.md").write_text("# API")
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["main.py", "diff", str(snapshot), str(test_environment)]
+        + ["--output", str(report)],
+    )
+    assert main() == 1
+    lines = report.read_text(encoding="utf-8").splitlines()
+    assert lines[2:] == [
+        "+ docs/ (2 entries)",
+        "  nested/",
+        ">   subnested/ -> subnested/ (1 entry)",
+        "- file1.txt",
+        "1 added, 1 removed, 1 moved, 5 unchanged",
+    ]
+
+    monkeypatch.setattr(sys, "argv", ["main.py", "diff", str(snapshot), str(snapshot)])
+    assert main() == 0
+
+
+def test_scanner_runs_concurrent_scans_without_shared_state(test_environment):
+    """
+    Verifies that scanners with different configurations can scan from many
+    threads at once, that each scan returns its own lines, and that setting
+    up the logger again does not add handlers.
+
+    Args:
+        test_environment (Path): Path to the test environment.
+    """
+    logger, _ = setup_logger(logging.WARNING, capture=False)
+    handlers = list(logger.handlers)
+    assert setup_logger(logging.WARNING, capture=False)[0].handlers == handlers
+
+    full = Scanner(DirectoryScannerConfig(log_entries=False), logger)
+    pruned = Scanner(DirectoryScannerConfig(prune_ignored=True), logger)
+    expected_full = full.scan(test_environment)
+    expected_pruned = pruned.scan(test_environment)
+    assert expected_full[0] == "test_environment/"
+    assert not any("ignored_dir/" in line for line in expected_pruned)
+    assert any("ignored_dir/" in line for line in expected_full)
+
+    config = full.config
+    config.prune_ignored = True
+    assert full.scan(test_environment) == expected_full
+
+    scanners = [full, pruned] * 16
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda scanner: scanner.scan(test_environment), scanners)
+        )
+    assert results == [expected_full, expected_pruned] * 16
+
+    records = [json.loads(line) for line in full.iter_lines(test_environment, "ndjson")]
+    nodes = list(full.iter_nodes(test_environment))
+    assert [record["path"] for record in records[1:]] == [
+        node.relative_path for node in nodes
+    ]